@@ -8,7 +8,7 @@ from app.core.config import get_settings
 from app.models.base import Base
 
 # 🚨 IMPORTANT: import model modules so they register with Base.metadata
-from app.models import user, tool, borrow_request
+from app.models import user, tool, borrow_request, geocode_cache, job_checkpoint, table_version, sent_reminder, email_outbox
 
 # This is the Alembic Config object
 config = context.config
@@ -0,0 +1,34 @@
+"""add borrow-request listing indexes
+
+Revision ID: add_borrow_listing_indexes_20261016
+Revises: add_tools_updated_at_20261016
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_borrow_listing_indexes_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_tools_updated_at_20261016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /borrow_requests/borrower/{id}?status=...: range scan in created_at order
+    op.create_index(
+        "ix_borrow_requests_borrower_status_created",
+        "borrow_requests",
+        ["borrower_id", "status", "created_at"],
+    )
+    # GET /borrow_requests/owner/{id} and /tools/owner/{id}: the owner's tools,
+    # then their requests through ix_borrow_requests_tool_id_status
+    op.create_index("ix_tools_owner_id", "tools", ["owner_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tools_owner_id", table_name="tools")
+    op.drop_index("ix_borrow_requests_borrower_status_created", table_name="borrow_requests")
@@ -0,0 +1,30 @@
+"""add borrow_requests (tool_id, status) index
+
+Revision ID: add_br_tool_status_index_20261016
+Revises: add_job_checkpoints_20261016
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_br_tool_status_index_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_job_checkpoints_20261016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backs the correlated pending-count / per-user subqueries in GET /tools/
+    op.create_index(
+        "ix_borrow_requests_tool_id_status",
+        "borrow_requests",
+        ["tool_id", "status"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_borrow_requests_tool_id_status", table_name="borrow_requests")
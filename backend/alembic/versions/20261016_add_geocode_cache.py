@@ -0,0 +1,37 @@
+"""add geocode cache table
+
+Revision ID: add_geocode_cache_20261016
+Revises: add_tools_browse_index_20261016
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_geocode_cache_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_tools_browse_index_20261016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "geocode_cache",
+        sa.Column("address_key", sa.String(), primary_key=True),
+        sa.Column("found", sa.Boolean(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lng", sa.Float(), nullable=True),
+        sa.Column("formatted_address", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_geocode_cache_expires_at", "geocode_cache", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_geocode_cache_expires_at", table_name="geocode_cache")
+    op.drop_table("geocode_cache")
@@ -0,0 +1,46 @@
+"""add notification digest columns
+
+Revision ID: add_notification_digests_20261016
+Revises: add_email_outbox_20261016
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_notification_digests_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_email_outbox_20261016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("notification_delivery", sa.String(), nullable=False, server_default="immediate"),
+    )
+    # Batch mode: SQLite cannot add a foreign key with ALTER TABLE, so there
+    # the table is recreated; other databases get a plain ALTER
+    with op.batch_alter_table("email_outbox") as batch_op:
+        batch_op.add_column(sa.Column("recipient_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_email_outbox_recipient_id_users", "users", ["recipient_id"], ["id"]
+        )
+    # Digest flush: buffered rows grouped by recipient
+    op.create_index(
+        "ix_email_outbox_status_recipient_created",
+        "email_outbox",
+        ["status", "recipient_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_outbox_status_recipient_created", table_name="email_outbox")
+    with op.batch_alter_table("email_outbox") as batch_op:
+        batch_op.drop_constraint("fk_email_outbox_recipient_id_users", type_="foreignkey")
+        batch_op.drop_column("recipient_id")
+    op.drop_column("users", "notification_delivery")
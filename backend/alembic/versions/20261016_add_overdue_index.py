@@ -0,0 +1,30 @@
+"""add borrow_requests (status, due_date) index
+
+Revision ID: add_overdue_index_20261016
+Revises: add_borrow_listing_indexes_20261016
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_overdue_index_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_borrow_listing_indexes_20261016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /borrow_requests/overdue: status IN (APPROVED, RETURN_PENDING) AND due_date < today
+    op.create_index(
+        "ix_borrow_requests_status_due_date",
+        "borrow_requests",
+        ["status", "due_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_borrow_requests_status_due_date", table_name="borrow_requests")
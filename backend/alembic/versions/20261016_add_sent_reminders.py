@@ -0,0 +1,37 @@
+"""add sent reminders table
+
+Revision ID: add_sent_reminders_20261016
+Revises: add_overdue_index_20261016
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_sent_reminders_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_overdue_index_20261016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sent_reminders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("borrow_request_id", sa.Integer(), sa.ForeignKey("borrow_requests.id"), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("message_id", sa.String(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("borrow_request_id", "kind", "due_date", name="uq_sent_reminders_request_kind_due"),
+    )
+    op.create_index("ix_sent_reminders_id", "sent_reminders", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sent_reminders_id", table_name="sent_reminders")
+    op.drop_table("sent_reminders")
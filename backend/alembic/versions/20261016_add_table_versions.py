@@ -0,0 +1,38 @@
+"""add table versions
+
+Revision ID: add_table_versions_20261016
+Revises: add_br_tool_status_index_20261016
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_table_versions_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_br_tool_status_index_20261016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    table_versions = op.create_table(
+        "table_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+    )
+    op.bulk_insert(
+        table_versions,
+        [
+            {"name": "tools", "version": 0},
+            {"name": "borrow_requests", "version": 0},
+            {"name": "users", "version": 0},
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("table_versions")
@@ -0,0 +1,26 @@
+"""add tools browse index
+
+Revision ID: add_tools_browse_index_20261016
+Revises: add_icon_key_20250131
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_tools_browse_index_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_icon_key_20250131"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Supports keyset pagination of GET /tools/?sort=name on (name, id)
+    op.create_index("ix_tools_name_id", "tools", ["name", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tools_name_id", table_name="tools")
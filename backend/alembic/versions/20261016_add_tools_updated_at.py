@@ -0,0 +1,37 @@
+"""add tools updated_at and export indexes
+
+Revision ID: add_tools_updated_at_20261016
+Revises: add_table_versions_20261016
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_tools_updated_at_20261016"
+down_revision: Union[str, Sequence[str], None] = "add_table_versions_20261016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing tools get the migration time; the column is NOT NULL afterwards
+    op.add_column("tools", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE tools SET updated_at = CURRENT_TIMESTAMP")
+    with op.batch_alter_table("tools") as batch_op:
+        batch_op.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+
+    # Supports GET /tools/export and /borrow_requests/export filtered on updated_at
+    op.create_index("ix_tools_updated_at_id", "tools", ["updated_at", "id"])
+    op.create_index("ix_borrow_requests_updated_at_id", "borrow_requests", ["updated_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_borrow_requests_updated_at_id", table_name="borrow_requests")
+    op.drop_index("ix_tools_updated_at_id", table_name="tools")
+    with op.batch_alter_table("tools") as batch_op:
+        batch_op.drop_column("updated_at")
@@ -2,16 +2,18 @@
 from typing import Optional
 from urllib.parse import urlencode
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
+from app.api.cache import response_cache
 from app.core.auth import create_access_token, get_current_user
+from app.core.auth_cache import user_cache
 from app.core.config import get_settings
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.auth import DevLoginRequest, TokenResponse, UserResponse
+from app.schemas.auth import DevLoginRequest, TokenResponse, UserPreferencesUpdate, UserResponse
+from app.services.http_client import http_request
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 settings = get_settings()
@@ -52,40 +54,43 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
         )
 
     # Exchange authorization code for tokens
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-            },
+    token_response = await http_request(
+        "POST",
+        "https://oauth2.googleapis.com/token",
+        upstream="google",
+        data={
+            "client_id": settings.GOOGLE_CLIENT_ID,
+            "client_secret": settings.GOOGLE_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+        },
+    )
+
+    if token_response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to exchange authorization code",
         )
 
-        if token_response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to exchange authorization code",
-            )
+    tokens = token_response.json()
+    id_token = tokens.get("id_token")
 
-        tokens = token_response.json()
-        id_token = tokens.get("id_token")
+    # Get user info from Google
+    userinfo_response = await http_request(
+        "GET",
+        "https://www.googleapis.com/oauth2/v3/userinfo",
+        upstream="google",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
 
-        # Get user info from Google
-        userinfo_response = await client.get(
-            "https://www.googleapis.com/oauth2/v3/userinfo",
-            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    if userinfo_response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to get user info from Google",
         )
 
-        if userinfo_response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to get user info from Google",
-            )
-
-        google_user = userinfo_response.json()
+    google_user = userinfo_response.json()
 
     # Extract user info
     google_sub = google_user.get("sub")
@@ -117,6 +122,10 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(user)
 
+    # Listings embed owner/borrower names and emails
+    response_cache.invalidate(f"user:{user.id}")
+    user_cache.invalidate(user.id)
+
     # Create JWT token
     access_token = create_access_token(user.id)
 
@@ -155,6 +164,8 @@ def dev_login(request: DevLoginRequest, db: Session = Depends(get_db)):
         user.full_name = request.full_name
         db.commit()
         db.refresh(user)
+        response_cache.invalidate(f"user:{user.id}")
+        user_cache.invalidate(user.id)
 
     access_token = create_access_token(user.id)
     return TokenResponse(access_token=access_token)
@@ -170,6 +181,20 @@ def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+@router.patch("/me", response_model=UserResponse)
+def update_me(
+    payload: UserPreferencesUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Update the current user's preferences (notification delivery)."""
+    current_user.notification_delivery = payload.notification_delivery
+    db.commit()
+    db.refresh(current_user)
+    user_cache.invalidate(current_user.id)
+    return current_user
+
+
 @router.post("/logout")
 def logout():
     """
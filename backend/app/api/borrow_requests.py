@@ -1,86 +1,373 @@
 # app/api/borrow_requests.py
+from dataclasses import dataclass
 from typing import List
-from datetime import date 
+from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
-from app.db.session import get_db
+from app.api.cache import cache_key, response_cache
+from app.api.conditional import conditional_get, conditional_get_async
+from app.api.db_mode import async_db_route, sync_db_route
+from app.api.export import stream_ndjson
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, set_next_cursor
+from app.api.serialization import ListSerializer
+from app.db.session import get_async_db, get_async_read_db, get_db, get_read_db
 from app.models.borrow_request import BorrowRequest, RequestStatus
 from app.models.tool import Tool
 from app.models.user import User
-from app.schemas.borrow_request import BorrowRequestCreate, BorrowRequestRead
+from app.schemas.borrow_request import (
+    BorrowRequestBulkResult,
+    BorrowRequestBulkTransition,
+    BorrowRequestCreate,
+    BorrowRequestExportRead,
+    BorrowRequestRead,
+)
+from app.services.outbox import (
+    REQUEST_APPROVED,
+    REQUEST_CANCELLED,
+    REQUEST_CREATED,
+    REQUEST_DECLINED,
+    RETURN_CONFIRMED,
+    RETURN_INITIATED,
+    enqueue_email,
+    enqueue_emails_statement,
+)
+from app.services.overdue import annotate_overdue, attach_overdue, overdue_clause, overdue_columns
+from app.services.spatial_index import index_tool
 
 router = APIRouter(prefix="/borrow_requests", tags=["borrow_requests"])
 
-def _annotate_overdue_fields(req: BorrowRequest) -> None:
-    today = date.today()
+# Tables whose changes invalidate the listing ETags
+LISTING_TABLES = ("borrow_requests", "tools", "users")
 
-    is_overdue = (
-        req.status in (RequestStatus.APPROVED, RequestStatus.RETURN_PENDING)
-        and req.due_date is not None
-        and req.due_date < today
-    )
-
-    days_overdue = 0
-    days_until_due = 0
+_request_list_serializer = ListSerializer(BorrowRequestRead)
+_request_export_serializer = ListSerializer(BorrowRequestExportRead)
 
-    if req.due_date is not None:
-        if is_overdue:
-            days_overdue = (today - req.due_date).days
-            days_until_due = 0
-        else:
-            delta = (req.due_date - today).days
-            days_until_due = delta if delta > 0 else 0
-
-    setattr(req, "is_overdue", bool(is_overdue))
-    setattr(req, "days_overdue", int(days_overdue))
-    setattr(req, "days_until_due", int(days_until_due))
-
-@router.get("/", response_model=List[BorrowRequestRead])
-def list_requests(db: Session = Depends(get_db)):
-    requests = (
-        db.query(BorrowRequest)
-        .options(joinedload(BorrowRequest.tool), joinedload(BorrowRequest.borrower))
-        .all()
-    )
 
+def _request_tags(requests: List[BorrowRequest]) -> set:
+    """Tags for the rows on a cached listing; a tool change touches every request for it."""
+    tags = set()
     for r in requests:
-        _annotate_overdue_fields(r)
-
-    return requests
-
-
-@router.get("/owner/{owner_id}", response_model=List[BorrowRequestRead])
-def list_requests_for_owner(owner_id: int, db: Session = Depends(get_db)):
-    requests = (
-        db.query(BorrowRequest)
-        .join(Tool, BorrowRequest.tool_id == Tool.id)
-        .filter(Tool.owner_id == owner_id)
-        .options(joinedload(BorrowRequest.tool), joinedload(BorrowRequest.borrower))
-        .order_by(BorrowRequest.created_at.desc())
-        .all()
+        tags.update((f"request:{r.id}", f"tool:{r.tool_id}", f"user:{r.borrower_id}"))
+    return tags
+
+@dataclass
+class _ListingQuery:
+    statuses: List[RequestStatus] | None
+    created_since: datetime | None
+    created_before: datetime | None
+    limit: int | None
+    cursor: str | None
+
+
+def _listing_query(
+    status: List[RequestStatus] | None = Query(default=None, description="Only requests in these statuses (repeatable)"),
+    created_since: datetime | None = Query(default=None, description="Only requests created at or after this time"),
+    created_before: datetime | None = Query(default=None, description="Only requests created before this time"),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit for the full list"),
+    cursor: str | None = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+) -> _ListingQuery:
+    """Filters and keyset paging shared by the borrow-request listings (newest first)."""
+    if cursor is not None and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    return _ListingQuery(status, created_since, created_before, limit, cursor)
+
+
+def _listing_sort_key(r: BorrowRequest):
+    return (r.created_at.isoformat(), r.id)
+
+
+def _listing_statement(query: _ListingQuery, owner_id: int | None = None, borrower_id: int | None = None):
+    stmt = select(BorrowRequest, *overdue_columns()).options(
+        joinedload(BorrowRequest.tool), joinedload(BorrowRequest.borrower)
     )
+    if owner_id is not None:
+        stmt = stmt.join(Tool, BorrowRequest.tool_id == Tool.id).where(Tool.owner_id == owner_id)
+    if borrower_id is not None:
+        stmt = stmt.where(BorrowRequest.borrower_id == borrower_id)
+    if query.statuses:
+        stmt = stmt.where(BorrowRequest.status.in_(query.statuses))
+    if query.created_since is not None:
+        stmt = stmt.where(BorrowRequest.created_at >= query.created_since)
+    if query.created_before is not None:
+        stmt = stmt.where(BorrowRequest.created_at < query.created_before)
+
+    after = decode_cursor(query.cursor, 2)
+    if after is not None:
+        try:
+            after_created, after_id = datetime.fromisoformat(after[0]), int(after[1])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        stmt = stmt.where(
+            or_(
+                BorrowRequest.created_at < after_created,
+                and_(BorrowRequest.created_at == after_created, BorrowRequest.id < after_id),
+            )
+        )
 
-    for r in requests:
-        _annotate_overdue_fields(r)
+    stmt = stmt.order_by(BorrowRequest.created_at.desc(), BorrowRequest.id.desc())
+    if query.limit is not None:
+        stmt = stmt.limit(query.limit + 1)
+    return stmt
+
+
+def _listing_response(
+    key: str, response: Response, requests: List[BorrowRequest], list_tag: str, query: _ListingQuery
+) -> Response:
+    if query.limit is not None:
+        requests = set_next_cursor(response, requests, query.limit, _listing_sort_key)
+
+    tags = _request_tags(requests)
+    tags.add(list_tag)
+    if query.statuses:
+        # A transition can move a request onto this page, not just off it
+        tags.add("requests:status")
+    return response_cache.store(
+        key,
+        _request_list_serializer,
+        requests,
+        tags,
+        response,
+        cache_headers=(NEXT_CURSOR_HEADER,),
+    )
 
-    return requests
 
-@router.get("/borrower/{borrower_id}", response_model=List[BorrowRequestRead])
-def list_requests_for_borrower(borrower_id: int, db: Session = Depends(get_db)):
-    requests = (
-        db.query(BorrowRequest)
-        .filter(BorrowRequest.borrower_id == borrower_id)
+@sync_db_route(router.get("/", response_model=List[BorrowRequestRead]))
+def list_requests(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    query: _ListingQuery = Depends(_listing_query),
+):
+    not_modified = conditional_get(request, response, db, LISTING_TABLES, daily=True)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_requests", request, daily=True)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    requests = attach_overdue(db.execute(_listing_statement(query)).all())
+    return _listing_response(key, response, requests, "requests:all", query)
+
+
+@sync_db_route(router.get("/owner/{owner_id}", response_model=List[BorrowRequestRead]))
+def list_requests_for_owner(
+    owner_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    query: _ListingQuery = Depends(_listing_query),
+):
+    not_modified = conditional_get(request, response, db, LISTING_TABLES, daily=True)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_requests_for_owner", request, daily=True)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    requests = attach_overdue(db.execute(_listing_statement(query, owner_id=owner_id)).all())
+    return _listing_response(key, response, requests, f"owner_requests:{owner_id}", query)
+
+@sync_db_route(router.get("/borrower/{borrower_id}", response_model=List[BorrowRequestRead]))
+def list_requests_for_borrower(
+    borrower_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    query: _ListingQuery = Depends(_listing_query),
+):
+    not_modified = conditional_get(request, response, db, LISTING_TABLES, daily=True)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_requests_for_borrower", request, daily=True)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    requests = attach_overdue(db.execute(_listing_statement(query, borrower_id=borrower_id)).all())
+    return _listing_response(key, response, requests, f"borrower_requests:{borrower_id}", query)
+
+
+@async_db_route(router.get("/", response_model=List[BorrowRequestRead]))
+async def list_requests_async(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    query: _ListingQuery = Depends(_listing_query),
+):
+    """list_requests on an AsyncSession (DATABASE_ASYNC=True)."""
+    not_modified = await conditional_get_async(request, response, db, LISTING_TABLES, daily=True)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_requests", request, daily=True)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    requests = attach_overdue((await db.execute(_listing_statement(query))).all())
+    return _listing_response(key, response, requests, "requests:all", query)
+
+
+@async_db_route(router.get("/owner/{owner_id}", response_model=List[BorrowRequestRead]))
+async def list_requests_for_owner_async(
+    owner_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    query: _ListingQuery = Depends(_listing_query),
+):
+    """list_requests_for_owner on an AsyncSession (DATABASE_ASYNC=True)."""
+    not_modified = await conditional_get_async(request, response, db, LISTING_TABLES, daily=True)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_requests_for_owner", request, daily=True)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    requests = attach_overdue((await db.execute(_listing_statement(query, owner_id=owner_id))).all())
+    return _listing_response(key, response, requests, f"owner_requests:{owner_id}", query)
+
+
+@async_db_route(router.get("/borrower/{borrower_id}", response_model=List[BorrowRequestRead]))
+async def list_requests_for_borrower_async(
+    borrower_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    query: _ListingQuery = Depends(_listing_query),
+):
+    """list_requests_for_borrower on an AsyncSession (DATABASE_ASYNC=True)."""
+    not_modified = await conditional_get_async(request, response, db, LISTING_TABLES, daily=True)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_requests_for_borrower", request, daily=True)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    requests = attach_overdue((await db.execute(_listing_statement(query, borrower_id=borrower_id))).all())
+    return _listing_response(key, response, requests, f"borrower_requests:{borrower_id}", query)
+
+def _overdue_statement(owner_id: int | None, limit: int, cursor: str | None):
+    """Overdue loans, longest overdue first: a range scan on (status, due_date)."""
+    stmt = (
+        select(BorrowRequest, *overdue_columns())
         .options(joinedload(BorrowRequest.tool), joinedload(BorrowRequest.borrower))
-        .order_by(BorrowRequest.created_at.desc())
-        .all()
+        .where(overdue_clause())
+    )
+    if owner_id is not None:
+        stmt = stmt.join(Tool, BorrowRequest.tool_id == Tool.id).where(Tool.owner_id == owner_id)
+
+    after = decode_cursor(cursor, 2)
+    if after is not None:
+        try:
+            after_due, after_id = date.fromisoformat(after[0]), int(after[1])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        stmt = stmt.where(
+            or_(
+                BorrowRequest.due_date > after_due,
+                and_(BorrowRequest.due_date == after_due, BorrowRequest.id > after_id),
+            )
+        )
+    return stmt.order_by(BorrowRequest.due_date, BorrowRequest.id).limit(limit + 1)
+
+
+def _overdue_response(key: str, response: Response, requests: List[BorrowRequest], limit: int) -> Response:
+    requests = set_next_cursor(response, requests, limit, lambda r: (r.due_date.isoformat(), r.id))
+    tags = _request_tags(requests)
+    # Returns and new approvals move loans in and out of the list
+    tags.add("requests:status")
+    return response_cache.store(
+        key,
+        _request_list_serializer,
+        requests,
+        tags,
+        response,
+        cache_headers=(NEXT_CURSOR_HEADER,),
     )
 
-    for r in requests:
-        _annotate_overdue_fields(r)
 
-    return requests
+@sync_db_route(router.get("/overdue", response_model=List[BorrowRequestRead]))
+def list_overdue_requests(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    owner_id: int | None = Query(default=None, description="Only loans of this owner's tools"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+):
+    """Approved or return-pending loans past their due date, longest overdue first."""
+    not_modified = conditional_get(request, response, db, LISTING_TABLES, daily=True)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_overdue_requests", request, daily=True)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    requests = attach_overdue(db.execute(_overdue_statement(owner_id, limit, cursor)).all())
+    return _overdue_response(key, response, requests, limit)
+
+
+@async_db_route(router.get("/overdue", response_model=List[BorrowRequestRead]))
+async def list_overdue_requests_async(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    owner_id: int | None = Query(default=None, description="Only loans of this owner's tools"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+):
+    """list_overdue_requests on an AsyncSession (DATABASE_ASYNC=True)."""
+    not_modified = await conditional_get_async(request, response, db, LISTING_TABLES, daily=True)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_overdue_requests", request, daily=True)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    requests = attach_overdue((await db.execute(_overdue_statement(owner_id, limit, cursor))).all())
+    return _overdue_response(key, response, requests, limit)
+
+
+@router.get("/export", response_model=List[BorrowRequestExportRead])
+def export_requests(
+    updated_since: datetime | None = Query(default=None, description="Only requests updated at or after this time"),
+    updated_before: datetime | None = Query(default=None, description="Only requests updated before this time"),
+    status: List[RequestStatus] | None = Query(default=None),
+):
+    """
+    Stream borrow requests as newline-delimited JSON, ordered by (updated_at, id).
+    For incremental exports pass the largest updated_at seen so far as
+    updated_since; rows at that exact timestamp are sent again.
+    """
+    def build_query(db: Session):
+        query = db.query(BorrowRequest)
+        if updated_since is not None:
+            query = query.filter(BorrowRequest.updated_at >= updated_since)
+        if updated_before is not None:
+            query = query.filter(BorrowRequest.updated_at < updated_before)
+        if status:
+            query = query.filter(BorrowRequest.status.in_(status))
+        return query.order_by(BorrowRequest.updated_at, BorrowRequest.id)
+
+    return stream_ndjson(build_query, _request_export_serializer)
     
 @router.post("/", response_model=BorrowRequestRead, status_code=201)
 def create_request(payload: BorrowRequestCreate, db: Session = Depends(get_db)):
@@ -124,10 +411,18 @@ def create_request(payload: BorrowRequestCreate, db: Session = Depends(get_db)):
     )
 
     db.add(req)
+    enqueue_email(db, REQUEST_CREATED, req)
     db.commit()
     db.refresh(req)
 
-    _annotate_overdue_fields(req)
+    response_cache.invalidate(
+        f"tool:{tool.id}",
+        f"owner_requests:{tool.owner_id}",
+        f"borrower_requests:{req.borrower_id}",
+        "requests:all",
+    )
+
+    annotate_overdue(req)
 
     return req
 
@@ -139,16 +434,42 @@ def _get_request_or_404(request_id: int, db: Session) -> BorrowRequest:
     return borrow_request
 
 
-@router.patch("/{request_id}/approve", response_model=BorrowRequestRead)
-def approve_request(request_id: int, db: Session = Depends(get_db)):
-    borrow_request = _get_request_or_404(request_id, db)
+def _request_statement(request_id: int):
+    # Relationships are loaded up front: an AsyncSession cannot lazy-load
+    # them while the response is serialized
+    return (
+        select(BorrowRequest)
+        .options(joinedload(BorrowRequest.tool), joinedload(BorrowRequest.borrower))
+        .where(BorrowRequest.id == request_id)
+    )
 
-    if borrow_request.status != RequestStatus.PENDING:
-        raise HTTPException(
-            status_code=400, detail="Only pending requests can be updated"
-        )
 
-    tool = db.query(Tool).filter(Tool.id == borrow_request.tool_id).first()
+async def _get_request_or_404_async(
+    request_id: int, db: AsyncSession, reload: bool = False
+) -> BorrowRequest:
+    stmt = _request_statement(request_id)
+    if reload:
+        stmt = stmt.execution_options(populate_existing=True)
+    borrow_request = (await db.execute(stmt)).scalar_one_or_none()
+    if not borrow_request:
+        raise HTTPException(status_code=404, detail="Borrow request not found")
+    return borrow_request
+
+
+# Status transitions. Each _apply_* validates and mutates the loaded objects;
+# the sync and async endpoints only differ in how they load and commit.
+# Notifications are queued with enqueue_email() before the commit, so they
+# are written in the same transaction and sent later by the outbox worker.
+
+def _require_status(borrow_request: BorrowRequest, expected: RequestStatus, detail: str) -> None:
+    if borrow_request.status != expected:
+        raise HTTPException(status_code=400, detail=detail)
+
+
+def _apply_approve(borrow_request: BorrowRequest, tool: Tool | None):
+    """Returns the statement declining the tool's other pending requests."""
+    _require_status(borrow_request, RequestStatus.PENDING, "Only pending requests can be updated")
+
     if not tool:
         raise HTTPException(status_code=400, detail="Tool not found")
 
@@ -159,99 +480,416 @@ def approve_request(request_id: int, db: Session = Depends(get_db)):
 
     tool.is_available = False
 
-    (
-        db.query(BorrowRequest)
-        .filter(
+    return (
+        update(BorrowRequest)
+        .where(
             BorrowRequest.tool_id == borrow_request.tool_id,
             BorrowRequest.id != borrow_request.id,
             BorrowRequest.status == RequestStatus.PENDING,
         )
-        .update({BorrowRequest.status: RequestStatus.DECLINED})
+        .values(status=RequestStatus.DECLINED)
     )
 
-    db.commit()
-    db.refresh(borrow_request)
 
-    _annotate_overdue_fields(borrow_request)
+def _apply_decline(borrow_request: BorrowRequest) -> None:
+    _require_status(borrow_request, RequestStatus.PENDING, "Only pending requests can be updated")
+    borrow_request.status = RequestStatus.DECLINED
 
-    return borrow_request
 
-@router.patch("/{request_id}/decline", response_model=BorrowRequestRead)
-def decline_request(request_id: int, db: Session = Depends(get_db)):
-    borrow_request = _get_request_or_404(request_id, db)
+def _apply_cancel(borrow_request: BorrowRequest) -> None:
+    _require_status(borrow_request, RequestStatus.PENDING, "Only pending requests can be updated")
+    borrow_request.status = RequestStatus.CANCELLED
 
-    if borrow_request.status != RequestStatus.PENDING:
-        raise HTTPException(
-            status_code=400, detail="Only pending requests can be updated"
+
+def _apply_initiate_return(borrow_request: BorrowRequest) -> None:
+    _require_status(borrow_request, RequestStatus.APPROVED, "Only approved requests can be returned")
+    borrow_request.status = RequestStatus.RETURN_PENDING
+
+
+def _apply_confirm_return(borrow_request: BorrowRequest, tool: Tool | None) -> None:
+    _require_status(
+        borrow_request, RequestStatus.RETURN_PENDING, "Can only confirm returns that are pending"
+    )
+
+    if not tool:
+        raise HTTPException(status_code=400, detail="Tool not found")
+
+    tool.is_available = True
+    borrow_request.status = RequestStatus.RETURNED
+
+
+def _after_transition(borrow_request: BorrowRequest, tool: Tool | None = None) -> BorrowRequest:
+    """Post-commit bookkeeping; `tool` is passed when its availability changed."""
+    if tool is not None:
+        index_tool(tool)
+        response_cache.invalidate(
+            f"request:{borrow_request.id}", f"tool:{tool.id}", "tools:list:available", "requests:status"
         )
+    else:
+        response_cache.invalidate(f"request:{borrow_request.id}", f"tool:{borrow_request.tool_id}", "requests:status")
 
-    borrow_request.status = RequestStatus.DECLINED
+    annotate_overdue(borrow_request)
+
+    return borrow_request
+
+
+@sync_db_route(router.patch("/{request_id}/approve", response_model=BorrowRequestRead))
+def approve_request(request_id: int, db: Session = Depends(get_db)):
+    borrow_request = _get_request_or_404(request_id, db)
+    tool = db.query(Tool).filter(Tool.id == borrow_request.tool_id).first()
+
+    db.execute(_apply_approve(borrow_request, tool))
+    enqueue_email(db, REQUEST_APPROVED, borrow_request)
     db.commit()
     db.refresh(borrow_request)
 
-    _annotate_overdue_fields(borrow_request)
+    return _after_transition(borrow_request, tool)
 
-    return borrow_request
+@sync_db_route(router.patch("/{request_id}/decline", response_model=BorrowRequestRead))
+def decline_request(request_id: int, db: Session = Depends(get_db)):
+    borrow_request = _get_request_or_404(request_id, db)
+
+    _apply_decline(borrow_request)
+    enqueue_email(db, REQUEST_DECLINED, borrow_request)
+    db.commit()
+    db.refresh(borrow_request)
 
+    return _after_transition(borrow_request)
 
-@router.patch("/{request_id}/cancel", response_model=BorrowRequestRead)
+
+@sync_db_route(router.patch("/{request_id}/cancel", response_model=BorrowRequestRead))
 def cancel_request(request_id: int, db: Session = Depends(get_db)):
 
     borrow_request = _get_request_or_404(request_id, db)
 
-    if borrow_request.status != RequestStatus.PENDING:
-        raise HTTPException(
-            status_code=400, detail="Only pending requests can be updated"
-        )
-
-    borrow_request.status = RequestStatus.CANCELLED
+    _apply_cancel(borrow_request)
+    enqueue_email(db, REQUEST_CANCELLED, borrow_request)
     db.commit()
     db.refresh(borrow_request)
 
-    _annotate_overdue_fields(borrow_request)
-
-    return borrow_request
+    return _after_transition(borrow_request)
 
-@router.patch("/{request_id}/initiate-return", response_model=BorrowRequestRead)
+@sync_db_route(router.patch("/{request_id}/initiate-return", response_model=BorrowRequestRead))
 def initiate_return(request_id: int, db: Session = Depends(get_db)):
     """Borrower initiates the return process"""
     borrow_request = _get_request_or_404(request_id, db)
 
-    if borrow_request.status != RequestStatus.APPROVED:
-        raise HTTPException(
-            status_code=400, detail="Only approved requests can be returned"
-        )
-
-    borrow_request.status = RequestStatus.RETURN_PENDING
-
+    _apply_initiate_return(borrow_request)
+    enqueue_email(db, RETURN_INITIATED, borrow_request)
     db.commit()
     db.refresh(borrow_request)
 
-    _annotate_overdue_fields(borrow_request)
+    return _after_transition(borrow_request)
 
-    return borrow_request
 
-
-@router.patch("/{request_id}/confirm-return", response_model=BorrowRequestRead)
+@sync_db_route(router.patch("/{request_id}/confirm-return", response_model=BorrowRequestRead))
 def confirm_return(request_id: int, db: Session = Depends(get_db)):
     """Owner confirms the tool has been returned"""
     borrow_request = _get_request_or_404(request_id, db)
+    tool = db.query(Tool).filter(Tool.id == borrow_request.tool_id).first()
 
-    if borrow_request.status != RequestStatus.RETURN_PENDING:
-        raise HTTPException(
-            status_code=400, detail="Can only confirm returns that are pending"
-        )
+    _apply_confirm_return(borrow_request, tool)
+    enqueue_email(db, RETURN_CONFIRMED, borrow_request)
+    db.commit()
+    db.refresh(borrow_request)
 
-    tool = db.query(Tool).filter(Tool.id == borrow_request.tool_id).first()
-    if not tool:
-        raise HTTPException(status_code=400, detail="Tool not found")
+    return _after_transition(borrow_request, tool)
 
-    tool.is_available = True
-    borrow_request.status = RequestStatus.RETURNED
 
+@async_db_route(router.patch("/{request_id}/approve", response_model=BorrowRequestRead))
+async def approve_request_async(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    """approve_request on an AsyncSession (DATABASE_ASYNC=True)."""
+    borrow_request = await _get_request_or_404_async(request_id, db)
+    tool = borrow_request.tool
+
+    await db.execute(_apply_approve(borrow_request, tool))
+    enqueue_email(db, REQUEST_APPROVED, borrow_request)
+    await db.commit()
+    borrow_request = await _get_request_or_404_async(request_id, db, reload=True)
+
+    return _after_transition(borrow_request, tool)
+
+
+@async_db_route(router.patch("/{request_id}/decline", response_model=BorrowRequestRead))
+async def decline_request_async(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    """decline_request on an AsyncSession (DATABASE_ASYNC=True)."""
+    borrow_request = await _get_request_or_404_async(request_id, db)
+
+    _apply_decline(borrow_request)
+    enqueue_email(db, REQUEST_DECLINED, borrow_request)
+    await db.commit()
+    borrow_request = await _get_request_or_404_async(request_id, db, reload=True)
+
+    return _after_transition(borrow_request)
+
+
+@async_db_route(router.patch("/{request_id}/cancel", response_model=BorrowRequestRead))
+async def cancel_request_async(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    """cancel_request on an AsyncSession (DATABASE_ASYNC=True)."""
+    borrow_request = await _get_request_or_404_async(request_id, db)
+
+    _apply_cancel(borrow_request)
+    enqueue_email(db, REQUEST_CANCELLED, borrow_request)
+    await db.commit()
+    borrow_request = await _get_request_or_404_async(request_id, db, reload=True)
+
+    return _after_transition(borrow_request)
+
+
+@async_db_route(router.patch("/{request_id}/initiate-return", response_model=BorrowRequestRead))
+async def initiate_return_async(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    """initiate_return on an AsyncSession (DATABASE_ASYNC=True)."""
+    borrow_request = await _get_request_or_404_async(request_id, db)
+
+    _apply_initiate_return(borrow_request)
+    enqueue_email(db, RETURN_INITIATED, borrow_request)
+    await db.commit()
+    borrow_request = await _get_request_or_404_async(request_id, db, reload=True)
+
+    return _after_transition(borrow_request)
+
+
+@async_db_route(router.patch("/{request_id}/confirm-return", response_model=BorrowRequestRead))
+async def confirm_return_async(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    """confirm_return on an AsyncSession (DATABASE_ASYNC=True)."""
+    borrow_request = await _get_request_or_404_async(request_id, db)
+    tool = borrow_request.tool
+
+    _apply_confirm_return(borrow_request, tool)
+    enqueue_email(db, RETURN_CONFIRMED, borrow_request)
+    await db.commit()
+    borrow_request = await _get_request_or_404_async(request_id, db, reload=True)
+
+    return _after_transition(borrow_request, tool)
+
+
+# =============================================================================
+# Bulk transitions
+# =============================================================================
+# One SELECT reads the current state of every id, and each transition is
+# validated against it with the same rules as the single endpoints. The
+# valid ones are applied by one UPDATE, guarded by the expected status so a
+# concurrent change is reported instead of overwritten, plus at most two
+# statements for tool availability and competing requests. Everything
+# commits in one transaction; the response has a result per id.
+
+# target status -> (required current status, detail if it differs, outbox event)
+BULK_TRANSITIONS = {
+    RequestStatus.APPROVED: (RequestStatus.PENDING, "Only pending requests can be updated", REQUEST_APPROVED),
+    RequestStatus.DECLINED: (RequestStatus.PENDING, "Only pending requests can be updated", REQUEST_DECLINED),
+    RequestStatus.CANCELLED: (RequestStatus.PENDING, "Only pending requests can be updated", REQUEST_CANCELLED),
+    RequestStatus.RETURN_PENDING: (RequestStatus.APPROVED, "Only approved requests can be returned", RETURN_INITIATED),
+    RequestStatus.RETURNED: (
+        RequestStatus.RETURN_PENDING, "Can only confirm returns that are pending", RETURN_CONFIRMED
+    ),
+}
+
+
+def _bulk_target(payload: BorrowRequestBulkTransition) -> RequestStatus:
+    if payload.status not in BULK_TRANSITIONS:
+        raise HTTPException(status_code=400, detail=f"Cannot move requests to {payload.status.value}")
+    return payload.status
+
+
+def _bulk_state_statement(ids: List[int]):
+    return (
+        select(BorrowRequest.id, BorrowRequest.status, BorrowRequest.tool_id, Tool.is_available.label("tool_available"))
+        .outerjoin(Tool, Tool.id == BorrowRequest.tool_id)
+        .where(BorrowRequest.id.in_(ids))
+    )
+
+
+def _plan_bulk_transition(ids: List[int], rows, target: RequestStatus):
+    """
+    Validate every transition against the current rows.
+    Returns a result per id and the ids to update. The results of those ids
+    are replaced once the UPDATE confirms them.
+    """
+    source, status_detail, _ = BULK_TRANSITIONS[target]
+    found = {row.id: row for row in rows}
+    results = {}
+    candidates = []
+    approved_tools = set()
+
+    for request_id in ids:
+        row = found.get(request_id)
+        if row is None:
+            results[request_id] = BorrowRequestBulkResult(id=request_id, ok=False, detail="Borrow request not found")
+            continue
+
+        detail = None
+        if row.status != source:
+            detail = status_detail
+        elif target in (RequestStatus.APPROVED, RequestStatus.RETURNED) and row.tool_available is None:
+            detail = "Tool not found"
+        elif target == RequestStatus.APPROVED and (not row.tool_available or row.tool_id in approved_tools):
+            # Unavailable, or already approved for another request in this call
+            detail = "Tool is not available"
+
+        if target == RequestStatus.APPROVED and detail is None:
+            approved_tools.add(row.tool_id)
+        if detail is None:
+            candidates.append(request_id)
+            detail = "Borrow request changed during the update"
+        results[request_id] = BorrowRequestBulkResult(id=request_id, ok=False, status=row.status, detail=detail)
+
+    return results, candidates
+
+
+def _bulk_lock_tools_statement(tool_ids: set):
+    """Lock the tools an approval would take; returns the ids still available."""
+    return (
+        select(Tool.id)
+        .where(Tool.id.in_(tool_ids), Tool.is_available.is_(True))
+        .order_by(Tool.id)
+        .with_for_update()
+    )
+
+
+def _drop_taken_tools(results: dict, candidates: List[int], rows, available: set) -> List[int]:
+    """Approval candidates whose tool is still available once locked; the rest fail."""
+    tool_ids = {row.id: row.tool_id for row in rows}
+    kept = []
+    for request_id in candidates:
+        if tool_ids[request_id] in available:
+            kept.append(request_id)
+        else:
+            results[request_id].detail = "Tool is not available"
+    return kept
+
+
+def _bulk_update_statement(candidates: List[int], target: RequestStatus):
+    source, _, _ = BULK_TRANSITIONS[target]
+    where = [BorrowRequest.id.in_(candidates), BorrowRequest.status == source]
+    if target == RequestStatus.APPROVED:
+        # Never approve for a tool another transaction has taken meanwhile
+        where.append(exists().where(Tool.id == BorrowRequest.tool_id, Tool.is_available.is_(True)))
+    return (
+        update(BorrowRequest)
+        .where(*where)
+        .values(status=target)
+        .returning(BorrowRequest.id, BorrowRequest.tool_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _bulk_tool_statements(target: RequestStatus, tool_ids: set) -> list:
+    """Tool availability updates for the updated requests."""
+    if not tool_ids:
+        return []
+    if target == RequestStatus.APPROVED:
+        return [update(Tool).where(Tool.id.in_(tool_ids)).values(is_available=False)]
+    if target == RequestStatus.RETURNED:
+        return [update(Tool).where(Tool.id.in_(tool_ids)).values(is_available=True)]
+    return []
+
+
+def _bulk_decline_competing_statement(tool_ids: set):
+    """Decline the other pending requests for the approved tools, returning their ids."""
+    return (
+        update(BorrowRequest)
+        .where(BorrowRequest.tool_id.in_(tool_ids), BorrowRequest.status == RequestStatus.PENDING)
+        .values(status=RequestStatus.DECLINED)
+        .returning(BorrowRequest.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _after_bulk_transition(
+    results: dict, updated, declined: List[int], target: RequestStatus, tools: List[Tool]
+) -> List[BorrowRequestBulkResult]:
+    """Post-commit bookkeeping, as _after_transition for each updated request."""
+    for request_id, _ in updated:
+        results[request_id] = BorrowRequestBulkResult(id=request_id, ok=True, status=target)
+    # Requests in this call that lost their tool to another approval in it
+    for request_id in declined:
+        if request_id in results:
+            results[request_id] = BorrowRequestBulkResult(
+                id=request_id,
+                ok=False,
+                status=RequestStatus.DECLINED,
+                detail="Tool was approved for another request",
+            )
+
+    for tool in tools:
+        index_tool(tool)
+    tags = {f"request:{request_id}" for request_id, _ in updated}
+    tags |= {f"request:{request_id}" for request_id in declined}
+    tags |= {f"tool:{tool_id}" for _, tool_id in updated}
+    if tools:
+        tags.add("tools:list:available")
+    if updated:
+        tags.add("requests:status")
+        response_cache.invalidate(*tags)
+
+    return list(results.values())
+
+
+@sync_db_route(router.patch("/bulk", response_model=List[BorrowRequestBulkResult]))
+def bulk_transition(payload: BorrowRequestBulkTransition, db: Session = Depends(get_db)):
+    """Move many requests to one status in one transaction, with a result per id."""
+    target = _bulk_target(payload)
+    ids = list(dict.fromkeys(payload.ids))
+
+    rows = db.execute(_bulk_state_statement(ids)).all()
+    results, candidates = _plan_bulk_transition(ids, rows, target)
+    if candidates and target == RequestStatus.APPROVED:
+        tools_wanted = {row.tool_id for row in rows if row.id in candidates}
+        available = set(db.scalars(_bulk_lock_tools_statement(tools_wanted)).all())
+        candidates = _drop_taken_tools(results, candidates, rows, available)
+    if not candidates:
+        return list(results.values())
+
+    updated = db.execute(_bulk_update_statement(candidates, target)).all()
+    if not updated:
+        # Every candidate changed after it was read
+        return list(results.values())
+    tool_ids = {tool_id for _, tool_id in updated}
+    for stmt in _bulk_tool_statements(target, tool_ids):
+        db.execute(stmt)
+    declined = []
+    if target == RequestStatus.APPROVED and tool_ids:
+        declined = db.scalars(_bulk_decline_competing_statement(tool_ids)).all()
+    db.execute(enqueue_emails_statement(BULK_TRANSITIONS[target][2], [request_id for request_id, _ in updated]))
     db.commit()
-    db.refresh(borrow_request)
 
-    _annotate_overdue_fields(borrow_request)
+    tools = []
+    if target in (RequestStatus.APPROVED, RequestStatus.RETURNED) and tool_ids:
+        tools = db.scalars(select(Tool).where(Tool.id.in_(tool_ids))).all()
+    return _after_bulk_transition(results, updated, declined, target, tools)
+
+
+@async_db_route(router.patch("/bulk", response_model=List[BorrowRequestBulkResult]))
+async def bulk_transition_async(payload: BorrowRequestBulkTransition, db: AsyncSession = Depends(get_async_db)):
+    """bulk_transition on an AsyncSession (DATABASE_ASYNC=True)."""
+    target = _bulk_target(payload)
+    ids = list(dict.fromkeys(payload.ids))
+
+    rows = (await db.execute(_bulk_state_statement(ids))).all()
+    results, candidates = _plan_bulk_transition(ids, rows, target)
+    if candidates and target == RequestStatus.APPROVED:
+        tools_wanted = {row.tool_id for row in rows if row.id in candidates}
+        available = set((await db.scalars(_bulk_lock_tools_statement(tools_wanted))).all())
+        candidates = _drop_taken_tools(results, candidates, rows, available)
+    if not candidates:
+        return list(results.values())
+
+    updated = (await db.execute(_bulk_update_statement(candidates, target))).all()
+    if not updated:
+        # Every candidate changed after it was read
+        return list(results.values())
+    tool_ids = {tool_id for _, tool_id in updated}
+    for stmt in _bulk_tool_statements(target, tool_ids):
+        await db.execute(stmt)
+    declined = []
+    if target == RequestStatus.APPROVED and tool_ids:
+        declined = (await db.scalars(_bulk_decline_competing_statement(tool_ids))).all()
+    await db.execute(
+        enqueue_emails_statement(BULK_TRANSITIONS[target][2], [request_id for request_id, _ in updated])
+    )
+    await db.commit()
 
-    return borrow_request
+    tools = []
+    if target in (RequestStatus.APPROVED, RequestStatus.RETURNED) and tool_ids:
+        tools = (await db.scalars(select(Tool).where(Tool.id.in_(tool_ids)))).all()
+    return _after_bulk_transition(results, updated, declined, target, tools)
@@ -0,0 +1,317 @@
+# app/api/cache.py
+"""
+Response cache for the read-heavy listing endpoints.
+
+Listings are cached as rendered JSON bodies, keyed by endpoint, path
+parameters and query string (which carries per-user parameters such as
+current_user_id). Every entry is tagged with what it contains, e.g.
+`tool:12`, `user:3`, `owner_requests:3`, and the mutation endpoints evict
+by tag. Updating a tool therefore only drops the pages containing that tool.
+
+Every invalidation also bumps a generation counter and records it against
+the evicted tags. A cache miss notes the generation before the endpoint runs
+its query, and store() drops the rendered rows if any of their tags was
+invalidated since. A read that races a write therefore can't put pre-write
+rows back after the write's eviction.
+
+Backends:
+- "memory" (default): per-process LRU with TTL. Each worker invalidates its
+  own copy, so other workers can serve a stale entry until its TTL expires.
+- "redis": shared across workers. It takes any client with the redis-py API,
+  so a local stand-in (e.g. fakeredis) can replace a real server.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Set
+
+from fastapi import Request, Response
+
+from app.api.serialization import ListSerializer
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Most tags whose last invalidation the memory backend remembers
+MAX_TRACKED_TAGS = 100_000
+
+# How long the redis backend remembers a tag's last invalidation
+GENERATION_TTL_SECONDS = 3600
+
+# Generation noted by the current request's cache miss, checked by store()
+_read_generation: ContextVar[Optional[int]] = ContextVar("cache_read_generation", default=None)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class MemoryCacheBackend:
+    """Bounded LRU + TTL cache with a tag -> keys index."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires, entry, tags)
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        # tag -> generation of its last invalidation, oldest first. Tags that
+        # fell off the end count as invalidated at _generation_floor.
+        self._tag_generations: "OrderedDict[str, int]" = OrderedDict()
+        self._generation_floor = 0
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                self._drop_locked(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(
+        self, key: str, entry: CachedResponse, tags: Iterable[str], ttl: int, generation: Optional[int] = None
+    ) -> bool:
+        """Store the entry unless one of its tags was invalidated after `generation`."""
+        tags = set(tags)
+        with self._lock:
+            if generation is not None and any(
+                self._tag_generations.get(tag, self._generation_floor) > generation for tag in tags
+            ):
+                return False
+            self._drop_locked(key)
+            self._entries[key] = (time.monotonic() + ttl, entry, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop_locked(next(iter(self._entries)))
+        return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                self._tag_generations[tag] = self._generation
+                self._tag_generations.move_to_end(tag)
+                for key in self._tags.pop(tag, set()):
+                    if self._drop_locked(key):
+                        dropped += 1
+            while len(self._tag_generations) > MAX_TRACKED_TAGS:
+                _, self._generation_floor = self._tag_generations.popitem(last=False)
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._tag_generations.clear()
+            self._generation_floor = self._generation
+
+    def _drop_locked(self, key: str) -> bool:
+        item = self._entries.pop(key, None)
+        if item is None:
+            return False
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+
+class RedisCacheBackend:
+    """
+    Shared cache on a Redis-compatible client.
+    Entries live under `<prefix>entry:<key>`; each tag is a set of entry keys
+    under `<prefix>tag:<tag>` that expires with the entries it points to.
+    The generation counter is `<prefix>generation`, and `<prefix>gen:<tag>`
+    holds the generation of the tag's last invalidation.
+    """
+
+    def __init__(self, client, prefix: str = "toolsharer:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def generation(self) -> int:
+        return int(self.client.get(f"{self.prefix}generation") or 0)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raw = self.client.get(f"{self.prefix}entry:{key}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CachedResponse(body=data["body"].encode("utf-8"), headers=data["headers"])
+
+    def set(
+        self, key: str, entry: CachedResponse, tags: Iterable[str], ttl: int, generation: Optional[int] = None
+    ) -> bool:
+        """
+        Store the entry unless one of its tags was invalidated after
+        `generation`. The check runs after the write: an invalidation either
+        bumped a generation before it, or finds the entry in its tag sets.
+        """
+        tags = list(tags)
+        entry_key = f"{self.prefix}entry:{key}"
+        payload = json.dumps({"body": entry.body.decode("utf-8"), "headers": entry.headers})
+        pipe = self.client.pipeline()
+        pipe.set(entry_key, payload, ex=ttl)
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            pipe.sadd(tag_key, entry_key)
+            pipe.expire(tag_key, ttl)
+        pipe.execute()
+
+        if generation is not None and tags:
+            invalidated = self.client.mget([f"{self.prefix}gen:{tag}" for tag in tags])
+            if any(value is not None and int(value) > generation for value in invalidated):
+                self.client.delete(entry_key)
+                return False
+        return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        if not tags:
+            return 0
+        # Recorded before reading the tag sets; see set()
+        generation = self.client.incr(f"{self.prefix}generation")
+        pipe = self.client.pipeline()
+        for tag in tags:
+            pipe.set(f"{self.prefix}gen:{tag}", generation, ex=GENERATION_TTL_SECONDS)
+        pipe.execute()
+
+        tag_keys = [f"{self.prefix}tag:{tag}" for tag in tags]
+        entry_keys = set()
+        for tag_key in tag_keys:
+            entry_keys.update(self.client.smembers(tag_key))
+        if entry_keys:
+            self.client.delete(*entry_keys)
+        self.client.delete(*tag_keys)
+        return len(entry_keys)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def _build_backend():
+    settings = get_settings()
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package")
+        if not settings.RESPONSE_CACHE_REDIS_URL:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires RESPONSE_CACHE_REDIS_URL")
+        return RedisCacheBackend(redis.Redis.from_url(settings.RESPONSE_CACHE_REDIS_URL))
+    return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0, "invalidated": 0, "stale_skips": 0}
+
+    def lookup(self, key: str, response: Response) -> Optional[Response]:
+        """
+        Return the cached response for `key`, carrying over headers already set on `response`.
+        On a miss, notes the current generation for the store() that follows.
+        """
+        if not self.enabled:
+            return None
+        entry = self.backend.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            _read_generation.set(self.backend.generation())
+            return None
+        self.stats["hits"] += 1
+        cached = Response(content=entry.body, media_type="application/json", headers=entry.headers)
+        _copy_headers(response, cached)
+        return cached
+
+    def store(
+        self,
+        key: str,
+        serializer: ListSerializer,
+        rows: Any,
+        tags: Iterable[str],
+        response: Response,
+        cache_headers: Iterable[str] = (),
+    ) -> Response:
+        """
+        Render `rows` as the endpoint's response_model would, cache the body
+        under `key` with `tags`, and return it.
+        Headers listed in cache_headers are cached along with the body.
+        The body is not cached if a tag was invalidated since the lookup()
+        miss, as the rows may predate that write.
+        """
+        body = serializer.render(rows)
+        rendered = Response(content=body, media_type="application/json")
+        _copy_headers(response, rendered)
+        if self.enabled:
+            headers = {h: response.headers[h] for h in cache_headers if h in response.headers}
+            generation = _read_generation.get()
+            _read_generation.set(None)
+            if not self.backend.set(key, CachedResponse(body, headers), tags, self.ttl, generation):
+                self.stats["stale_skips"] += 1
+        return rendered
+
+    def invalidate(self, *tags: str) -> None:
+        if not self.enabled or not tags:
+            return
+        try:
+            self.stats["invalidated"] += self.backend.invalidate(tags)
+        except Exception:
+            # A failed eviction must not fail the write that triggered it
+            logger.exception(f"Failed to invalidate cache tags {tags}")
+
+
+def _copy_headers(source: Response, target: Response) -> None:
+    for name, value in source.headers.items():
+        if name.lower() not in ("content-length", "content-type"):
+            target.headers[name] = value
+
+
+def cache_key(endpoint: str, request: Request, daily: bool = False) -> str:
+    """
+    Key for an endpoint + path + sorted query string.
+    Set daily=True for responses with date-relative fields (e.g. days_overdue).
+
+    Reads served from a replica also key on the ETag computed from the
+    replica's table versions. A lagging replica then only fills entries for
+    the data version it actually has; the generation check in store() can't
+    see replica lag, as the write may have been invalidated before the read
+    started.
+    """
+    query = "&".join(sorted(str(request.url.query).split("&")))
+    key = f"{endpoint}:{request.url.path}?{query}"
+    if daily:
+        key += f"@{date.today().isoformat()}"
+    if getattr(request.state, "read_replica", False):
+        key += f"#{getattr(request.state, 'etag', '')}"
+    return key
+
+
+_settings = get_settings()
+response_cache = ResponseCache(
+    _build_backend(),
+    ttl=_settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=_settings.RESPONSE_CACHE_ENABLED,
+)
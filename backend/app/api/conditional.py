@@ -0,0 +1,84 @@
+# app/api/conditional.py
+"""
+ETag / conditional GET support for listing endpoints.
+
+ETags are derived from the table versions in app.db.versions plus the
+request path and query string, so computing one costs a single primary-key
+lookup. When the client's If-None-Match matches, the endpoint returns 304
+before running its listing queries or serializing anything.
+"""
+import hashlib
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.versions import get_versions, get_versions_async
+
+
+def compute_etag(
+    request: Request, db: Session, tables: Iterable[str], daily: bool = False
+) -> str:
+    """
+    Weak ETag for a listing that reads from `tables`.
+    Set daily=True for responses containing date-relative fields
+    (e.g. days_overdue), so they also change at midnight.
+    """
+    return _etag(request, get_versions(db, tables), daily)
+
+
+def _etag(request: Request, versions: Dict[str, int], daily: bool) -> str:
+    query = "&".join(sorted(str(request.url.query).split("&")))
+    parts = [request.url.path, query]
+    parts += [f"{name}={version}" for name, version in versions.items()]
+    if daily:
+        parts.append(date.today().isoformat())
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    db: Session,
+    tables: Iterable[str],
+    daily: bool = False,
+) -> Optional[Response]:
+    """
+    Set ETag headers on `response`, or return a 304 response to send
+    instead if the client already has the current version.
+    """
+    return _respond(request, response, compute_etag(request, db, tables, daily=daily))
+
+
+async def conditional_get_async(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    tables: Iterable[str],
+    daily: bool = False,
+) -> Optional[Response]:
+    """conditional_get for an AsyncSession."""
+    versions = await get_versions_async(db, tables)
+    return _respond(request, response, _etag(request, versions, daily))
+
+
+def _respond(request: Request, response: Response, etag: str) -> Optional[Response]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    request.state.etag = etag  # cache_key scopes replica reads to this version
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
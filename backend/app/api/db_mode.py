@@ -0,0 +1,33 @@
+# app/api/db_mode.py
+"""
+Route registration for endpoints that exist in a sync and an async variant.
+
+The hot routes have a plain `def` version on the sync Session and an
+`async def` version on AsyncSession. Exactly one of the two is registered,
+depending on DATABASE_ASYNC:
+
+    @sync_db_route(router.get("/", response_model=List[ToolRead]))
+    def list_tools(..., db: Session = Depends(get_db)): ...
+
+    @async_db_route(router.get("/", response_model=List[ToolRead]))
+    async def list_tools_async(..., db: AsyncSession = Depends(get_async_db)): ...
+"""
+from typing import Callable
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def _unregistered(fn: Callable) -> Callable:
+    return fn
+
+
+def sync_db_route(route: Callable[[Callable], Callable]) -> Callable[[Callable], Callable]:
+    """Apply the route decorator only when DATABASE_ASYNC is off."""
+    return _unregistered if settings.DATABASE_ASYNC else route
+
+
+def async_db_route(route: Callable[[Callable], Callable]) -> Callable[[Callable], Callable]:
+    """Apply the route decorator only when DATABASE_ASYNC is on."""
+    return route if settings.DATABASE_ASYNC else _unregistered
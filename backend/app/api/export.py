@@ -0,0 +1,51 @@
+# app/api/export.py
+"""
+Streaming NDJSON exports.
+
+Export endpoints validate their parameters, then hand a query builder to
+stream_ndjson. The query runs in its own session inside the response
+generator, so the session stays open while the body is streamed (on the
+read replica when one is configured and healthy). Rows are
+fetched `batch_size` at a time through a server-side cursor (`yield_per`
+implies `stream_results`). Each batch is written out before the next one is
+fetched, so memory use does not grow with the size of the table.
+"""
+import logging
+from typing import Callable
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+from app.api.serialization import ListSerializer
+from app.db.session import read_session
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_BATCH_SIZE = 1000
+
+
+def stream_ndjson(
+    build_query: Callable[[Session], Query],
+    serializer: ListSerializer,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> StreamingResponse:
+    def generate():
+        db = read_session()
+        try:
+            batch = []
+            for row in build_query(db).yield_per(batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield serializer.render_lines(batch)
+                    batch = []
+            if batch:
+                yield serializer.render_lines(batch)
+        except Exception:
+            # Headers are already sent; aborting leaves the client with a truncated body
+            logger.exception("Export failed mid-stream")
+            raise
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
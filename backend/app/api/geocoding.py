@@ -2,27 +2,56 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
+from app.api.db_mode import async_db_route, sync_db_route
 from app.core.auth import get_optional_current_user
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db, get_read_db
 from app.models.tool import Tool
 from app.models.user import User
-from app.schemas.geocoding import GeocodeRequest, GeocodeResponse, ToolWithDistance
-from app.services.geocoding import geocode_address, haversine_distance
+from app.schemas.geocoding import (
+    GeocodeRequest,
+    GeocodeResponse,
+    ToolClustersResponse,
+    ToolWithDistance,
+)
+from app.services.clustering import tool_clusters
+from app.services.geocode_cache import cached_geocode_address, geocode_cache
+from app.services.geocoding import batch_distances
+from app.services.spatial_index import MAX_SEARCH_RADIUS_KM, tool_index
 
 router = APIRouter(prefix="/geo", tags=["geocoding"])
 
 
+def _tool_with_distance(tool: Tool, distance: float) -> ToolWithDistance:
+    return ToolWithDistance(
+        id=tool.id,
+        name=tool.name,
+        description=tool.description,
+        address=tool.address,
+        lat=tool.lat,
+        lng=tool.lng,
+        owner_id=tool.owner_id,
+        owner_email=tool.owner.email if tool.owner else None,
+        owner_name=tool.owner.full_name if tool.owner else None,
+        icon_key=tool.icon_key,
+        is_available=tool.is_available,
+        distance_km=round(distance, 2),
+    )
+
+
 @router.post("/geocode", response_model=GeocodeResponse)
 async def geocode(
     request: GeocodeRequest,
+    db: Session = Depends(get_db),
 ):
     """
     Convert an address string to lat/lng coordinates.
-    Uses OpenStreetMap Nominatim API.
+    Uses OpenStreetMap Nominatim API, behind a memory + database cache.
     """
-    result = await geocode_address(request.address)
+    result = await cached_geocode_address(request.address, db)
 
     if result is None:
         raise HTTPException(
@@ -37,47 +66,152 @@ async def geocode(
     )
 
 
-@router.get("/tools/near", response_model=List[ToolWithDistance])
+@router.get("/cache/stats")
+def get_geocode_cache_stats():
+    """Hit/miss counters for the geocode cache in this process."""
+    return geocode_cache.snapshot()
+
+
+def _nearby_statement(candidates):
+    return (
+        select(Tool)
+        .options(joinedload(Tool.owner))
+        .where(Tool.id.in_([tool_id for tool_id, _ in candidates]))
+    )
+
+
+def _nearby_results(tools: List[Tool], lat: float, lng: float, radius_km: float) -> List[ToolWithDistance]:
+    # Distances are recomputed from the loaded rows in case another
+    # process moved a tool since this process indexed it
+    tools = [t for t in tools if t.lat is not None and t.lng is not None]
+    distances = batch_distances(
+        lat,
+        lng,
+        [t.lat for t in tools],
+        [t.lng for t in tools],
+        max_radius_km=radius_km,
+    )
+
+    results = []
+    for tool, distance in zip(tools, distances.tolist()):
+        if distance <= radius_km:
+            results.append(_tool_with_distance(tool, distance))
+
+    # Sort by distance
+    results.sort(key=lambda x: x.distance_km)
+    return results
+
+
+@sync_db_route(router.get("/tools/near", response_model=List[ToolWithDistance]))
 def get_nearby_tools(
     lat: float = Query(..., description="Latitude of search center"),
     lng: float = Query(..., description="Longitude of search center"),
-    radius_km: float = Query(10.0, description="Search radius in kilometers"),
-    db: Session = Depends(get_db),
+    radius_km: float = Query(10.0, gt=0, le=MAX_SEARCH_RADIUS_KM, description="Search radius in kilometers"),
+    db: Session = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_optional_current_user),
 ):
     """
     Get tools within a specified radius of a location.
     Returns tools sorted by distance, closest first.
     """
-    # Get all tools with coordinates
+    # Only load the tools the spatial index places inside the radius
+    candidates = tool_index.query_radius(lat, lng, radius_km)
+    if not candidates:
+        return []
+
+    tools = db.execute(_nearby_statement(candidates)).scalars().all()
+    return _nearby_results(tools, lat, lng, radius_km)
+
+
+@async_db_route(router.get("/tools/near", response_model=List[ToolWithDistance]))
+async def get_nearby_tools_async(
+    lat: float = Query(..., description="Latitude of search center"),
+    lng: float = Query(..., description="Longitude of search center"),
+    radius_km: float = Query(10.0, gt=0, le=MAX_SEARCH_RADIUS_KM, description="Search radius in kilometers"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Optional[User] = Depends(get_optional_current_user),
+):
+    """get_nearby_tools on an AsyncSession (DATABASE_ASYNC=True)."""
+    candidates = tool_index.query_radius(lat, lng, radius_km)
+    if not candidates:
+        return []
+
+    tools = (await db.execute(_nearby_statement(candidates))).scalars().all()
+    return _nearby_results(tools, lat, lng, radius_km)
+
+
+@router.get("/tools/nearest", response_model=List[ToolWithDistance])
+def get_nearest_tools(
+    lat: float = Query(..., description="Latitude of search center"),
+    lng: float = Query(..., description="Longitude of search center"),
+    k: int = Query(20, ge=1, le=100, description="Number of tools to return"),
+    is_available: Optional[bool] = Query(None, description="Only tools with this availability"),
+    icon_key: Optional[str] = Query(None, description="Only tools with this icon (e.g. 'drill')"),
+    max_radius_km: Optional[float] = Query(
+        None, gt=0, le=MAX_SEARCH_RADIUS_KM, description="Optional search cutoff"
+    ),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get the k closest tools matching the filters, closest first.
+    Searches outward from the center until the k closest are known, so it
+    works the same in dense cities and sparse areas.
+    """
+    candidates = tool_index.nearest(
+        lat,
+        lng,
+        k,
+        is_available=is_available,
+        icon_key=icon_key,
+        max_radius_km=max_radius_km,
+    )
+    if not candidates:
+        return []
+
+    distance_map = dict(candidates)
     tools = (
         db.query(Tool)
         .options(joinedload(Tool.owner))
-        .filter(Tool.lat.isnot(None), Tool.lng.isnot(None))
+        .filter(Tool.id.in_(list(distance_map)))
         .all()
     )
 
-    # Calculate distances and filter by radius
-    results = []
-    for tool in tools:
-        distance = haversine_distance(lat, lng, tool.lat, tool.lng)
-        if distance <= radius_km:
-            results.append(
-                ToolWithDistance(
-                    id=tool.id,
-                    name=tool.name,
-                    description=tool.description,
-                    address=tool.address,
-                    lat=tool.lat,
-                    lng=tool.lng,
-                    owner_id=tool.owner_id,
-                    owner_email=tool.owner.email if tool.owner else None,
-                    owner_name=tool.owner.full_name if tool.owner else None,
-                    is_available=tool.is_available,
-                    distance_km=round(distance, 2),
-                )
-            )
-
-    # Sort by distance
+    # Drop rows another process changed since this process indexed them
+    results = [
+        _tool_with_distance(tool, distance_map[tool.id])
+        for tool in tools
+        if tool.lat is not None
+        and tool.lng is not None
+        and (is_available is None or tool.is_available == is_available)
+        and (icon_key is None or tool.icon_key == icon_key)
+    ]
     results.sort(key=lambda x: x.distance_km)
     return results
+
+
+@router.get("/clusters", response_model=ToolClustersResponse)
+def get_tool_clusters(
+    bbox: str = Query(..., description="Viewport as min_lng,min_lat,max_lng,max_lat"),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level"),
+):
+    """
+    Aggregated tool clusters for a map viewport.
+    Served from precomputed per-zoom cells, so the cost depends on the
+    viewport size, not on how many tools exist.
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be min_lng,min_lat,max_lng,max_lat",
+        )
+
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox is out of range",
+        )
+
+    effective_zoom, clusters = tool_clusters.query(min_lat, min_lng, max_lat, max_lng, zoom)
+    return ToolClustersResponse(zoom=effective_zoom, clusters=clusters)
@@ -0,0 +1,59 @@
+# app/api/pagination.py
+"""
+Keyset (cursor) pagination helpers shared by the listing endpoints.
+
+Cursors are opaque, URL-safe strings that encode the sort key of the last row
+on a page. The next page is fetched with a `WHERE (sort_key) > (cursor)` range
+predicate, so every page costs the same regardless of how deep the client has
+paged. The cursor for the next page is returned in the `X-Next-Cursor`
+response header, which keeps the response body a plain JSON list.
+"""
+import base64
+import json
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key values of the last row on a page into a cursor."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], expected_len: int) -> Optional[list]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Returns None when no cursor was supplied, raises 400 if it is malformed.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != expected_len:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+    return values
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, key) -> list:
+    """
+    Trim a page fetched with `limit + 1` rows down to `limit` and, if there
+    are more rows, set the next-page cursor header from the last row's key.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
+    return rows
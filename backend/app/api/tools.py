@@ -1,76 +1,294 @@
 # app/api/tools.py
-from typing import List
+from datetime import datetime
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.api.cache import cache_key, response_cache
+from app.api.conditional import conditional_get, conditional_get_async
+from app.api.db_mode import async_db_route, sync_db_route
+from app.api.export import stream_ndjson
+from app.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    set_next_cursor,
+)
+from app.api.serialization import ListSerializer
 from app.core.auth import get_current_user
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db, get_read_db
 from app.models.borrow_request import BorrowRequest, RequestStatus
 from app.models.tool import Tool
 from app.models.user import User
-from app.schemas.tool import ToolCreate, ToolRead, ToolUpdate
+from app.schemas.tool import ToolCreate, ToolExportRead, ToolRead, ToolUpdate
+from app.services.spatial_index import index_tool, unindex_tool
 
 router = APIRouter(prefix="/tools", tags=["tools"])
 
+# Tables whose changes invalidate the listing ETags
+BROWSE_TABLES = ("tools", "borrow_requests", "users")
 
-@router.get("/", response_model=List[ToolRead])
-def list_tools(
-    db: Session = Depends(get_db),
-    current_user_id: int | None = Query(default=None),
-):
-    tools = db.query(Tool).options(joinedload(Tool.owner)).all()
-
-    # Get pending request counts per tool
-    pending_counts = (
-        db.query(BorrowRequest.tool_id, func.count(BorrowRequest.id))
-        .filter(BorrowRequest.status == RequestStatus.PENDING)
-        .group_by(BorrowRequest.tool_id)
-        .all()
+_tool_list_serializer = ListSerializer(ToolRead)
+_tool_export_serializer = ListSerializer(ToolExportRead)
+
+
+def _browse_columns(current_user_id: int | None) -> list:
+    """
+    Columns for the browse listing, shaped like ToolRead.
+    Per-tool aggregates are correlated subqueries, so the whole page is one
+    SELECT and they are only evaluated for the rows being returned.
+    """
+    pending_count = (
+        select(func.count(BorrowRequest.id))
+        .where(
+            BorrowRequest.tool_id == Tool.id,
+            BorrowRequest.status == RequestStatus.PENDING,
+        )
+        .correlate(Tool)
+        .scalar_subquery()
     )
-    pending_count_map = {row[0]: row[1] for row in pending_counts}
 
-    # Populate owner details and pending counts for all tools
-    for t in tools:
-        if t.owner:
-            setattr(t, "owner_email", t.owner.email)
-            setattr(t, "owner_name", t.owner.full_name)
-        setattr(t, "pending_request_count", pending_count_map.get(t.id, 0))
+    columns = [
+        Tool.id,
+        Tool.name,
+        Tool.description,
+        Tool.address,
+        Tool.lat,
+        Tool.lng,
+        Tool.icon_key,
+        Tool.owner_id,
+        Tool.is_available,
+        User.email.label("owner_email"),
+        User.full_name.label("owner_name"),
+        pending_count.label("pending_request_count"),
+    ]
 
     if current_user_id is None:
-        return tools
+        return columns
 
-    # Get user's pending requests with messages
-    pending_requests = (
-        db.query(BorrowRequest.tool_id, BorrowRequest.message)
-        .filter(
+    def mine(status_):
+        return and_(
+            BorrowRequest.tool_id == Tool.id,
             BorrowRequest.borrower_id == current_user_id,
-            BorrowRequest.status == RequestStatus.PENDING,
+            BorrowRequest.status == status_,
         )
-        .all()
+
+    my_pending_message = (
+        select(BorrowRequest.message)
+        .where(mine(RequestStatus.PENDING))
+        .order_by(BorrowRequest.id.desc())
+        .limit(1)
+        .correlate(Tool)
+        .scalar_subquery()
     )
-    pending_map = {row[0]: row[1] for row in pending_requests}
 
-    approved_tool_ids = (
-        db.query(BorrowRequest.tool_id)
-        .filter(
-            BorrowRequest.borrower_id == current_user_id,
-            BorrowRequest.status == RequestStatus.APPROVED,
-        )
-        .all()
+    return columns + [
+        exists().where(mine(RequestStatus.PENDING)).label("has_pending_request"),
+        exists().where(mine(RequestStatus.APPROVED)).label("is_borrowing"),
+        my_pending_message.label("my_pending_request_message"),
+    ]
+
+
+def _browse_statement(
+    current_user_id: int | None,
+    limit: int,
+    cursor: str | None,
+    sort: str,
+    is_available: bool | None,
+    owner_id: int | None,
+    icon_key: str | None,
+    exclude_own: bool,
+):
+    """The browse page SELECT (limit + 1 rows) and the sort key for its cursor."""
+    stmt = (
+        select(*_browse_columns(current_user_id))
+        .select_from(Tool)
+        .outerjoin(User, User.id == Tool.owner_id)
     )
-    approved_set = {row[0] for row in approved_tool_ids}
 
-    for t in tools:
-        setattr(t, "has_pending_request", t.id in pending_map)
-        setattr(t, "is_borrowing", t.id in approved_set)
-        setattr(t, "my_pending_request_message", pending_map.get(t.id))
+    if is_available is not None:
+        stmt = stmt.where(Tool.is_available == is_available)
+    if owner_id is not None:
+        stmt = stmt.where(Tool.owner_id == owner_id)
+    if icon_key is not None:
+        stmt = stmt.where(Tool.icon_key == icon_key)
+    if exclude_own and current_user_id is not None:
+        stmt = stmt.where(Tool.owner_id != current_user_id)
 
-    return tools
+    if sort == "name":
+        after = decode_cursor(cursor, 2)
+        if after is not None:
+            try:
+                after_name, after_id = str(after[0]), int(after[1])
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+            stmt = stmt.where(
+                or_(
+                    Tool.name > after_name,
+                    and_(Tool.name == after_name, Tool.id > after_id),
+                )
+            )
+        stmt = stmt.order_by(Tool.name, Tool.id)
+        sort_key = lambda t: (t.name, t.id)
+    else:
+        after = decode_cursor(cursor, 1)
+        if after is not None:
+            try:
+                after_id = int(after[0])
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+            stmt = stmt.where(Tool.id > after_id)
+        stmt = stmt.order_by(Tool.id)
+        sort_key = lambda t: (t.id,)
+
+    return stmt.limit(limit + 1), sort_key
+
+
+def _browse_response(
+    key: str,
+    response: Response,
+    rows: list,
+    limit: int,
+    sort_key,
+    sort: str,
+    is_available: bool | None,
+    icon_key: str | None,
+) -> Response:
+    rows = set_next_cursor(response, rows, limit, sort_key)
+
+    # Any page can gain or lose rows when tools are created or deleted;
+    # filtered/sorted pages also depend on the fields they filter/sort on
+    tags = {"tools:list"}
+    if is_available is not None:
+        tags.add("tools:list:available")
+    if icon_key is not None:
+        tags.add("tools:list:icon")
+    if sort == "name":
+        tags.add("tools:list:name")
+    for row in rows:
+        tags.update((f"tool:{row.id}", f"user:{row.owner_id}"))
+
+    return response_cache.store(
+        key,
+        _tool_list_serializer,
+        rows,
+        tags,
+        response,
+        cache_headers=(NEXT_CURSOR_HEADER,),
+    )
+
+
+@sync_db_route(router.get("/", response_model=List[ToolRead]))
+def list_tools(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user_id: int | None = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+    sort: Literal["id", "name"] = Query(default="id"),
+    is_available: bool | None = Query(default=None),
+    owner_id: int | None = Query(default=None),
+    icon_key: str | None = Query(default=None),
+    exclude_own: bool = Query(default=False, description="Hide tools owned by current_user_id"),
+):
+    """
+    Browse tools one keyset page at a time.
+    Owner details, pending counts and per-user flags come back from the same
+    SELECT as the tools, already shaped like ToolRead.
+    """
+    not_modified = conditional_get(request, response, db, BROWSE_TABLES)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_tools", request)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    stmt, sort_key = _browse_statement(
+        current_user_id, limit, cursor, sort, is_available, owner_id, icon_key, exclude_own
+    )
+    rows = db.execute(stmt).all()
+    return _browse_response(key, response, rows, limit, sort_key, sort, is_available, icon_key)
+
+
+@async_db_route(router.get("/", response_model=List[ToolRead]))
+async def list_tools_async(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user_id: int | None = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+    sort: Literal["id", "name"] = Query(default="id"),
+    is_available: bool | None = Query(default=None),
+    owner_id: int | None = Query(default=None),
+    icon_key: str | None = Query(default=None),
+    exclude_own: bool = Query(default=False, description="Hide tools owned by current_user_id"),
+):
+    """list_tools on an AsyncSession (DATABASE_ASYNC=True)."""
+    not_modified = await conditional_get_async(request, response, db, BROWSE_TABLES)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_tools", request)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
+    stmt, sort_key = _browse_statement(
+        current_user_id, limit, cursor, sort, is_available, owner_id, icon_key, exclude_own
+    )
+    rows = (await db.execute(stmt)).all()
+    return _browse_response(key, response, rows, limit, sort_key, sort, is_available, icon_key)
+
+@router.get("/export", response_model=List[ToolExportRead])
+def export_tools(
+    updated_since: datetime | None = Query(default=None, description="Only tools updated at or after this time"),
+    updated_before: datetime | None = Query(default=None, description="Only tools updated before this time"),
+    is_available: bool | None = Query(default=None),
+    owner_id: int | None = Query(default=None),
+):
+    """
+    Stream tools as newline-delimited JSON, ordered by (updated_at, id).
+    For incremental exports pass the largest updated_at seen so far as
+    updated_since; rows at that exact timestamp are sent again.
+    """
+    def build_query(db: Session):
+        query = db.query(Tool)
+        if updated_since is not None:
+            query = query.filter(Tool.updated_at >= updated_since)
+        if updated_before is not None:
+            query = query.filter(Tool.updated_at < updated_before)
+        if is_available is not None:
+            query = query.filter(Tool.is_available == is_available)
+        if owner_id is not None:
+            query = query.filter(Tool.owner_id == owner_id)
+        return query.order_by(Tool.updated_at, Tool.id)
+
+    return stream_ndjson(build_query, _tool_export_serializer)
 
 @router.get("/owner/{owner_id}", response_model=List[ToolRead])
-def list_tools_for_owner(owner_id: int, db: Session = Depends(get_db)):
+def list_tools_for_owner(
+    owner_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
+    not_modified = conditional_get(request, response, db, BROWSE_TABLES)
+    if not_modified is not None:
+        return not_modified
+
+    key = cache_key("list_tools_for_owner", request)
+    cached = response_cache.lookup(key, response)
+    if cached is not None:
+        return cached
+
     tools = db.query(Tool).filter(Tool.owner_id == owner_id).all()
 
     tool_ids = [t.id for t in tools]
@@ -94,7 +312,10 @@ def list_tools_for_owner(owner_id: int, db: Session = Depends(get_db)):
         setattr(t, "borrowed_by_user_id", info["user_id"] if info else None)
         setattr(t, "borrowed_by_email", info["email"] if info else None)
 
-    return tools
+    tags = {f"owner_tools:{owner_id}"}
+    tags.update(f"tool:{t.id}" for t in tools)
+    tags.update(f"user:{info['user_id']}" for info in approved_map.values())
+    return response_cache.store(key, _tool_list_serializer, tools, tags, response)
 
 @router.post("/", response_model=ToolRead, status_code=201)
 def create_tool(
@@ -116,6 +337,9 @@ def create_tool(
     db.add(tool)
     db.commit()
     db.refresh(tool)
+
+    index_tool(tool)
+    response_cache.invalidate("tools:list", f"owner_tools:{tool.owner_id}")
     return tool
 
 @router.put("/{tool_id}", response_model=ToolRead)
@@ -124,6 +348,12 @@ def update_tool(tool_id: int, payload: ToolUpdate, db: Session = Depends(get_db)
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
 
+    invalidate = [f"tool:{tool.id}"]
+    if payload.name is not None and payload.name != tool.name:
+        invalidate.append("tools:list:name")
+    if payload.icon_key is not None and payload.icon_key != tool.icon_key:
+        invalidate.append("tools:list:icon")
+
     # Update only provided fields
     if payload.name is not None:
         tool.name = payload.name
@@ -140,6 +370,9 @@ def update_tool(tool_id: int, payload: ToolUpdate, db: Session = Depends(get_db)
 
     db.commit()
     db.refresh(tool)
+
+    index_tool(tool)
+    response_cache.invalidate(*invalidate)
     return tool
 
 @router.patch("/{tool_id}/availability", response_model=ToolRead)
@@ -165,6 +398,9 @@ def toggle_tool_availability(tool_id: int, db: Session = Depends(get_db)):
     tool.is_available = not tool.is_available
     db.commit()
     db.refresh(tool)
+
+    index_tool(tool)
+    response_cache.invalidate(f"tool:{tool.id}", "tools:list:available")
     return tool
 
 @router.delete("/{tool_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -184,7 +420,11 @@ def delete_tool(tool_id: int, db: Session = Depends(get_db)):
             detail="Cannot delete tool with existing borrow requests",
         )
 
+    owner_id = tool.owner_id
     db.delete(tool)
     db.commit()
+
+    unindex_tool(tool_id)
+    response_cache.invalidate(f"tool:{tool_id}", "tools:list", f"owner_tools:{owner_id}")
     return
     
\ No newline at end of file
@@ -7,6 +7,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import token_cache, user_cache
 from app.core.config import get_settings
 from app.db.session import get_db
 from app.models.user import User
@@ -28,15 +29,34 @@ def create_access_token(user_id: int) -> str:
 
 def decode_token(token: str) -> Optional[int]:
     """Decode a JWT token and return the user ID, or None if invalid."""
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
         user_id = payload.get("sub")
         if user_id is None:
             return None
-        return int(user_id)
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         return None
 
+    # Only verified tokens are cached, and never past their expiry
+    exp = payload.get("exp")
+    token_cache.put(token, user_id, float(exp) if exp is not None else None)
+    return user_id
+
+
+def _get_user(db: Session, user_id: int) -> Optional[User]:
+    """Load a user by id, from the short-TTL user cache when possible."""
+    user = user_cache.get(db, user_id)
+    if user is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            user_cache.put(user)
+    return user
+
 
 def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
@@ -61,7 +81,7 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = _get_user(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -87,4 +107,4 @@ def get_optional_current_user(
     if user_id is None:
         return None
 
-    return db.query(User).filter(User.id == user_id).first()
+    return _get_user(db, user_id)
@@ -0,0 +1,107 @@
+# app/core/auth_cache.py
+"""
+In-process caches that keep authentication off the database on warm requests.
+
+- token_cache: verified JWT -> user id, until the token's own `exp`. Only
+  tokens that passed signature verification are stored.
+- user_cache: user id -> column values of the User row, for a short TTL.
+  A hit is merged into the request's session with load=False, which makes
+  it a normal persistent object (relationships still lazy-load) without
+  emitting a SELECT.
+
+Code that changes a user row must call user_cache.invalidate(user_id) after
+commit. The TTL bounds staleness for changes made by other processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import get_settings
+from app.models.user import User
+
+settings = get_settings()
+
+
+class TokenCache:
+    """Bounded LRU of verified token -> (user_id, exp as a unix timestamp)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[int]:
+        with self._lock:
+            item = self._entries.get(token)
+            if item is None:
+                return None
+            user_id, exp = item
+            if exp is not None and exp <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user_id
+
+    def put(self, token: str, user_id: int, exp: Optional[float]) -> None:
+        with self._lock:
+            self._entries[token] = (user_id, exp)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class UserCache:
+    """Bounded LRU + TTL of user id -> User column values."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (expires, values)
+        self._lock = threading.Lock()
+        # Table columns rather than mapper attributes: reading those here, at
+        # import time, would configure the mappers before all models exist
+        self._columns = [c.key for c in User.__table__.columns]
+
+    def get(self, db: Session, user_id: int) -> Optional[User]:
+        """Return the cached user attached to `db`, or None on a miss."""
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            values = item[1]
+
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def put(self, user: User) -> None:
+        values = {key: getattr(user, key) for key in self._columns}
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl_seconds, values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids: int) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
+user_cache = UserCache(settings.AUTH_USER_CACHE_MAX_ENTRIES, settings.AUTH_USER_CACHE_TTL_SECONDS)
@@ -12,11 +12,35 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./toolsharer.db"
+    # Serve the hot routes (tool browse/nearby, borrow-request listings and
+    # transitions) with async sessions. Needs psycopg (Postgres) or aiosqlite.
+    DATABASE_ASYNC: bool = False
+    DATABASE_ASYNC_URL: Optional[str] = None  # Defaults to DATABASE_URL with an async driver
+    DB_ECHO: bool = False  # Log every SQL statement
+    # Connection pool, per engine and per process (not used for in-memory SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Replace connections older than this; -1 disables
+    DB_POOL_PRE_PING: bool = True  # Test connections on checkout, drop dead ones
+    DB_N_PLUS_ONE_THRESHOLD: int = 10  # Warn when one statement shape repeats more than this in a request; 0 disables
+    # Read replica for listing endpoints and exports (see app/db/replica.py)
+    DATABASE_REPLICA_URL: Optional[str] = None
+    DATABASE_REPLICA_ASYNC_URL: Optional[str] = None  # Defaults to DATABASE_REPLICA_URL with an async driver
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # Read from the primary while the replica lags more than this
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0  # Keep a user's reads on the primary this long after they write
+
+    # Request/dependency metrics at /metrics (see app/core/metrics.py)
+    METRICS_ENABLED: bool = True
 
     # JWT Auth
     JWT_SECRET_KEY: str = "dev-secret-change-in-production"  # Change in .env for production!
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_HOURS: int = 24
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10_000  # Verified tokens, kept until their exp
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10_000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60  # Bounds staleness of changes made by other processes
 
     # Google OAuth
     GOOGLE_CLIENT_ID: Optional[str] = None
@@ -29,6 +53,41 @@ class Settings(BaseSettings):
     # Dev mode - allows dev bypass login
     DEV_AUTH_ENABLED: bool = True
 
+    # Response cache for listing endpoints (see app/api/cache.py)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "memory"  # "memory" or "redis"
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2000  # memory backend only
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = None  # e.g. redis://localhost:6379/0
+    FAST_JSON_RESPONSES: bool = False  # Serialize listings without re-validating rows (app/api/serialization.py)
+
+    # Geocoding cache (Nominatim allows ~1 request/second)
+    GEOCODE_CACHE_MAX_ENTRIES: int = 10_000  # In-process LRU size
+    GEOCODE_CACHE_TTL_HOURS: int = 24 * 30  # Found addresses
+    GEOCODE_NEGATIVE_CACHE_TTL_HOURS: int = 24  # Addresses Nominatim could not resolve
+
+    # Geocoding backfill for tools/users missing coordinates
+    GEOCODE_BACKFILL_ON_STARTUP: bool = False
+    GEOCODE_BACKFILL_BATCH_SIZE: int = 50
+    GEOCODE_RATE_PER_SECOND: float = 1.0  # Nominatim usage policy
+    GEOCODE_BACKFILL_RETRY_SECONDS: float = 300.0  # In-process backfill: wait after an upstream failure
+
+    # In-process spatial index (see app/services/spatial_index.py)
+    TOOL_INDEX_SYNC_INTERVAL_SECONDS: float = 5.0  # Reload after other processes change tools; 0 disables
+
+    # Map clustering (precomputed per zoom level, see app/services/clustering.py)
+    CLUSTER_MAX_ZOOM: int = 14
+    CLUSTER_MAX_CELLS: int = 4096  # Per-request cap on grid cells scanned
+
+    # Shared outbound HTTP client (Nominatim, Google OAuth)
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP2_ENABLED: bool = False  # Requires the 'h2' package
+    NOMINATIM_TIMEOUT_SECONDS: float = 10.0
+    GOOGLE_OAUTH_TIMEOUT_SECONDS: float = 5.0
+
     # AWS settings
     AWS_REGION: str = "eu-north-1"
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -43,6 +102,26 @@ class Settings(BaseSettings):
     SES_ENDPOINT_URL: Optional[str] = None  # For LocalStack: http://localstack:4566
     SES_SENDER_EMAIL: str = "noreply@toolsharer.local"
 
+    # Due-date reminder job (see app/services/reminders.py)
+    REMINDER_BATCH_SIZE: int = 500  # Borrowers loaded per query
+    REMINDER_SES_MAX_SEND_RATE: float = 14.0  # Emails per second; the account's SES sending rate
+    REMINDER_DUE_SOON_TEMPLATE: str = "toolsharer-due-soon"
+    REMINDER_OVERDUE_TEMPLATE: str = "toolsharer-overdue"
+
+    # Notification email outbox (see app/services/outbox.py)
+    EMAIL_OUTBOX_WORKER_IN_PROCESS: bool = False  # Otherwise run scripts/email_outbox_worker.py
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100
+    EMAIL_OUTBOX_CONCURRENCY: int = 10  # SES calls in flight per worker
+    EMAIL_OUTBOX_POLL_INTERVAL_SECONDS: float = 5.0
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300  # Claimed rows are retried after this if the worker dies
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_BASE_SECONDS: float = 30.0  # Doubles after each failed attempt
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: float = 3600.0
+    # Digest delivery (users with notification_delivery = "digest")
+    EMAIL_DIGEST_WINDOW_SECONDS: int = 3600  # Buffer a recipient's events this long, then send one email
+    EMAIL_DIGEST_BATCH_SIZE: int = 200  # Recipients per flush pass
+    EMAIL_DIGEST_TEMPLATE: str = "toolsharer-digest"
+
     # Cognito placeholders (to fill later)
     COGNITO_USER_POOL_ID: Optional[str] = None
     COGNITO_CLIENT_ID: Optional[str] = None
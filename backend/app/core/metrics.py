@@ -0,0 +1,216 @@
+# app/core/metrics.py
+"""
+In-process metrics, rendered in the Prometheus text exposition format.
+
+- Per route template (e.g. /api/tools/owner/{owner_id}) and method:
+  request latency and response size histograms, in-flight requests and
+  response counts by status. MetricsMiddleware records these.
+- Outbound dependencies (db, db_pool, s3, ses, nominatim, google): every
+  call is timed with record_dependency(), which also adds the time to the
+  current request's breakdown. When the request ends, the per-request
+  totals go into a histogram labelled by route and dependency, so a route's
+  p99 can be compared with the p99 of the time it spent in each dependency.
+  The same breakdown is sent back in a Server-Timing header.
+- SQL statements per request and N+1 warnings (app/db/query_stats.py).
+
+Metrics are per process; Prometheus sums them across tasks.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += self._render_samples(items)
+        return lines
+
+    def _render_samples(self, items) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+            for labels, value in items
+        ]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self, items) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames + ("le",), labels + (_format_number(bound),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labelnames + ("le",), labels + ("+Inf",))
+            lines.append(f"{self.name}_bucket{le} {count}")
+            base = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format_number(total)}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "toolsharer_http_request_duration_seconds", "Request latency by route template.", ("method", "route"),
+))
+REQUEST_RESPONSE_SIZE = registry.register(Histogram(
+    "toolsharer_http_response_size_bytes", "Response body size by route template.", ("method", "route"),
+    buckets=SIZE_BUCKETS,
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "toolsharer_http_requests_in_flight", "Requests currently being served.", ("method", "route"),
+))
+RESPONSES = registry.register(Counter(
+    "toolsharer_http_responses_total", "Responses by route template and status code.", ("method", "route", "status"),
+))
+REQUEST_DB_QUERIES = registry.register(Histogram(
+    "toolsharer_http_request_db_queries", "SQL statements issued per request.", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+N_PLUS_ONE_WARNINGS = registry.register(Counter(
+    "toolsharer_n_plus_one_warnings_total", "Requests that repeated one statement shape past the threshold.",
+    ("method", "route"),
+))
+DEPENDENCY_CALL_LATENCY = registry.register(Histogram(
+    "toolsharer_dependency_call_duration_seconds", "Duration of individual outbound calls.", ("dependency",),
+))
+REQUEST_DEPENDENCY_TIME = registry.register(Histogram(
+    "toolsharer_request_dependency_seconds",
+    "Total time one request spent in an outbound dependency.",
+    ("method", "route", "dependency"),
+))
+
+# =============================================================================
+# Per-request dependency breakdown
+# =============================================================================
+
+# dependency -> seconds for the request being served (None outside requests).
+# Sync endpoints run in worker threads with a copy of the context, which
+# still refers to the same dict.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> Tuple[Dict[str, float], object]:
+    timings: Dict[str, float] = {}
+    return timings, _request_timings.set(timings)
+
+
+def finish_request_timings(token, timings: Dict[str, float], method: str, route: str) -> None:
+    _request_timings.reset(token)
+    for dependency, seconds in timings.items():
+        REQUEST_DEPENDENCY_TIME.observe(seconds, method, route, dependency)
+
+
+def record_dependency(dependency: str, seconds: float) -> None:
+    """Record one outbound call; adds to the current request's breakdown if there is one."""
+    DEPENDENCY_CALL_LATENCY.observe(seconds, dependency)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[dependency] = timings.get(dependency, 0.0) + seconds
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Server-Timing value, e.g. 'db;dur=12.1, nominatim;dur=310.4' (milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def time_boto_client(client, dependency: str) -> None:
+    """Record every API call made through a boto3 client (retries included) as `dependency`."""
+    def start(context, **kwargs):
+        context["metrics_started_at"] = time.perf_counter()
+
+    def finish(context, **kwargs):
+        started = context.get("metrics_started_at")
+        if started is not None:
+            record_dependency(dependency, time.perf_counter() - started)
+
+    # before-parameter-build fires for every call; before-call can be short-circuited
+    client.meta.events.register("before-parameter-build", start)
+    client.meta.events.register("after-call", finish)
+    client.meta.events.register("after-call-error", finish)
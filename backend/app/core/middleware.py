@@ -0,0 +1,134 @@
+# app/core/middleware.py
+"""
+ASGI middleware shared by all routes.
+
+MetricsMiddleware records per-route latency, response size, in-flight and
+status metrics (app/core/metrics.py), collects the request's outbound
+dependency timings and returns them in a Server-Timing header. It also
+counts the request's SQL statements (app/db/query_stats.py); with DEBUG on,
+the count and DB time are sent back in X-DB-Queries / X-DB-Time-Ms.
+
+ReadYourWritesMiddleware identifies the caller from the bearer token and
+puts the user id in request.state.user_id, where get_read_db picks it up.
+When the caller's write succeeds (any method other than GET, HEAD or
+OPTIONS that returns a status below 400), it records the write, so that
+user's reads stay on the primary for DB_READ_YOUR_WRITES_SECONDS.
+"""
+import time
+from typing import Optional
+
+from starlette.routing import Match
+
+from app.core.auth import decode_token
+from app.core.config import get_settings
+from app.core.metrics import (
+    N_PLUS_ONE_WARNINGS,
+    REQUEST_DB_QUERIES,
+    REQUEST_LATENCY,
+    REQUEST_RESPONSE_SIZE,
+    REQUESTS_IN_FLIGHT,
+    RESPONSES,
+    finish_request_timings,
+    server_timing_header,
+    start_request_timings,
+)
+from app.db.query_stats import track_request
+from app.db.replica import replica_health
+
+settings = get_settings()
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _bearer_user_id(scope) -> Optional[int]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return decode_token(token.strip())
+            return None
+    return None
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        user_id = _bearer_user_id(scope)
+        scope.setdefault("state", {})["user_id"] = user_id
+        if user_id is None or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_recording_write(message):
+            # The endpoint has committed by the time the response starts
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                replica_health.mark_write(user_id)
+            await send(message)
+
+        await self.app(scope, receive, send_recording_write)
+
+
+def _route_template(scope) -> str:
+    """Path template of the route that will handle the request, e.g. /api/tools/{tool_id}."""
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path_format
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path_format
+    # Unmatched paths share one label, so scans for random URLs can't blow up cardinality
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status_code = 500
+        response_size = 0
+        timings, token = start_request_timings()
+
+        with track_request(f"{method} {route}") as query_stats:
+
+            async def send_with_metrics(message):
+                nonlocal status_code, response_size
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    headers = list(message.get("headers", ()))
+                    if timings:
+                        headers.append((b"server-timing", server_timing_header(timings).encode("latin-1")))
+                    if settings.DEBUG:
+                        headers.append((b"x-db-queries", str(query_stats.count).encode("latin-1")))
+                        headers.append((b"x-db-time-ms", f"{query_stats.seconds * 1000:.1f}".encode("latin-1")))
+                    message = {**message, "headers": headers}
+                elif message["type"] == "http.response.body":
+                    response_size += len(message.get("body", b""))
+                await send(message)
+
+            REQUESTS_IN_FLIGHT.inc(method, route)
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            finally:
+                REQUEST_LATENCY.observe(time.perf_counter() - started, method, route)
+                REQUEST_RESPONSE_SIZE.observe(response_size, method, route)
+                RESPONSES.inc(method, route, str(status_code))
+                REQUESTS_IN_FLIGHT.dec(method, route)
+                REQUEST_DB_QUERIES.observe(query_stats.count, method, route)
+                if query_stats.warned:
+                    N_PLUS_ONE_WARNINGS.inc(method, route)
+                finish_request_timings(token, timings, method, route)
@@ -0,0 +1,124 @@
+# app/db/pool_metrics.py
+"""
+Connection pool instrumentation.
+
+Engines are built with an instrumented QueuePool (or its asyncio variant)
+that times every checkout, including the wait for a free connection, and
+counts pool timeouts. Pool events count connection churn: connections
+opened, closed and invalidated. snapshot() combines these counters with the
+pool's live state (checked out, idle, overflow), which is what sizing
+DB_POOL_SIZE / DB_MAX_OVERFLOW against the number of running tasks needs.
+"""
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import record_dependency
+
+# Recent checkout waits kept for percentiles
+_RECENT_WAITS = 1000
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.connections_invalidated = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self._recent_waits = deque(maxlen=_RECENT_WAITS)
+
+    def record_checkout(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_seconds += wait_seconds
+            self.wait_max_seconds = max(self.wait_max_seconds, wait_seconds)
+            self._recent_waits.append(wait_seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def _increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            recent = sorted(self._recent_waits)
+            stats = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "connections_invalidated": self.connections_invalidated,
+                "checkout_wait_ms": {
+                    "avg": round(self.wait_total_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p95_recent": round(recent[int(len(recent) * 0.95)] * 1000, 3) if recent else 0.0,
+                    "max": round(self.wait_max_seconds * 1000, 3),
+                },
+            }
+        stats.update(
+            pool_size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            status=pool.status(),
+        )
+        return stats
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics = None
+
+    def connect(self):
+        metrics = self.metrics
+        if metrics is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            metrics.record_timeout()
+            raise
+        waited = time.perf_counter() - started
+        metrics.record_checkout(waited)
+        record_dependency("db_pool", waited)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(engine) -> PoolMetrics:
+    """Attach metrics to an engine built with one of the instrumented pools."""
+    metrics = PoolMetrics()
+    pool = engine.pool
+    pool.metrics = metrics
+
+    event.listen(pool, "connect", lambda *args: metrics._increment("connections_opened"))
+    event.listen(pool, "close", lambda *args: metrics._increment("connections_closed"))
+    event.listen(pool, "close_detached", lambda *args: metrics._increment("connections_closed"))
+    event.listen(pool, "invalidate", lambda *args: metrics._increment("connections_invalidated"))
+    event.listen(pool, "checkin", lambda *args: metrics._increment("checkins"))
+    return metrics
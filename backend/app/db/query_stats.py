@@ -0,0 +1,119 @@
+# app/db/query_stats.py
+"""
+Per-request SQL statement counting and N+1 detection.
+
+The cursor hooks in app.db.session pass every statement to record_statement().
+It adds the statement to the current request's QueryStats, which
+MetricsMiddleware opens with track_request(), and to any active
+query_budget() blocks.
+
+Statements are grouped by shape: the SQL text with IN-lists of placeholders
+collapsed. When one shape runs more than DB_N_PLUS_ONE_THRESHOLD times in a
+request, a warning is logged once for that shape. That is the pattern of a
+lazy load inside a loop.
+
+query_budget() is the test helper. It counts every statement in the process
+while the block runs, whichever thread or event loop issues it, so it works
+around TestClient calls:
+
+    with query_budget(3):
+        client.get("/api/tools/owner/1")
+"""
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+))+\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL text with placeholder lists collapsed, so `IN (?, ?, ?)` and `IN (?, ?)` match."""
+    return _PLACEHOLDER_LIST.sub("(?...)", " ".join(statement.split()))
+
+
+class QueryStats:
+    def __init__(self, repeat_threshold: int = 0, label: str = ""):
+        self.repeat_threshold = repeat_threshold
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.warned: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+            repeats = self.shapes[shape]
+        if self.repeat_threshold and repeats == self.repeat_threshold + 1:
+            self.warned.append(shape)
+            logger.warning(
+                f"Possible N+1 in {self.label or 'request'}: statement repeated more than "
+                f"{self.repeat_threshold} times: {shape[:300]}"
+            )
+
+    def report(self, top: int = 5) -> str:
+        lines = [f"{self.count} statements, {self.seconds * 1000:.1f} ms"]
+        lines += [f"  {n}x {shape[:200]}" for shape, n in self.shapes.most_common(top)]
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_budgets: List[QueryStats] = []
+_budgets_lock = threading.Lock()
+
+
+def record_statement(statement: str, seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if _budgets:
+        with _budgets_lock:
+            active = list(_budgets)
+        for budget in active:
+            budget.record(statement, seconds)
+
+
+@contextmanager
+def track_request(label: str) -> Iterator[QueryStats]:
+    """Count the statements issued while serving one request."""
+    stats = QueryStats(settings.DB_N_PLUS_ONE_THRESHOLD, label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Fail with AssertionError if the block issues more than `max_queries`
+    statements, or (if given) repeats one statement shape more than
+    `max_repeats` times.
+    """
+    stats = QueryStats()
+    with _budgets_lock:
+        _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        with _budgets_lock:
+            _budgets.remove(stats)
+
+    if stats.count > max_queries:
+        raise AssertionError(f"Query budget of {max_queries} exceeded: {stats.report()}")
+    if max_repeats is not None and stats.shapes and max(stats.shapes.values()) > max_repeats:
+        raise AssertionError(f"A statement repeated more than {max_repeats} times: {stats.report()}")
@@ -0,0 +1,128 @@
+# app/db/replica.py
+"""
+Routing of read-only requests to a database read replica.
+
+A read goes to the replica only when:
+- DATABASE_REPLICA_URL is configured,
+- the lag monitor has measured the replica recently and its lag is within
+  DB_REPLICA_MAX_LAG_SECONDS (unknown lag counts as too much), and
+- the requesting user has not written in the last
+  DB_READ_YOUR_WRITES_SECONDS (read-your-writes stickiness).
+Otherwise it goes to the primary.
+
+Writes are recorded per user id by ReadYourWritesMiddleware. The record is
+per process, so with several API processes a user's next read can land on a
+process that has not seen the write. The lag threshold bounds how stale
+that read can be.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Seconds since the last replayed transaction; 0 when the replica has replayed everything it received
+_POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaHealth:
+    def __init__(self, max_lag_seconds: float, sticky_seconds: float, stale_after_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky_seconds = sticky_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.lag_seconds: Optional[float] = None
+        self._measured_at = 0.0
+        self._recent_writers: Dict[int, float] = {}  # user id -> sticky until (monotonic)
+        self._lock = threading.Lock()
+        self.stats = {"replica_reads": 0, "primary_reads": 0, "lag_fallbacks": 0, "sticky_reads": 0}
+
+    def record_lag(self, lag_seconds: Optional[float]) -> None:
+        self.lag_seconds = lag_seconds
+        self._measured_at = time.monotonic()
+
+    def mark_write(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers[user_id] = now + self.sticky_seconds
+            # Keep the map bounded by dropping expired entries as we go
+            if len(self._recent_writers) > 10_000:
+                self._recent_writers = {u: t for u, t in self._recent_writers.items() if t > now}
+
+    def _is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._recent_writers.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._recent_writers[user_id]
+                return False
+            return True
+
+    def _lag_ok(self) -> bool:
+        if self.lag_seconds is None:
+            return False
+        if time.monotonic() - self._measured_at > self.stale_after_seconds:
+            return False
+        return self.lag_seconds <= self.max_lag_seconds
+
+    def use_replica(self, user_id: Optional[int]) -> bool:
+        if self._is_sticky(user_id):
+            self.stats["sticky_reads"] += 1
+            self.stats["primary_reads"] += 1
+            return False
+        if not self._lag_ok():
+            self.stats["lag_fallbacks"] += 1
+            self.stats["primary_reads"] += 1
+            return False
+        self.stats["replica_reads"] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "healthy": self._lag_ok(),
+            **self.stats,
+        }
+
+
+def measure_lag(engine) -> Optional[float]:
+    """Current replica lag in seconds, or None if it could not be measured."""
+    try:
+        with engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                # Nothing to measure (e.g. a SQLite copy in development)
+                return 0.0
+            return float(conn.execute(_POSTGRES_LAG_SQL).scalar_one())
+    except Exception as exc:
+        logger.warning(f"Replica lag check failed: {exc}")
+        return None
+
+
+async def run_replica_lag_monitor(engine, health: ReplicaHealth, interval_seconds: float) -> None:
+    """Lifespan task: refresh health.lag_seconds every interval, off the event loop."""
+    while True:
+        lag = await asyncio.to_thread(measure_lag, engine)
+        if lag is not None and lag > health.max_lag_seconds:
+            logger.warning(f"Replica lag {lag:.1f}s exceeds {health.max_lag_seconds}s; reading from primary")
+        health.record_lag(lag)
+        await asyncio.sleep(interval_seconds)
+
+
+replica_health = ReplicaHealth(
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    stale_after_seconds=settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS * 3,
+)
@@ -1,8 +1,19 @@
 # app/db/session.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import get_settings
+from app.core.metrics import record_dependency
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_pool
+from app.db.query_stats import record_statement
+from app.db.replica import replica_health
+from app.db.versions import register_version_tracking
 
 settings = get_settings()
 
@@ -13,11 +24,28 @@ connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
+
+def _pool_options(url: str, poolclass) -> dict:
+    """Pool settings from config; in-memory SQLite keeps its single-connection pool."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 engine = create_engine(
     DATABASE_URL,
     future=True,
-    echo=settings.DEBUG,
+    echo=settings.DB_ECHO,
     connect_args=connect_args,
+    **_pool_options(DATABASE_URL, InstrumentedQueuePool),
 )
 
 SessionLocal = sessionmaker(
@@ -26,6 +54,9 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+# Bump table_versions (used for listing ETags) in the same transaction as writes
+register_version_tracking(SessionLocal)
+
 
 def get_db():
     """
@@ -37,3 +68,172 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# =============================================================================
+# Async sessions (DATABASE_ASYNC=True)
+# =============================================================================
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with the async driver for its backend."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        return parsed.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+class AsyncTrackedSession(Session):
+    """Sync session class behind AsyncSession, so version tracking applies to it too."""
+
+
+register_version_tracking(AsyncTrackedSession)
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DATABASE_ASYNC:
+    _async_url = settings.DATABASE_ASYNC_URL or async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        _async_url,
+        echo=settings.DB_ECHO,
+        **_pool_options(_async_url, InstrumentedAsyncQueuePool),
+    )
+    # Objects stay usable after commit; lazy loads would need the event loop
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=AsyncTrackedSession,
+    )
+
+
+# =============================================================================
+# Read replica (DATABASE_REPLICA_URL)
+# =============================================================================
+
+replica_engine = None
+ReplicaSessionLocal = None
+async_replica_engine = None
+AsyncReplicaSessionLocal = None
+
+if settings.DATABASE_REPLICA_URL:
+    _replica_url = settings.DATABASE_REPLICA_URL
+    replica_engine = create_engine(
+        _replica_url,
+        future=True,
+        echo=settings.DB_ECHO,
+        connect_args={"check_same_thread": False} if _replica_url.startswith("sqlite") else {},
+        **_pool_options(_replica_url, InstrumentedQueuePool),
+    )
+    # Read-only: no version tracking, nothing is ever flushed
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+    if settings.DATABASE_ASYNC:
+        _async_replica_url = settings.DATABASE_REPLICA_ASYNC_URL or async_database_url(_replica_url)
+        async_replica_engine = create_async_engine(
+            _async_replica_url,
+            echo=settings.DB_ECHO,
+            **_pool_options(_async_replica_url, InstrumentedAsyncQueuePool),
+        )
+        AsyncReplicaSessionLocal = async_sessionmaker(
+            async_replica_engine, autoflush=False, expire_on_commit=False
+        )
+
+
+def read_session(user_id: Optional[int] = None) -> Session:
+    """
+    Session for read-only work: on the replica when one is configured, it is
+    within the lag threshold and `user_id` has not written recently;
+    otherwise on the primary. Sessions on the replica have info["replica"] set.
+    """
+    if ReplicaSessionLocal is not None and replica_health.use_replica(user_id):
+        db = ReplicaSessionLocal()
+        db.info["replica"] = True
+        return db
+    return SessionLocal()
+
+
+def get_read_db(request: Request):
+    """
+    FastAPI dependency for read-only endpoints (listings, search).
+    Like get_db, but may yield a replica session; see read_session.
+    """
+    db = read_session(getattr(request.state, "user_id", None))
+    request.state.read_replica = db.info.get("replica", False)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# =============================================================================
+# Pool metrics
+# =============================================================================
+
+_engines = {"sync": engine}
+if async_engine is not None:
+    _engines["async"] = async_engine.sync_engine
+if replica_engine is not None:
+    _engines["replica"] = replica_engine
+if async_replica_engine is not None:
+    _engines["async_replica"] = async_replica_engine.sync_engine
+
+for _engine in _engines.values():
+    if isinstance(_engine.pool, (InstrumentedQueuePool, InstrumentedAsyncQueuePool)):
+        instrument_pool(_engine)
+
+
+# =============================================================================
+# Statement hooks: timing for the dependency breakdown (app/core/metrics.py)
+# and per-request counting / N+1 detection (app/db/query_stats.py)
+# =============================================================================
+
+def _instrument_statements(eng, dependency: str) -> None:
+    @event.listens_for(eng, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._started_at = time.perf_counter()
+
+    @event.listens_for(eng, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._started_at
+        record_dependency(dependency, elapsed)
+        record_statement(statement, elapsed)
+
+
+for _name, _engine in _engines.items():
+    _instrument_statements(_engine, "db_replica" if "replica" in _name else "db")
+
+
+def get_db_pool_stats() -> dict:
+    """Live pool state and counters for each engine (None if its pool is not instrumented)."""
+    stats = {}
+    for name, eng in _engines.items():
+        metrics = getattr(eng.pool, "metrics", None)
+        stats[name] = metrics.snapshot(eng.pool) if metrics is not None else None
+    if replica_engine is not None:
+        stats["replica_routing"] = replica_health.snapshot()
+    return stats
+
+
+async def get_async_db():
+    """
+    FastAPI dependency that yields an AsyncSession.
+    Only used by routes registered when DATABASE_ASYNC is enabled.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    """get_read_db for routes registered when DATABASE_ASYNC is enabled."""
+    user_id = getattr(request.state, "user_id", None)
+    if AsyncReplicaSessionLocal is not None and replica_health.use_replica(user_id):
+        request.state.read_replica = True
+        async with AsyncReplicaSessionLocal() as db:
+            yield db
+    else:
+        request.state.read_replica = False
+        async with AsyncSessionLocal() as db:
+            yield db
@@ -0,0 +1,92 @@
+# app/db/versions.py
+"""
+Per-table change versions, used to build cheap ETags for listing endpoints.
+
+Session events record which tracked tables a transaction writes to, both
+through the unit of work (add/modify/delete) and through bulk
+query(...).update()/delete() statements. Just before commit, the matching
+rows in `table_versions` are incremented in the same transaction, so a
+version changes if and only if its table's data was committed.
+"""
+from typing import Dict, Iterable
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.table_version import TableVersion
+
+TRACKED_TABLES = frozenset({"tools", "borrow_requests", "users"})
+
+_CHANGED_KEY = "changed_tables"
+
+
+def _mark_changed(session: Session, table_name: str) -> None:
+    if table_name in TRACKED_TABLES:
+        session.info.setdefault(_CHANGED_KEY, set()).add(table_name)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None and (obj not in session.dirty or session.is_modified(obj)):
+            _mark_changed(session, table.name)
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _mark_changed(orm_execute_state.session, table.name)
+
+
+def _before_commit(session: Session) -> None:
+    # Flush now so every pending write is recorded before bumping
+    session.flush()
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if not changed:
+        return
+    for name in sorted(changed):
+        result = session.execute(
+            update(TableVersion)
+            .where(TableVersion.name == name)
+            .values(version=TableVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            session.add(TableVersion(name=name, version=1))
+    session.flush()
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def register_version_tracking(session_factory) -> None:
+    """Attach the version-bumping listeners to a sessionmaker."""
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+    event.listen(session_factory, "before_commit", _before_commit)
+    event.listen(session_factory, "after_soft_rollback", lambda session, previous: _after_rollback(session))
+
+
+def _versions_statement(names):
+    return select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(names))
+
+
+def _fill_versions(names, rows) -> Dict[str, int]:
+    found = {name: version for name, version in rows}
+    return {name: found.get(name, 0) for name in names}
+
+
+def get_versions(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Current versions for the given tables (0 if never written)."""
+    names = sorted(names)
+    return _fill_versions(names, db.execute(_versions_statement(names)).all())
+
+
+async def get_versions_async(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """get_versions for an AsyncSession."""
+    names = sorted(names)
+    return _fill_versions(names, (await db.execute(_versions_statement(names))).all())
@@ -1,16 +1,83 @@
 # app/main.py
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware  
+from fastapi.responses import PlainTextResponse
 
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.routes import router as api_router
 from app.core.config import get_settings
+from app.core.metrics import registry as metrics_registry
+from app.core.middleware import MetricsMiddleware, ReadYourWritesMiddleware
+from app.db import session as db_session
+from app.db.replica import replica_health, run_replica_lag_monitor
+from app.db.session import SessionLocal, get_db_pool_stats
+from app.services.geocode_backfill import run_backfill_task
+from app.services.outbox import run_outbox_worker_task
+from app.services.http_client import close_http_client, get_pool_stats, start_http_client
+from app.services.spatial_index import build_tool_index, run_tool_index_sync
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the in-memory spatial index used by /api/geo/tools/near
+    db = SessionLocal()
+    try:
+        build_tool_index(db)
+    finally:
+        db.close()
+
+    # Pick up tools written by other processes
+    index_sync_task = None
+    if settings.TOOL_INDEX_SYNC_INTERVAL_SECONDS > 0:
+        index_sync_task = asyncio.create_task(run_tool_index_sync(settings.TOOL_INDEX_SYNC_INTERVAL_SECONDS))
+
+    # One pooled client for all outbound HTTP (geocoding, OAuth)
+    await start_http_client()
+
+    backfill_task = None
+    if settings.GEOCODE_BACKFILL_ON_STARTUP:
+        backfill_task = asyncio.create_task(run_backfill_task())
+
+    outbox_task = None
+    if settings.EMAIL_OUTBOX_WORKER_IN_PROCESS:
+        outbox_task = asyncio.create_task(run_outbox_worker_task())
+
+    # Reads stay on the primary until the first lag measurement comes back
+    lag_monitor_task = None
+    if db_session.replica_engine is not None:
+        lag_monitor_task = asyncio.create_task(
+            run_replica_lag_monitor(
+                db_session.replica_engine, replica_health, settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS
+            )
+        )
+
+    try:
+        yield
+    finally:
+        for task in (index_sync_task, backfill_task, outbox_task, lag_monitor_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await close_http_client()
+        for async_engine in (db_session.async_engine, db_session.async_replica_engine):
+            if async_engine is not None:
+                await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version="0.1.0",
     description="Backend API for the ToolSharer platform.",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -24,12 +91,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Sets request.state.user_id and keeps recent writers' reads on the primary
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Outermost, so latency covers the other middleware too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 @app.get("/health", tags=["system"])
 def health_check():
     return {"status": "ok", "app_name": settings.APP_NAME}
 
 
+@app.get("/health/http-pool", tags=["system"])
+def http_pool_stats():
+    """Outbound HTTP pool usage, for sizing the connection limits."""
+    return get_pool_stats()
+
+
+@app.get("/health/db-pool", tags=["system"])
+def db_pool_stats():
+    """Database pool usage and connection churn, for sizing DB_POOL_SIZE/DB_MAX_OVERFLOW."""
+    return get_db_pool_stats()
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+    def metrics():
+        """Request and dependency metrics in Prometheus text format."""
+        return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # Mount versioned API routes under /api
 app.include_router(api_router, prefix="/api")
@@ -1,7 +1,7 @@
 # app/models/borrow_request.py
 from datetime import datetime
 
-from sqlalchemy import Column, Date, DateTime, Enum, ForeignKey, Integer, Text
+from sqlalchemy import Column, Date, DateTime, Enum, ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -19,6 +19,16 @@ class RequestStatus(str, enum.Enum):
 
 class BorrowRequest(Base):
     __tablename__ = "borrow_requests"
+    __table_args__ = (
+        # Per-tool pending counts / per-user flags in the browse listing
+        Index("ix_borrow_requests_tool_id_status", "tool_id", "status"),
+        # Incremental exports filtered and ordered by update time
+        Index("ix_borrow_requests_updated_at_id", "updated_at", "id"),
+        # Borrower listings filtered by status, newest first
+        Index("ix_borrow_requests_borrower_status_created", "borrower_id", "status", "created_at"),
+        # Overdue loans: status IN (...) AND due_date < today
+        Index("ix_borrow_requests_status_due_date", "status", "due_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
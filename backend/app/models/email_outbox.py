@@ -0,0 +1,37 @@
+# app/models/email_outbox.py
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import relationship
+
+from app.models.base import Base
+
+
+class OutboxEmail(Base):
+    """
+    A notification email queued in the same transaction as the change it
+    reports, and sent later by the outbox worker (app/services/outbox.py).
+    """
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Worker: status = 'pending' AND next_attempt_at <= now, oldest first
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+        # Digest flush: buffered rows grouped by recipient, oldest event per recipient
+        Index("ix_email_outbox_status_recipient_created", "status", "recipient_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event = Column(String, nullable=False)  # e.g. "request_approved"
+    borrow_request_id = Column(Integer, ForeignKey("borrow_requests.id"), nullable=False)
+    recipient_id = Column(Integer, ForeignKey("users.id", name="fk_email_outbox_recipient_id_users"), nullable=True)  # Set by the worker
+
+    status = Column(String, nullable=False, default="pending")  # "pending", "digest" (buffered), "sent" or "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    borrow_request = relationship("BorrowRequest")
@@ -0,0 +1,23 @@
+# app/models/geocode_cache.py
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Float, String
+
+from app.models.base import Base
+
+
+class GeocodeCacheEntry(Base):
+    """Persistent cache of Nominatim lookups, keyed by normalized address."""
+
+    __tablename__ = "geocode_cache"
+
+    address_key = Column(String, primary_key=True)
+
+    # False for negative results (Nominatim found nothing)
+    found = Column(Boolean, nullable=False, default=True)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
+    formatted_address = Column(String, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
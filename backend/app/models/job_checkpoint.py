@@ -0,0 +1,19 @@
+# app/models/job_checkpoint.py
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String
+
+from app.models.base import Base
+
+
+class JobCheckpoint(Base):
+    """Last processed row id for a resumable batch job (e.g. geocoding backfill)."""
+
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
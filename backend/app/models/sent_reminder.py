@@ -0,0 +1,26 @@
+# app/models/sent_reminder.py
+from datetime import datetime
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, UniqueConstraint
+
+from app.models.base import Base
+
+
+class SentReminder(Base):
+    """A due-date reminder already sent for a loan, so reminder runs can be repeated safely."""
+
+    __tablename__ = "sent_reminders"
+    __table_args__ = (
+        # One reminder per loan, kind and due date. Extending a loan's due
+        # date makes it eligible again. The index also serves the NOT EXISTS
+        # check in app/services/reminders.py.
+        UniqueConstraint("borrow_request_id", "kind", "due_date", name="uq_sent_reminders_request_kind_due"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    borrow_request_id = Column(Integer, ForeignKey("borrow_requests.id"), nullable=False)
+    kind = Column(String, nullable=False)  # "due_soon" or "overdue"
+    due_date = Column(Date, nullable=False)
+
+    message_id = Column(String, nullable=True)  # SES MessageId of the email that carried it
+    sent_at = Column(DateTime, nullable=False, default=datetime.utcnow)
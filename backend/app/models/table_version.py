@@ -0,0 +1,13 @@
+# app/models/table_version.py
+from sqlalchemy import BigInteger, Column, String
+
+from app.models.base import Base
+
+
+class TableVersion(Base):
+    """Change counter per table, bumped in the same transaction as each write."""
+
+    __tablename__ = "table_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
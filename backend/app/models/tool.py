@@ -1,5 +1,7 @@
 # app/models/tool.py
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, String, Text
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -7,6 +9,14 @@ from app.models.base import Base
 
 class Tool(Base):
     __tablename__ = "tools"
+    __table_args__ = (
+        # Keyset pagination for browse sorted by name
+        Index("ix_tools_name_id", "name", "id"),
+        # Incremental exports filtered and ordered by update time
+        Index("ix_tools_updated_at_id", "updated_at", "id"),
+        # Owner dashboards: an owner's tools, then their requests via (tool_id, status)
+        Index("ix_tools_owner_id", "owner_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -22,6 +32,10 @@ class Tool(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_available = Column(Boolean, nullable=False, default=True)
 
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
     owner = relationship("User", back_populates="tools")
 
     # A tool can have many borrow requests
@@ -17,6 +17,9 @@ class User(Base):
     home_lat = Column(Float, nullable=True)  # Geocoded latitude
     home_lng = Column(Float, nullable=True)  # Geocoded longitude
 
+    # Notification emails: "immediate" (one per event) or "digest" (batched, see app/services/outbox.py)
+    notification_delivery = Column(String, nullable=False, default="immediate", server_default="immediate")
+
     # A user can own many tools
     tools = relationship("Tool", back_populates="owner")
 
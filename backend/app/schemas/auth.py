@@ -1,6 +1,6 @@
 # app/schemas/auth.py
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Literal, Optional
 
 
 class TokenResponse(BaseModel):
@@ -12,11 +12,17 @@ class UserResponse(BaseModel):
     id: int
     email: str
     full_name: Optional[str] = None
+    notification_delivery: str = "immediate"
 
     class Config:
         from_attributes = True
 
 
+class UserPreferencesUpdate(BaseModel):
+    """Notification emails one per event, or batched into digests"""
+    notification_delivery: Literal["immediate", "digest"]
+
+
 class DevLoginRequest(BaseModel):
     """Request body for dev bypass login - only available when DEV_AUTH_ENABLED=True"""
     email: EmailStr
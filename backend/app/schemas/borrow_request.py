@@ -1,8 +1,8 @@
 # app/schemas/borrow_request.py
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic import model_validator
 
 from app.models.borrow_request import RequestStatus
@@ -63,3 +63,30 @@ class BorrowRequestRead(BorrowRequestBase):
 
     class Config:
         from_attributes = True
+
+
+class BorrowRequestExportRead(BorrowRequestBase):
+    """One line of GET /borrow_requests/export: the stored row, without joins or overdue fields."""
+    id: int
+    status: RequestStatus
+    start_date: Optional[date] = None
+    due_date: Optional[date] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class BorrowRequestBulkTransition(BaseModel):
+    """Body of PATCH /borrow_requests/bulk: move every listed request to `status`."""
+    ids: List[int] = Field(min_length=1, max_length=500)
+    status: RequestStatus
+
+
+class BorrowRequestBulkResult(BaseModel):
+    """Outcome for one id of a bulk transition."""
+    id: int
+    ok: bool
+    status: Optional[RequestStatus] = None  # After the call; None if the request does not exist
+    detail: Optional[str] = None  # Why the transition was refused
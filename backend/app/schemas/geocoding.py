@@ -1,6 +1,6 @@
 # app/schemas/geocoding.py
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class GeocodeRequest(BaseModel):
@@ -23,8 +23,21 @@ class ToolWithDistance(BaseModel):
     owner_id: int
     owner_email: Optional[str] = None
     owner_name: Optional[str] = None
+    icon_key: Optional[str] = None
     is_available: bool
     distance_km: float
 
     class Config:
         from_attributes = True
+
+
+class ToolCluster(BaseModel):
+    lat: float  # Centroid of the tools in the cell
+    lng: float
+    count: int
+    available_count: int
+
+
+class ToolClustersResponse(BaseModel):
+    zoom: int  # Zoom level the clusters were computed for
+    clusters: List[ToolCluster]
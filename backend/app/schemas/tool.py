@@ -1,4 +1,6 @@
 # app/schemas/tool.py
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -52,3 +54,16 @@ class ToolRead(ToolBase):
 
     class Config:
         from_attributes = True
+
+
+class ToolExportRead(ToolBase):
+    """One line of GET /tools/export: the stored row, without per-user browse fields."""
+    id: int
+    owner_id: int
+    lat: float | None = None
+    lng: float | None = None
+    icon_key: str | None = None
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
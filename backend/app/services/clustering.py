@@ -0,0 +1,153 @@
+"""
+Precomputed map clusters for the tools map.
+
+For every zoom level up to CLUSTER_MAX_ZOOM, tools are aggregated into Web
+Mercator grid cells (4x4 cells per 256px map tile, i.e. ~64px clusters).
+Each cell keeps a count, an available count and coordinate sums for the
+centroid. Aggregates are updated incrementally as tools move or change
+availability, so answering a viewport only reads the cells inside it and
+never touches individual tools.
+
+Like the spatial index, this is process-local, maintained through
+app.services.spatial_index.index_tool / unindex_tool and reloaded with it.
+"""
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+# 2**CELL_BITS cells per tile edge
+CELL_BITS = 2
+MAX_MERCATOR_LAT = 85.05112878
+
+CellKey = Tuple[int, int]
+
+
+def _mercator(lat: float, lng: float) -> Tuple[float, float]:
+    """Project to unit Web Mercator coordinates in [0, 1)."""
+    lat = max(min(lat, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
+    x = (lng + 180.0) / 360.0
+    lat_rad = math.radians(lat)
+    y = (1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0
+    return min(max(x, 0.0), 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+
+class ClusterIndex:
+    def __init__(self, max_zoom: int, max_cells: int):
+        self.max_zoom = max_zoom
+        self.max_cells = max_cells
+        # Per zoom level: cell -> [count, available_count, sum_lat, sum_lng]
+        self._levels: List[Dict[CellKey, list]] = [{} for _ in range(max_zoom + 1)]
+        self._entries: Dict[int, Tuple[float, float, bool]] = {}
+        self._lock = threading.Lock()
+
+    def _cells_per_axis(self, zoom: int) -> int:
+        return 1 << (zoom + CELL_BITS)
+
+    def _apply(self, lat: float, lng: float, available: bool, sign: int) -> None:
+        mx, my = _mercator(lat, lng)
+        for zoom, level in enumerate(self._levels):
+            n = self._cells_per_axis(zoom)
+            key = (int(mx * n), int(my * n))
+            agg = level.get(key)
+            if agg is None:
+                agg = level[key] = [0, 0, 0.0, 0.0]
+            agg[0] += sign
+            agg[1] += sign if available else 0
+            agg[2] += sign * lat
+            agg[3] += sign * lng
+            if agg[0] <= 0:
+                del level[key]
+
+    def upsert(
+        self, tool_id: int, lat: Optional[float], lng: Optional[float], is_available: bool
+    ) -> None:
+        with self._lock:
+            old = self._entries.pop(tool_id, None)
+            if old is not None:
+                self._apply(*old, sign=-1)
+            if lat is None or lng is None:
+                return
+            entry = (lat, lng, bool(is_available))
+            self._entries[tool_id] = entry
+            self._apply(*entry, sign=1)
+
+    def remove(self, tool_id: int) -> None:
+        self.upsert(tool_id, None, None, False)
+
+    def load(self, rows: Iterable[Tuple[int, float, float, bool]]) -> None:
+        """Replace the aggregates; they are built aside, so queries aren't blocked meanwhile."""
+        loaded = ClusterIndex(self.max_zoom, self.max_cells)
+        for tool_id, lat, lng, is_available in rows:
+            entry = (lat, lng, bool(is_available))
+            loaded._entries[tool_id] = entry
+            loaded._apply(*entry, sign=1)
+        with self._lock:
+            self._levels = loaded._levels
+            self._entries = loaded._entries
+
+    def _x_ranges(self, min_lng: float, max_lng: float, n: int) -> List[Tuple[int, int]]:
+        x0 = int(_mercator(0.0, min_lng)[0] * n)
+        x1 = int(_mercator(0.0, max_lng)[0] * n)
+        if min_lng <= max_lng:
+            return [(x0, x1)]
+        # Viewport crosses the antimeridian
+        return [(x0, n - 1), (0, x1)]
+
+    def query(
+        self, min_lat: float, min_lng: float, max_lat: float, max_lng: float, zoom: int
+    ) -> Tuple[int, List[dict]]:
+        """
+        Clusters intersecting the bounding box at the given zoom.
+        The zoom is clamped to CLUSTER_MAX_ZOOM and lowered further if the
+        viewport would span more than CLUSTER_MAX_CELLS cells.
+        Returns (effective_zoom, clusters).
+        """
+        zoom = max(0, min(zoom, self.max_zoom))
+        while True:
+            n = self._cells_per_axis(zoom)
+            x_ranges = self._x_ranges(min_lng, max_lng, n)
+            y0 = int(_mercator(max_lat, 0.0)[1] * n)
+            y1 = int(_mercator(min_lat, 0.0)[1] * n)
+            span = sum(x1 - x0 + 1 for x0, x1 in x_ranges) * (y1 - y0 + 1)
+            if span <= self.max_cells or zoom == 0:
+                break
+            zoom -= 1
+
+        clusters = []
+        with self._lock:
+            level = self._levels[zoom]
+            if span <= len(level):
+                keys = (
+                    (x, y)
+                    for x0, x1 in x_ranges
+                    for x in range(x0, x1 + 1)
+                    for y in range(y0, y1 + 1)
+                )
+                items = ((key, level.get(key)) for key in keys)
+            else:
+                items = (
+                    (key, agg)
+                    for key, agg in level.items()
+                    if y0 <= key[1] <= y1 and any(x0 <= key[0] <= x1 for x0, x1 in x_ranges)
+                )
+
+            for key, agg in items:
+                if agg is None:
+                    continue
+                count, available, sum_lat, sum_lng = agg
+                clusters.append(
+                    {
+                        "lat": sum_lat / count,
+                        "lng": sum_lng / count,
+                        "count": count,
+                        "available_count": available,
+                    }
+                )
+
+        return zoom, clusters
+
+
+_settings = get_settings()
+tool_clusters = ClusterIndex(_settings.CLUSTER_MAX_ZOOM, _settings.CLUSTER_MAX_CELLS)
@@ -2,19 +2,50 @@
 """
 SES email service for sending notifications.
 Supports both real AWS SES and LocalStack for local development.
+
+send_email() sends one message. Batch jobs (see app/services/reminders.py)
+use stored templates instead: ensure_template() creates or updates one, and
+send_bulk_templated_email() sends it to up to MAX_BULK_DESTINATIONS
+recipients per call, each with its own template data.
+
+Digest mode: send_digests() sends users who chose digest delivery one email
+listing several notifications, built by the outbox worker
+(app/services/outbox.py). All digests share the stored DIGEST_TEMPLATE, so
+it is uploaded once per process and rendered by SES for each recipient.
 """
+import json
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 import boto3
 from botocore.exceptions import ClientError
 
 from app.core.config import get_settings
+from app.core.metrics import time_boto_client
 
 logger = logging.getLogger(__name__)
 
 _ses_client = None
 
+# SES limit on Destinations per SendBulkTemplatedEmail call
+MAX_BULK_DESTINATIONS = 50
+
+# Template name -> parts last created/updated by this process
+_ensured_templates: Dict[str, tuple] = {}
+
+# (subject, text part, html part) of the notification digest
+DIGEST_TEMPLATE = (
+    "{{count}} updates on ToolSharer",
+    "Hi {{name}},\n\n"
+    "Here is what happened since your last update:\n"
+    "{{#each events}}- {{text}}\n{{/each}}\n"
+    "{{link}}\n",
+    "<p>Hi {{name}},</p>"
+    "<p>Here is what happened since your last update:</p>"
+    "<ul>{{#each events}}<li>{{text}}</li>{{/each}}</ul>"
+    '<p><a href="{{link}}">Open ToolSharer</a></p>',
+)
+
 
 def get_ses_client():
     """
@@ -36,6 +67,7 @@ def get_ses_client():
             client_kwargs["endpoint_url"] = settings.SES_ENDPOINT_URL
 
         _ses_client = boto3.client("ses", **client_kwargs)
+        time_boto_client(_ses_client, "ses")
 
     return _ses_client
 
@@ -101,3 +133,98 @@ def send_email(
     except ClientError as e:
         logger.error(f"Failed to send email to '{to_email}': {e}")
         return False
+
+
+def ensure_template(name: str, subject: str, body_text: str, body_html: Optional[str] = None) -> None:
+    """
+    Create the SES template `name`, or update it if it exists, so template
+    changes in code are picked up by the next run.
+    Parts use SES (Handlebars) syntax, e.g. {{name}} and {{#each loans}}.
+    Does nothing if this process already uploaded the same parts.
+    """
+    parts = (subject, body_text, body_html)
+    if _ensured_templates.get(name) == parts:
+        return
+
+    client = get_ses_client()
+    template = {"TemplateName": name, "SubjectPart": subject, "TextPart": body_text}
+    if body_html:
+        template["HtmlPart"] = body_html
+
+    try:
+        client.get_template(TemplateName=name)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "TemplateDoesNotExist":
+            raise
+        client.create_template(Template=template)
+        logger.info(f"SES template '{name}' created")
+    else:
+        client.update_template(Template=template)
+    _ensured_templates[name] = parts
+
+
+def send_bulk_templated_email(
+    template: str,
+    destinations: List[Dict[str, Any]],
+    default_data: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Send a stored template to several recipients in one SES call.
+
+    Args:
+        template: SES template name.
+        destinations: Up to MAX_BULK_DESTINATIONS dicts of
+            {"to": address, "data": template data for that recipient}.
+        default_data: Template data used where a recipient's data lacks a key.
+
+    Returns:
+        One SES status per destination, in order: {"Status": "Success",
+        "MessageId": ...} or {"Status": <error code>, "Error": ...}.
+        Raises ClientError if the whole call fails.
+    """
+    if len(destinations) > MAX_BULK_DESTINATIONS:
+        raise ValueError(f"At most {MAX_BULK_DESTINATIONS} destinations per call, got {len(destinations)}")
+
+    settings = get_settings()
+    client = get_ses_client()
+
+    response = client.send_bulk_templated_email(
+        Source=settings.SES_SENDER_EMAIL,
+        Template=template,
+        DefaultTemplateData=json.dumps(default_data or {}),
+        Destinations=[
+            {
+                "Destination": {"ToAddresses": [destination["to"]]},
+                "ReplacementTemplateData": json.dumps(destination["data"]),
+            }
+            for destination in destinations
+        ],
+    )
+    statuses = response.get("Status", [])
+    failed = sum(1 for status in statuses if status.get("Status") != "Success")
+    logger.info(f"Bulk email '{template}' sent to {len(destinations) - failed}/{len(destinations)} recipients")
+    return statuses
+
+
+def ensure_digest_template() -> None:
+    ensure_template(get_settings().EMAIL_DIGEST_TEMPLATE, *DIGEST_TEMPLATE)
+
+
+def send_digests(digests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Send up to MAX_BULK_DESTINATIONS notification digests in one SES call.
+
+    Args:
+        digests: {"to": address, "data": {"name": ..., "count": n,
+            "events": [{"text": ...}, ...]}} per recipient.
+
+    Returns:
+        One SES status per digest, as send_bulk_templated_email().
+    """
+    settings = get_settings()
+    ensure_digest_template()
+    return send_bulk_templated_email(
+        settings.EMAIL_DIGEST_TEMPLATE,
+        digests,
+        default_data={"link": f"{settings.FRONTEND_URL}/"},
+    )
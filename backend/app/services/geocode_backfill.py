@@ -0,0 +1,253 @@
+"""
+Background backfill of coordinates for tools and users that have an address
+but no lat/lng (created before geocoding existed, or while it was failing).
+
+Rows are scanned in id order, one batch at a time. Identical addresses within
+a batch are geocoded once, lookups go through the geocode cache, and upstream
+calls are throttled by a token bucket to stay within Nominatim's usage policy.
+Each batch's updates are committed together with a checkpoint of the last id
+processed, so a crashed or interrupted run resumes where it stopped. Rows
+count as processed once their address resolved or is known not to resolve.
+An upstream failure (timeout, 429) stops the run before the first row it
+left unanswered, so an outage never moves the checkpoint past rows.
+
+Run as a script (scripts/backfill_geocoding.py) or in-process by setting
+GEOCODE_BACKFILL_ON_STARTUP.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+
+from app.api.cache import response_cache
+from app.core.auth_cache import user_cache
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.job_checkpoint import JobCheckpoint
+from app.models.tool import Tool
+from app.models.user import User
+from app.services.geocode_cache import TokenBucket, cached_geocode_address, normalize_address
+from app.services.geocoding import GeocodingResult
+from app.services.spatial_index import index_tool
+
+logger = logging.getLogger(__name__)
+
+# (checkpoint name, model, address column, lat attribute, lng attribute)
+BACKFILL_TARGETS = [
+    ("geocode_backfill:tools", Tool, "address", "lat", "lng"),
+    ("geocode_backfill:users", User, "home_address", "home_lat", "home_lng"),
+]
+
+
+def _get_checkpoint(db, name: str) -> JobCheckpoint:
+    checkpoint = db.get(JobCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=name, last_id=0, processed=0)
+        db.add(checkpoint)
+        db.commit()
+    return checkpoint
+
+
+def _reset_checkpoint(db, name: str) -> None:
+    checkpoint = _get_checkpoint(db, name)
+    checkpoint.last_id = 0
+    checkpoint.processed = 0
+    db.commit()
+
+
+def _load_batch(db, target: Tuple, after_id: int, batch_size: int) -> List[Tuple[int, str]]:
+    _, model, address_attr, lat_attr, lng_attr = target
+    address_col = getattr(model, address_attr)
+    return (
+        db.query(model.id, address_col)
+        .filter(
+            model.id > after_id,
+            address_col.isnot(None),
+            or_(getattr(model, lat_attr).is_(None), getattr(model, lng_attr).is_(None)),
+        )
+        .order_by(model.id)
+        .limit(batch_size)
+        .all()
+    )
+
+
+def _apply_batch(
+    db,
+    target: Tuple,
+    checkpoint: JobCheckpoint,
+    rows: List[Tuple[int, str]],
+    keys: Dict[int, str],
+    results: Dict[str, Optional[GeocodingResult]],
+) -> Tuple[List[int], int]:
+    """
+    Write the coordinates found for `rows` and move the checkpoint past them,
+    in one transaction. Returns the updated ids and the count of rows whose
+    address does not resolve.
+    """
+    _, model, _, lat_attr, lng_attr = target
+    lat_col = getattr(model, lat_attr)
+    lng_col = getattr(model, lng_attr)
+
+    groups: Dict[str, List[int]] = {}
+    for row_id, _ in rows:
+        if row_id in keys:
+            groups.setdefault(keys[row_id], []).append(row_id)
+
+    updated_ids = []
+    failed = 0
+    for key, row_ids in groups.items():
+        result = results[key]
+        if result is None:
+            failed += len(row_ids)
+            continue
+        (
+            db.query(model)
+            .filter(model.id.in_(row_ids))
+            .update(
+                {lat_col: result.lat, lng_col: result.lng},
+                synchronize_session=False,
+            )
+        )
+        updated_ids.extend(row_ids)
+
+    # Row updates and the checkpoint commit together
+    checkpoint.last_id = rows[-1][0]
+    checkpoint.processed += len(rows)
+    db.commit()
+
+    if model is Tool and updated_ids:
+        for tool in db.query(Tool).filter(Tool.id.in_(updated_ids)).all():
+            index_tool(tool)
+        response_cache.invalidate(*(f"tool:{tool_id}" for tool_id in updated_ids))
+    elif model is User and updated_ids:
+        user_cache.invalidate(*updated_ids)
+
+    return updated_ids, failed
+
+
+async def _backfill_target(
+    db,
+    target: Tuple,
+    limiter: TokenBucket,
+    batch_size: int,
+    max_batches: Optional[int],
+) -> Dict[str, int]:
+    """
+    Backfill one target batch by batch. Database work runs in a worker
+    thread; only the geocode lookups are awaited on the event loop.
+    Stops at the first upstream failure, leaving the checkpoint before the
+    row it could not resolve.
+    """
+    name = target[0]
+    stats = {"scanned": 0, "geocoded": 0, "failed": 0, "lookups": 0, "batches": 0, "upstream_errors": 0}
+    checkpoint = await asyncio.to_thread(_get_checkpoint, db, name)
+
+    while max_batches is None or stats["batches"] < max_batches:
+        rows = await asyncio.to_thread(_load_batch, db, target, checkpoint.last_id, batch_size)
+        if not rows:
+            break
+
+        # Deduplicate identical addresses within the batch
+        keys = {row_id: normalize_address(address) for row_id, address in rows if address.strip()}
+        addresses: Dict[str, str] = {}
+        for row_id, address in rows:
+            if row_id in keys:
+                addresses.setdefault(keys[row_id], address)
+
+        results = {}
+        for key, address in addresses.items():
+            try:
+                results[key] = await cached_geocode_address(
+                    address, db, rate_limiter=limiter, raise_on_error=True
+                )
+            except Exception as e:
+                stats["upstream_errors"] += 1
+                logger.warning(f"Backfill {name} stopped by an upstream failure, will retry: {e}")
+                break
+        stats["lookups"] += len(results)
+
+        # Rows before the first one left without an answer; an upstream
+        # failure must not move the checkpoint past rows it never resolved
+        settled = 0
+        for row_id, _ in rows:
+            if row_id in keys and keys[row_id] not in results:
+                break
+            settled += 1
+
+        if settled:
+            updated_ids, failed = await asyncio.to_thread(
+                _apply_batch, db, target, checkpoint, rows[:settled], keys, results
+            )
+            stats["scanned"] += settled
+            stats["geocoded"] += len(updated_ids)
+            stats["failed"] += failed
+            stats["batches"] += 1
+
+        if stats["upstream_errors"]:
+            break
+
+    return stats
+
+
+async def run_backfill(
+    batch_size: Optional[int] = None,
+    rate_per_second: Optional[float] = None,
+    max_batches: Optional[int] = None,
+    restart: bool = False,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Backfill coordinates for every target, resuming from saved checkpoints.
+    Set restart=True to rescan from the beginning (e.g. to retry rows that
+    previously failed to geocode).
+    Returns per-target counters including throughput.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.GEOCODE_BACKFILL_BATCH_SIZE
+    limiter = TokenBucket(rate_per_second or settings.GEOCODE_RATE_PER_SECOND)
+
+    summary = {}
+    db = SessionLocal()
+    try:
+        for target in BACKFILL_TARGETS:
+            name = target[0]
+            if restart:
+                await asyncio.to_thread(_reset_checkpoint, db, name)
+
+            started = time.perf_counter()
+            stats = await _backfill_target(db, target, limiter, batch_size, max_batches)
+            elapsed = time.perf_counter() - started
+            stats["seconds"] = round(elapsed, 2)
+            stats["rows_per_second"] = round(stats["scanned"] / elapsed, 2) if elapsed else 0.0
+            summary[name] = stats
+            logger.info(f"Backfill {name}: {stats}")
+            if stats["upstream_errors"]:
+                # The geocoder is failing; later targets would stop at once too
+                break
+    finally:
+        db.close()
+
+    return summary
+
+
+def _stopped_by_upstream(summary: Dict[str, Dict[str, float]]) -> bool:
+    return any(stats["upstream_errors"] for stats in summary.values())
+
+
+async def run_backfill_task() -> None:
+    """
+    In-process entry point; logs instead of raising so startup is unaffected.
+    A run stopped by upstream failures is retried every
+    GEOCODE_BACKFILL_RETRY_SECONDS until one completes.
+    """
+    retry_seconds = get_settings().GEOCODE_BACKFILL_RETRY_SECONDS
+    try:
+        while _stopped_by_upstream(await run_backfill()):
+            logger.info(f"Geocoding backfill retrying in {retry_seconds:.0f}s")
+            await asyncio.sleep(retry_seconds)
+    except asyncio.CancelledError:
+        logger.info("Geocoding backfill cancelled; it will resume from its checkpoint")
+        raise
+    except Exception:
+        logger.exception("Geocoding backfill failed; it will resume from its checkpoint")
@@ -0,0 +1,245 @@
+"""
+Two-tier cache in front of the Nominatim geocoder.
+
+Lookups are keyed by a normalized address string and checked first against a
+bounded in-process LRU, then against the `geocode_cache` table shared by all
+API processes. Only a miss in both goes to the network. Negative results are
+cached too, with a shorter TTL, so unresolvable addresses are not retried on
+every request. Concurrent lookups for the same cold address share a single
+upstream call.
+
+The database tier uses a sync Session, so its reads and writes run in a
+worker thread; only the upstream call is awaited on the event loop.
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.geocode_cache import GeocodeCacheEntry
+from app.services.geocoding import GeocodingResult, geocode_address
+
+logger = logging.getLogger(__name__)
+
+# (result or None for a negative entry, expires_at)
+CachedValue = Tuple[Optional[GeocodingResult], datetime]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_SEPARATOR_RE = re.compile(r"\s*,\s*")
+
+
+def normalize_address(address: str) -> str:
+    """
+    Normalize an address into a cache key: Unicode NFKC, case-folded,
+    collapsed whitespace and consistent comma separators.
+    """
+    key = unicodedata.normalize("NFKC", address).casefold()
+    key = _WHITESPACE_RE.sub(" ", key).strip()
+    key = _SEPARATOR_RE.sub(", ", key)
+    return key.strip(" ,.")
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: `rate` tokens per second, bursting up
+    to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class GeocodeCache:
+    """Bounded in-process LRU with hit/miss counters."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedValue]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "upstream_errors": 0,
+        }
+
+    def get(self, key: str, now: datetime) -> Optional[CachedValue]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return None
+            if value[1] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: CachedValue) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "memory_entries": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+geocode_cache = GeocodeCache(get_settings().GEOCODE_CACHE_MAX_ENTRIES)
+
+
+def _load_from_db(db: Session, key: str, now: datetime) -> Optional[CachedValue]:
+    entry = db.get(GeocodeCacheEntry, key)
+    if entry is None or entry.expires_at <= now:
+        return None
+    result = None
+    if entry.found:
+        result = GeocodingResult(
+            lat=entry.lat,
+            lng=entry.lng,
+            formatted_address=entry.formatted_address,
+        )
+    return result, entry.expires_at
+
+
+def _store_in_db(db: Session, key: str, value: CachedValue, now: datetime) -> None:
+    result, expires_at = value
+    try:
+        db.merge(
+            GeocodeCacheEntry(
+                address_key=key,
+                found=result is not None,
+                lat=result.lat if result else None,
+                lng=result.lng if result else None,
+                formatted_address=result.formatted_address if result else None,
+                created_at=now,
+                expires_at=expires_at,
+            )
+        )
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Failed to persist geocode cache entry: {e}")
+
+
+async def _fetch(
+    key: str,
+    address: str,
+    db: Session,
+    now: datetime,
+    rate_limiter: Optional[TokenBucket] = None,
+    raise_on_error: bool = False,
+) -> Optional[CachedValue]:
+    """
+    Call Nominatim once per cold key and populate both cache tiers.
+    Concurrent callers for the same key wait for the first call's result.
+    An upstream failure returns None, or raises if raise_on_error is set.
+    """
+    pending = geocode_cache._inflight.get(key)
+    if pending is not None:
+        value, error = await asyncio.shield(pending)
+    else:
+        future = asyncio.get_running_loop().create_future()
+        geocode_cache._inflight[key] = future
+        value, error = None, None
+        try:
+            try:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire()
+                result = await geocode_address(address, raise_on_error=True)
+            except Exception as e:
+                # Upstream failures are not cached; the next request retries
+                geocode_cache.count("upstream_errors")
+                logger.warning(f"Geocoding request failed: {e}")
+                error = e
+            else:
+                settings = get_settings()
+                ttl_hours = (
+                    settings.GEOCODE_CACHE_TTL_HOURS
+                    if result is not None
+                    else settings.GEOCODE_NEGATIVE_CACHE_TTL_HOURS
+                )
+                value = (result, now + timedelta(hours=ttl_hours))
+                geocode_cache.put(key, value)
+                await asyncio.to_thread(_store_in_db, db, key, value, now)
+        finally:
+            geocode_cache._inflight.pop(key, None)
+            future.set_result((value, error))
+
+    if error is not None and raise_on_error:
+        raise error
+    return value
+
+
+async def cached_geocode_address(
+    address: str,
+    db: Session,
+    rate_limiter: Optional[TokenBucket] = None,
+    raise_on_error: bool = False,
+) -> Optional[GeocodingResult]:
+    """
+    Geocode an address through the memory and database caches.
+    Returns None if the address cannot be geocoded.
+    If a rate limiter is given, a token is taken only for upstream calls.
+    With raise_on_error=True, upstream failures (timeouts, 429s) raise
+    instead of returning None, so they can be told apart from addresses
+    that don't resolve.
+    """
+    if not address or not address.strip():
+        return None
+
+    key = normalize_address(address)
+    now = datetime.utcnow()
+
+    value = geocode_cache.get(key, now)
+    if value is not None:
+        geocode_cache.count("memory_hits")
+    else:
+        value = await asyncio.to_thread(_load_from_db, db, key, now)
+        if value is not None:
+            geocode_cache.count("db_hits")
+            geocode_cache.put(key, value)
+
+    if value is not None:
+        if value[0] is None:
+            geocode_cache.count("negative_hits")
+        return value[0]
+
+    geocode_cache.count("misses")
+    value = await _fetch(key, address, db, now, rate_limiter, raise_on_error)
+    return value[0] if value is not None else None
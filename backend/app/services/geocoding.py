@@ -4,12 +4,22 @@ Geocoding service using OpenStreetMap Nominatim API.
 Free to use with usage policy: https://operations.osmfoundation.org/policies/nominatim/
 """
 import math
-from typing import Optional
+from typing import Optional, Tuple
 import httpx
+import numpy as np
+
+from app.services.http_client import http_request
 
 NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 USER_AGENT = "ToolSharer/1.0 (portfolio project)"
 
+EARTH_RADIUS_KM = 6371
+
+# Below this radius the equirectangular approximation stays within ~0.1% of
+# haversine (outside polar regions), at a fraction of the cost.
+EQUIRECTANGULAR_MAX_KM = 50.0
+EQUIRECTANGULAR_MAX_LAT = 70.0
+
 
 class GeocodingResult:
     def __init__(self, lat: float, lng: float, formatted_address: str):
@@ -18,48 +28,56 @@ class GeocodingResult:
         self.formatted_address = formatted_address
 
 
-async def geocode_address(address: str) -> Optional[GeocodingResult]:
+async def geocode_address(
+    address: str, raise_on_error: bool = False
+) -> Optional[GeocodingResult]:
     """
     Convert an address string to lat/lng coordinates using Nominatim.
-    Returns None if geocoding fails.
+    Returns None if the address is not found. Request or response errors
+    also return None unless raise_on_error is set, so callers that cache
+    results can tell "not found" apart from "upstream failed".
+
+    Most callers should go through app.services.geocode_cache instead.
     """
     if not address or not address.strip():
         return None
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                NOMINATIM_URL,
-                params={
-                    "q": address,
-                    "format": "json",
-                    "limit": 1,
-                },
-                headers={"User-Agent": USER_AGENT},
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            results = response.json()
-
-            if not results:
-                return None
-
-            result = results[0]
-            return GeocodingResult(
-                lat=float(result["lat"]),
-                lng=float(result["lon"]),
-                formatted_address=result.get("display_name", address),
-            )
-        except (httpx.HTTPError, KeyError, ValueError, IndexError):
+    try:
+        response = await http_request(
+            "GET",
+            NOMINATIM_URL,
+            upstream="nominatim",
+            params={
+                "q": address,
+                "format": "json",
+                "limit": 1,
+            },
+            headers={"User-Agent": USER_AGENT},
+        )
+        response.raise_for_status()
+        results = response.json()
+
+        if not results:
             return None
 
+        result = results[0]
+        return GeocodingResult(
+            lat=float(result["lat"]),
+            lng=float(result["lon"]),
+            formatted_address=result.get("display_name", address),
+        )
+    except (httpx.HTTPError, KeyError, ValueError, IndexError):
+        if raise_on_error:
+            raise
+        return None
+
 
 def haversine_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     """
     Calculate the great-circle distance between two points on Earth (in km).
     Uses the Haversine formula.
     """
-    R = 6371  # Earth's radius in kilometers
+    R = EARTH_RADIUS_KM
 
     lat1_rad = math.radians(lat1)
     lat2_rad = math.radians(lat2)
@@ -73,3 +91,106 @@ def haversine_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> fl
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
     return R * c
+
+
+# =============================================================================
+# Batch distance API (one center to N points)
+# =============================================================================
+
+def haversine_distances(
+    lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray
+) -> np.ndarray:
+    """
+    Great-circle distances (km) from one point to arrays of points.
+    Vectorized equivalent of haversine_distance.
+    """
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    delta_lat = lat2 - lat1
+    delta_lng = np.radians(lngs) - math.radians(lng)
+
+    a = np.sin(delta_lat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(delta_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def equirectangular_distances(
+    lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray
+) -> np.ndarray:
+    """
+    Approximate distances (km) using an equirectangular projection.
+    Accurate for short distances away from the poles.
+    """
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    # Wrap longitude differences into [-pi, pi) so the antimeridian works
+    delta_lng = (np.radians(lngs) - math.radians(lng) + math.pi) % (2 * math.pi) - math.pi
+    x = delta_lng * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return EARTH_RADIUS_KM * np.hypot(x, y)
+
+
+def batch_distances(
+    lat: float,
+    lng: float,
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    max_radius_km: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Distances (km) from one point to N points.
+    Uses the equirectangular fast path when every point of interest is known
+    to be within a small radius, and haversine otherwise.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+
+    if (
+        max_radius_km is not None
+        and max_radius_km <= EQUIRECTANGULAR_MAX_KM
+        and abs(lat) <= EQUIRECTANGULAR_MAX_LAT
+    ):
+        return equirectangular_distances(lat, lng, lats, lngs)
+    return haversine_distances(lat, lng, lats, lngs)
+
+
+def within_radius(
+    lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray, radius_km: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and distances of the points within radius_km, closest first.
+    """
+    distances = batch_distances(lat, lng, lats, lngs, max_radius_km=radius_km)
+    idx = np.flatnonzero(distances <= radius_km)
+    order = np.argsort(distances[idx], kind="stable")
+    idx = idx[order]
+    return idx, distances[idx]
+
+
+def nearest_k(
+    lat: float,
+    lng: float,
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    k: int,
+    max_radius_km: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and distances of the k closest points, closest first.
+    Optionally limited to points within max_radius_km.
+    Selection uses argpartition, so only the top k are fully sorted.
+    """
+    distances = batch_distances(lat, lng, lats, lngs, max_radius_km=max_radius_km)
+    idx = np.arange(distances.shape[0])
+    if max_radius_km is not None:
+        idx = np.flatnonzero(distances <= max_radius_km)
+
+    if k <= 0 or idx.size == 0:
+        return idx[:0], distances[:0]
+
+    if idx.size > k:
+        part = np.argpartition(distances[idx], k - 1)[:k]
+        idx = idx[part]
+
+    order = np.argsort(distances[idx], kind="stable")
+    idx = idx[order]
+    return idx, distances[idx]
@@ -0,0 +1,168 @@
+"""
+Shared, pooled HTTP client for outbound calls (Nominatim, Google OAuth).
+
+One httpx.AsyncClient is opened in the app lifespan hook and reused by every
+request, so TCP/TLS connections are kept alive between geocodes and OAuth
+exchanges instead of being re-established each time. On top of httpx's global
+pool limits, a per-host semaphore caps concurrent requests to any single
+upstream, and each upstream gets its own timeout.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.metrics import record_dependency
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_http2_active = False
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+_host_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _upstream_timeouts() -> Dict[str, float]:
+    settings = get_settings()
+    return {
+        "nominatim": settings.NOMINATIM_TIMEOUT_SECONDS,
+        "google": settings.GOOGLE_OAUTH_TIMEOUT_SECONDS,
+    }
+
+
+def _build_client() -> httpx.AsyncClient:
+    global _http2_active
+    settings = get_settings()
+
+    http2 = settings.HTTP2_ENABLED
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP2_ENABLED is set but 'h2' is not installed; using HTTP/1.1")
+            http2 = False
+
+    _http2_active = http2
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    return httpx.AsyncClient(limits=limits, http2=http2, timeout=10.0)
+
+
+async def start_http_client() -> None:
+    """Open the shared client. Called from the app lifespan hook."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+        _host_limits.clear()
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _host_limits.clear()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it on first use when running
+    outside the app lifespan (e.g. from scripts).
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+def _host_semaphore(host: str) -> asyncio.Semaphore:
+    semaphore = _host_limits.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(get_settings().HTTP_MAX_CONNECTIONS_PER_HOST)
+        _host_limits[host] = semaphore
+    return semaphore
+
+
+def _stats_for(host: str) -> Dict[str, float]:
+    stats = _host_stats.get(host)
+    if stats is None:
+        stats = {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "queue_wait_seconds": 0.0,
+            "request_seconds": 0.0,
+        }
+        _host_stats[host] = stats
+    return stats
+
+
+async def http_request(
+    method: str, url: str, upstream: Optional[str] = None, **kwargs
+) -> httpx.Response:
+    """
+    Send a request through the shared client.
+    `upstream` selects the per-upstream timeout (see _upstream_timeouts);
+    an explicit `timeout` kwarg takes precedence.
+    """
+    if upstream is not None and "timeout" not in kwargs:
+        kwargs["timeout"] = _upstream_timeouts()[upstream]
+
+    host = urlsplit(url).netloc
+    stats = _stats_for(host)
+    client = get_http_client()
+
+    queued_at = time.perf_counter()
+    async with _host_semaphore(host):
+        started_at = time.perf_counter()
+        stats["queue_wait_seconds"] += started_at - queued_at
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            return await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+            stats["request_seconds"] += time.perf_counter() - started_at
+            record_dependency(upstream or host, time.perf_counter() - queued_at)
+
+
+def get_pool_stats() -> dict:
+    """Per-host request counters plus a snapshot of the connection pool."""
+    settings = get_settings()
+    pool_info: Dict[str, int] = {}
+
+    # httpcore does not expose pool stats publicly; read them best-effort
+    transport = getattr(_client, "_transport", None) if _client is not None else None
+    pool = getattr(transport, "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is not None:
+        pool_info = {
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+        }
+
+    return {
+        "client_open": _client is not None,
+        "http2": _client is not None and _http2_active,
+        "limits": {
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry_seconds": settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            "max_connections_per_host": settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+        },
+        "pool": pool_info,
+        "hosts": {host: dict(stats) for host, stats in _host_stats.items()},
+    }
@@ -0,0 +1,433 @@
+# app/services/outbox.py
+"""
+Transactional outbox for notification emails.
+
+Request handlers call enqueue_email() before they commit a status change, so
+the email row is written in the same transaction as the change. It exists
+only if the change does, and the request pays for one INSERT instead of an
+SES round-trip.
+
+The worker (run_outbox_worker) drains the table separately from the API.
+Each pass claims up to EMAIL_OUTBOX_BATCH_SIZE due rows. On Postgres it uses
+FOR UPDATE SKIP LOCKED so that several workers can run, and it pushes the
+rows' next_attempt_at out by EMAIL_OUTBOX_LEASE_SECONDS. It then loads the
+requests, tools and users in one query and sends through SES, with at most
+EMAIL_OUTBOX_CONCURRENCY calls in flight. A failed send is retried with
+exponential backoff and jitter. After EMAIL_OUTBOX_MAX_ATTEMPTS the row is
+marked "failed". If a worker dies mid-batch, its rows become due again when
+the lease expires, so delivery is at-least-once.
+
+Recipients who chose digest delivery (User.notification_delivery) are not
+emailed per event. Their rows are parked with status "digest", and
+flush_digests() sends each of them one email listing everything buffered,
+once their oldest buffered event is EMAIL_DIGEST_WINDOW_SECONDS old. Each
+pass covers every due recipient, up to EMAIL_DIGEST_BATCH_SIZE, through the
+bulk templated send in app.services.email.
+
+Passes use a sync Session and boto3, so they are plain functions; sends
+fan out over a thread pool. run_outbox_worker runs each pass in a thread,
+so the in-process worker does not block the API's event loop.
+
+Run as a script (scripts/email_outbox_worker.py) or in-process by setting
+EMAIL_OUTBOX_WORKER_IN_PROCESS.
+"""
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import joinedload
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.borrow_request import BorrowRequest
+from app.models.email_outbox import OutboxEmail
+from app.models.tool import Tool
+from app.models.user import User
+from app.services.email import (
+    MAX_BULK_DESTINATIONS,
+    ensure_digest_template,
+    get_ses_client,
+    send_digests,
+    send_email,
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_CREATED = "request_created"
+REQUEST_CANCELLED = "request_cancelled"
+REQUEST_APPROVED = "request_approved"
+REQUEST_DECLINED = "request_declined"
+RETURN_INITIATED = "return_initiated"
+RETURN_CONFIRMED = "return_confirmed"
+
+PENDING = "pending"
+BUFFERED = "digest"
+SENT = "sent"
+FAILED = "failed"
+
+# User.notification_delivery values
+IMMEDIATE_DELIVERY = "immediate"
+DIGEST_DELIVERY = "digest"
+
+
+def enqueue_email(db, event: str, borrow_request: BorrowRequest) -> None:
+    """
+    Queue a notification in the caller's transaction; it is sent only if the
+    caller commits. The request may be new: the flush inserts it first.
+    """
+    db.add(OutboxEmail(event=event, borrow_request=borrow_request))
+
+
+def enqueue_emails_statement(event: str, borrow_request_ids: List[int]):
+    """
+    One multi-row INSERT queuing `event` for many existing requests, to
+    execute in the caller's transaction (sync or async session alike).
+    """
+    if not borrow_request_ids:
+        raise ValueError("enqueue_emails_statement needs at least one borrow request id")
+    return insert(OutboxEmail).values(
+        [{"event": event, "borrow_request_id": request_id} for request_id in borrow_request_ids]
+    )
+
+
+# =============================================================================
+# Rendering
+# =============================================================================
+
+# event -> (recipient, subject, sentence). The sentence is the body of an
+# immediate email and one line of a digest.
+EVENT_TEMPLATES = {
+    REQUEST_CREATED: ("owner", "New request: {tool}", "{borrower} asked to borrow {tool}{dates}."),
+    REQUEST_CANCELLED: ("owner", "Request cancelled: {tool}", "{borrower} cancelled their request to borrow {tool}."),
+    REQUEST_APPROVED: ("borrower", "Request approved: {tool}", "{owner} approved your request to borrow {tool}{dates}."),
+    REQUEST_DECLINED: ("borrower", "Request declined: {tool}", "{owner} declined your request to borrow {tool}."),
+    RETURN_INITIATED: ("owner", "Return to confirm: {tool}", "{borrower} has returned {tool}. Please confirm the return."),
+    RETURN_CONFIRMED: (
+        "borrower", "Return confirmed: {tool}", "{owner} confirmed the return of {tool}. Thanks for borrowing!"
+    ),
+}
+
+
+def _display_name(user: User) -> str:
+    return user.full_name or user.email
+
+
+def render_event(event: str, req: BorrowRequest) -> Tuple[User, str, str]:
+    """(recipient, subject, sentence) for one outbox event."""
+    if event not in EVENT_TEMPLATES:
+        raise ValueError(f"Unknown outbox event '{event}'")
+    role, subject, sentence = EVENT_TEMPLATES[event]
+    owner, borrower = req.tool.owner, req.borrower
+    values = {
+        "tool": req.tool.name,
+        "owner": _display_name(owner),
+        "borrower": _display_name(borrower),
+        "dates": f" from {req.start_date} to {req.due_date}" if req.start_date and req.due_date else "",
+    }
+    recipient = owner if role == "owner" else borrower
+    return recipient, subject.format(**values), sentence.format(**values)
+
+
+def render_email(event: str, req: BorrowRequest) -> Tuple[User, str, str]:
+    """(recipient, subject, plain text body) for one outbox event."""
+    recipient, subject, sentence = render_event(event, req)
+    return recipient, subject, (
+        f"Hi {_display_name(recipient)},\n\n{sentence}\n\n{get_settings().FRONTEND_URL}/\n"
+    )
+
+
+# =============================================================================
+# Worker
+# =============================================================================
+
+def _backoff_seconds(attempts: int) -> float:
+    """Delay before the next attempt: base * 2^(attempts - 1), capped, with up to 50% jitter."""
+    settings = get_settings()
+    delay = min(
+        settings.EMAIL_OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _load_emails(db, ids: List[int]) -> List[OutboxEmail]:
+    """Outbox rows with their request, tool, owner and borrower, in one query."""
+    return db.scalars(
+        select(OutboxEmail)
+        .options(
+            joinedload(OutboxEmail.borrow_request).joinedload(BorrowRequest.tool).joinedload(Tool.owner),
+            joinedload(OutboxEmail.borrow_request).joinedload(BorrowRequest.borrower),
+        )
+        .where(OutboxEmail.id.in_(ids))
+        .order_by(OutboxEmail.id)
+    ).unique().all()
+
+
+def _lease(db, ids: List[int], now: datetime) -> None:
+    # Other workers skip the rows until this pass is done or the lease expires
+    db.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.id.in_(ids))
+        .values(next_attempt_at=now + timedelta(seconds=get_settings().EMAIL_OUTBOX_LEASE_SECONDS))
+    )
+
+
+def _claim_batch(db, batch_size: int) -> List[OutboxEmail]:
+    now = datetime.utcnow()
+    ids = db.scalars(
+        select(OutboxEmail.id)
+        .where(OutboxEmail.status == PENDING, OutboxEmail.next_attempt_at <= now)
+        .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if ids:
+        _lease(db, ids, now)
+    db.commit()
+    return _load_emails(db, ids) if ids else []
+
+
+def _record_result(email: OutboxEmail, error: Optional[str], now: datetime, stats: Dict[str, int]) -> None:
+    """Mark one row sent, or schedule its retry, or give up after the last attempt."""
+    settings = get_settings()
+    email.attempts += 1
+    if error is None:
+        email.status = SENT
+        email.sent_at = now
+        email.last_error = None
+        stats["sent"] += 1
+    elif email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = FAILED
+        email.last_error = error
+        stats["failed"] += 1
+        logger.error(f"Outbox email {email.id} ({email.event}) failed after {email.attempts} attempts: {error}")
+    else:
+        email.next_attempt_at = now + timedelta(seconds=_backoff_seconds(email.attempts))
+        email.last_error = error
+        stats["retried"] += 1
+        logger.warning(f"Outbox email {email.id} ({email.event}) attempt {email.attempts} failed: {error}")
+
+
+def _deliver(to_email: str, subject: str, body_text: str) -> Optional[str]:
+    """Send one email; returns None on success, else the error."""
+    try:
+        sent = send_email(to_email, subject, body_text)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None if sent else "SES rejected the message"
+
+
+def _throughput(stats: Dict[str, float], started: float) -> Dict[str, float]:
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["emails_per_second"] = round(stats["sent"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+
+def drain_outbox(batch_size: Optional[int] = None, concurrency: Optional[int] = None) -> Dict[str, float]:
+    """
+    Claim one batch of due outbox emails, send the immediate ones and park
+    the rest for digests.
+    Returns counters for the pass, including throughput.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    concurrency = concurrency or settings.EMAIL_OUTBOX_CONCURRENCY
+
+    stats = {"claimed": 0, "buffered": 0, "sent": 0, "retried": 0, "failed": 0}
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        emails = _claim_batch(db, batch_size)
+        stats["claimed"] = len(emails)
+        now = datetime.utcnow()
+        to_send = []
+        for email in emails:
+            try:
+                recipient, subject, body_text = render_email(email.event, email.borrow_request)
+            except Exception as e:
+                _record_result(email, f"Render failed: {e}", now, stats)
+                continue
+            email.recipient_id = recipient.id
+            if recipient.notification_delivery == DIGEST_DELIVERY:
+                # Held for the recipient's next digest (flush_digests)
+                email.status = BUFFERED
+                email.next_attempt_at = now
+                stats["buffered"] += 1
+            else:
+                to_send.append((email, recipient.email, subject, body_text))
+
+        if to_send:
+            # Create the client before the worker threads share it
+            get_ses_client()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                futures = [
+                    pool.submit(_deliver, to_email, subject, body_text) for _, to_email, subject, body_text in to_send
+                ]
+                errors = [future.result() for future in futures]
+            now = datetime.utcnow()
+            for (email, *_), error in zip(to_send, errors):
+                _record_result(email, error, now, stats)
+        db.commit()
+    finally:
+        db.close()
+
+    return _throughput(stats, started)
+
+
+# =============================================================================
+# Digests
+# =============================================================================
+
+def _claim_digests(db, batch_size: int) -> List[OutboxEmail]:
+    """Buffered rows of up to `batch_size` recipients whose digest window has passed."""
+    settings = get_settings()
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.EMAIL_DIGEST_WINDOW_SECONDS)
+    # Index-only on (status, recipient_id, created_at); leased or backing-off
+    # recipients have a next_attempt_at in the future
+    recipient_ids = db.scalars(
+        select(OutboxEmail.recipient_id)
+        .where(OutboxEmail.status == BUFFERED)
+        .group_by(OutboxEmail.recipient_id)
+        .having(func.min(OutboxEmail.created_at) <= cutoff, func.max(OutboxEmail.next_attempt_at) <= now)
+        .order_by(OutboxEmail.recipient_id)
+        .limit(batch_size)
+    ).all()
+    if not recipient_ids:
+        db.commit()
+        return []
+
+    ids = db.scalars(
+        select(OutboxEmail.id)
+        .where(
+            OutboxEmail.status == BUFFERED,
+            OutboxEmail.recipient_id.in_(recipient_ids),
+            # Rows another worker leased after the first query are not due
+            OutboxEmail.next_attempt_at <= now,
+        )
+        .with_for_update(skip_locked=True)
+    ).all()
+    if ids:
+        _lease(db, ids, now)
+    db.commit()
+    return _load_emails(db, ids) if ids else []
+
+
+def _deliver_digests(digests: List[Dict]) -> List[Optional[str]]:
+    """Send up to MAX_BULK_DESTINATIONS digests in one SES call; one error (or None) per digest."""
+    try:
+        statuses = send_digests(digests)
+    except Exception as e:
+        return [f"{type(e).__name__}: {e}"] * len(digests)
+    return [
+        None if status.get("Status") == "Success" else (status.get("Error") or status.get("Status"))
+        for status in statuses
+    ]
+
+
+def flush_digests(batch_size: Optional[int] = None, concurrency: Optional[int] = None) -> Dict[str, float]:
+    """
+    Send one digest to each recipient whose window has passed (up to
+    `batch_size` recipients), covering all of their buffered events.
+    Returns counters for the pass, including throughput.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.EMAIL_DIGEST_BATCH_SIZE
+    concurrency = concurrency or settings.EMAIL_OUTBOX_CONCURRENCY
+
+    stats = {"recipients": 0, "events": 0, "sent": 0, "retried": 0, "failed": 0}
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        emails = _claim_digests(db, batch_size)
+        now = datetime.utcnow()
+
+        # recipient id -> (recipient, rows, digest lines)
+        groups: Dict[int, Tuple[User, List[OutboxEmail], List[Dict[str, str]]]] = {}
+        for email in emails:
+            try:
+                recipient, _, sentence = render_event(email.event, email.borrow_request)
+            except Exception as e:
+                _record_result(email, f"Render failed: {e}", now, stats)
+                continue
+            group = groups.setdefault(recipient.id, (recipient, [], []))
+            group[1].append(email)
+            group[2].append({"text": sentence})
+        stats["recipients"] = len(groups)
+        stats["events"] = len(emails)
+
+        batch = list(groups.values())
+        digests = [
+            {"to": recipient.email, "data": {"name": _display_name(recipient), "count": len(lines), "events": lines}}
+            for recipient, _, lines in batch
+        ]
+        if digests:
+            # Upload the template before the worker threads use it
+            ensure_digest_template()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                chunks = pool.map(
+                    _deliver_digests,
+                    (digests[i:i + MAX_BULK_DESTINATIONS] for i in range(0, len(digests), MAX_BULK_DESTINATIONS)),
+                )
+                errors = [error for chunk in chunks for error in chunk]
+            now = datetime.utcnow()
+            for (recipient, rows, _), error in zip(batch, errors):
+                # Rows count as retried/failed individually; the email once
+                row_stats = {"sent": 0, "retried": 0, "failed": 0}
+                for email in rows:
+                    _record_result(email, error, now, row_stats)
+                if error is None:
+                    stats["sent"] += 1
+                else:
+                    stats["retried"] += row_stats["retried"]
+                    stats["failed"] += row_stats["failed"]
+        db.commit()
+    finally:
+        db.close()
+
+    return _throughput(stats, started)
+
+
+async def run_outbox_worker(
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    poll_interval: Optional[float] = None,
+) -> None:
+    """
+    Drain the outbox and flush due digests until cancelled. A full batch is
+    followed by the next pass right away; otherwise the worker sleeps for
+    `poll_interval` seconds.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    poll_interval = poll_interval or settings.EMAIL_OUTBOX_POLL_INTERVAL_SECONDS
+
+    while True:
+        busy = False
+        try:
+            stats = await asyncio.to_thread(drain_outbox, batch_size, concurrency)
+            if stats["claimed"]:
+                logger.info(f"Outbox pass: {stats}")
+            digest_stats = await asyncio.to_thread(flush_digests, concurrency=concurrency)
+            if digest_stats["recipients"]:
+                logger.info(f"Digest pass: {digest_stats}")
+            busy = stats["claimed"] >= batch_size or digest_stats["recipients"] >= settings.EMAIL_DIGEST_BATCH_SIZE
+        except Exception:
+            logger.exception("Outbox pass failed; retrying after the poll interval")
+        if not busy:
+            await asyncio.sleep(poll_interval)
+
+
+async def run_outbox_worker_task() -> None:
+    """In-process entry point; stops quietly on shutdown."""
+    try:
+        await run_outbox_worker()
+    except asyncio.CancelledError:
+        logger.info("Outbox worker stopped; pending emails stay queued")
+        raise
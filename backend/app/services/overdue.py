@@ -0,0 +1,93 @@
+# app/services/overdue.py
+"""
+Overdue state of borrow requests, computed in SQL.
+
+A loan is overdue when it is APPROVED or RETURN_PENDING and its due_date is
+before today. overdue_columns() returns is_overdue / days_overdue /
+days_until_due as SQL expressions, to select next to BorrowRequest so
+listings never post-process rows in Python. overdue_clause() is the matching
+WHERE condition. It is an index range scan on (status, due_date).
+
+"Today" is the API server's local date, passed in as a parameter rather than
+taken from the database clock, so it agrees with the daily ETags and cache
+keys. annotate_overdue() applies the same rules to a single object that
+was just written, where a SELECT would only repeat known values.
+"""
+from datetime import date
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Date, Integer, and_, case, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.models.borrow_request import BorrowRequest, RequestStatus
+
+ACTIVE_LOAN_STATUSES = (RequestStatus.APPROVED, RequestStatus.RETURN_PENDING)
+
+
+class days_between(FunctionElement):
+    """Whole days from `start` to `end` (end - start) for two DATE expressions."""
+    type = Integer()
+    name = "days_between"
+    inherit_cache = True
+
+
+@compiles(days_between)
+def _days_between(element, compiler, **kw):
+    # Postgres: date - date is an integer number of days
+    start, end = list(element.clauses)
+    return f"({compiler.process(end, **kw)} - {compiler.process(start, **kw)})"
+
+
+@compiles(days_between, "sqlite")
+def _days_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"CAST(julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)}) AS INTEGER)"
+
+
+def _today(today: Optional[date]):
+    # A typed bind, not CAST(... AS DATE): SQLite would turn that into a number
+    return literal(today or date.today(), Date)
+
+
+def overdue_clause(today: Optional[date] = None):
+    """WHERE condition for loans that are overdue as of `today`."""
+    return and_(
+        BorrowRequest.status.in_(ACTIVE_LOAN_STATUSES),
+        BorrowRequest.due_date < _today(today),
+    )
+
+
+def overdue_columns(today: Optional[date] = None) -> list:
+    """is_overdue, days_overdue and days_until_due as labelled SQL expressions."""
+    today_expr = _today(today)
+    is_overdue = overdue_clause(today)
+    return [
+        case((is_overdue, True), else_=False).label("is_overdue"),
+        case((is_overdue, days_between(BorrowRequest.due_date, today_expr)), else_=0).label("days_overdue"),
+        case(
+            (BorrowRequest.due_date > today_expr, days_between(today_expr, BorrowRequest.due_date)),
+            else_=0,
+        ).label("days_until_due"),
+    ]
+
+
+def attach_overdue(rows: Iterable) -> List[BorrowRequest]:
+    """Objects from rows of (BorrowRequest, *overdue_columns()), with the values set on them."""
+    requests = []
+    for req, is_overdue, days_overdue, days_until_due in rows:
+        req.is_overdue = bool(is_overdue)
+        req.days_overdue = int(days_overdue)
+        req.days_until_due = int(days_until_due)
+        requests.append(req)
+    return requests
+
+
+def annotate_overdue(req: BorrowRequest, today: Optional[date] = None) -> None:
+    """Set the overdue fields on one loaded request, by the rules of overdue_columns()."""
+    today = today or date.today()
+    is_overdue = req.status in ACTIVE_LOAN_STATUSES and req.due_date is not None and req.due_date < today
+
+    req.is_overdue = bool(is_overdue)
+    req.days_overdue = (today - req.due_date).days if is_overdue else 0
+    req.days_until_due = max((req.due_date - today).days, 0) if req.due_date is not None and not is_overdue else 0
@@ -0,0 +1,226 @@
+# app/services/reminders.py
+"""
+Batched due-date reminders: "due back tomorrow" and "overdue" emails to
+borrowers.
+
+Both kinds are found through the (status, due_date) index: APPROVED loans
+whose due_date is tomorrow, or before today. RETURN_PENDING loans are left
+out because they wait on the owner, not the borrower. A loan already in
+`sent_reminders` for the same kind and due date is skipped, so a rerun (or a
+run after a crash) only sends what is missing. Extending a due date makes
+the loan eligible again.
+
+Each run first collects the ids of borrowers with something to send, then
+loads their loans `batch_size` borrowers at a time. Every borrower gets one
+email per kind listing all of their loans. Emails go out through SES bulk
+templated sending, MAX_BULK_DESTINATIONS recipients per call, paced to
+REMINDER_SES_MAX_SEND_RATE. The sent_reminders rows for each call are
+committed right after it returns, and only for recipients SES accepted.
+
+Run daily as a script (scripts/send_reminders.py).
+"""
+import logging
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+from sqlalchemy import and_, exists, select
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.borrow_request import BorrowRequest, RequestStatus
+from app.models.sent_reminder import SentReminder
+from app.models.tool import Tool
+from app.models.user import User
+from app.services.email import MAX_BULK_DESTINATIONS, ensure_template, send_bulk_templated_email
+
+logger = logging.getLogger(__name__)
+
+DUE_SOON = "due_soon"
+OVERDUE = "overdue"
+REMINDER_KINDS = (DUE_SOON, OVERDUE)
+
+# kind -> (subject, text part, html part), in SES template syntax
+TEMPLATES = {
+    DUE_SOON: (
+        "Due back tomorrow: tools you borrowed",
+        "Hi {{name}},\n\n"
+        "These tools are due back tomorrow:\n"
+        "{{#each loans}}- {{tool}} (due {{due_date}})\n{{/each}}\n"
+        "Your loans: {{loans_url}}\n",
+        "<p>Hi {{name}},</p>"
+        "<p>These tools are due back tomorrow:</p>"
+        "<ul>{{#each loans}}<li>{{tool}} (due {{due_date}})</li>{{/each}}</ul>"
+        '<p><a href="{{loans_url}}">Your loans</a></p>',
+    ),
+    OVERDUE: (
+        "Overdue: please return tools you borrowed",
+        "Hi {{name}},\n\n"
+        "These tools are past their due date:\n"
+        "{{#each loans}}- {{tool}} (due {{due_date}}, {{days_overdue}} days overdue)\n{{/each}}\n"
+        "Please return them or contact the owner: {{loans_url}}\n",
+        "<p>Hi {{name}},</p>"
+        "<p>These tools are past their due date:</p>"
+        "<ul>{{#each loans}}<li>{{tool}} (due {{due_date}}, {{days_overdue}} days overdue)</li>{{/each}}</ul>"
+        '<p>Please return them or <a href="{{loans_url}}">contact the owner</a>.</p>',
+    ),
+}
+
+
+def template_name(kind: str) -> str:
+    settings = get_settings()
+    return settings.REMINDER_DUE_SOON_TEMPLATE if kind == DUE_SOON else settings.REMINDER_OVERDUE_TEMPLATE
+
+
+def ensure_reminder_templates(kinds: Iterable[str] = REMINDER_KINDS) -> None:
+    for kind in kinds:
+        ensure_template(template_name(kind), *TEMPLATES[kind])
+
+
+def _due_clause(kind: str, today: date):
+    if kind == DUE_SOON:
+        due = BorrowRequest.due_date == today + timedelta(days=1)
+    else:
+        due = BorrowRequest.due_date < today
+    return and_(BorrowRequest.status == RequestStatus.APPROVED, due)
+
+
+def _not_reminded(kind: str):
+    return ~exists().where(
+        SentReminder.borrow_request_id == BorrowRequest.id,
+        SentReminder.kind == kind,
+        SentReminder.due_date == BorrowRequest.due_date,
+    )
+
+
+class _SendPacer:
+    """Spaces out SES calls so messages go out at no more than `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = time.monotonic()
+
+    def wait(self, messages: int) -> None:
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + messages / self.rate
+
+
+def _send_chunk(db, kind: str, recipients: List[Dict], pacer: _SendPacer, stats: Dict[str, int]) -> None:
+    pacer.wait(len(recipients))
+    try:
+        statuses = send_bulk_templated_email(
+            template_name(kind),
+            [{"to": r["to"], "data": r["data"]} for r in recipients],
+            default_data={"loans_url": f"{get_settings().FRONTEND_URL}/"},
+        )
+    except ClientError as e:
+        # Nothing is recorded, so the next run retries these recipients
+        logger.error(f"Reminder batch ({kind}, {len(recipients)} recipients) failed: {e}")
+        stats["failed"] += len(recipients)
+        return
+
+    for recipient, status in zip(recipients, statuses):
+        if status.get("Status") != "Success":
+            logger.warning(f"Reminder ({kind}) to '{recipient['to']}' rejected: {status.get('Error') or status.get('Status')}")
+            stats["failed"] += 1
+            continue
+        db.add_all(
+            SentReminder(borrow_request_id=loan_id, kind=kind, due_date=due_date, message_id=status.get("MessageId"))
+            for loan_id, due_date in recipient["loans"]
+        )
+        stats["sent"] += 1
+    db.commit()
+    stats["batches"] += 1
+
+
+def _send_kind(db, kind: str, today: date, batch_size: int, pacer: _SendPacer, dry_run: bool) -> Dict[str, int]:
+    pending = and_(_due_clause(kind, today), _not_reminded(kind))
+    borrower_ids = db.scalars(
+        select(BorrowRequest.borrower_id).where(pending).distinct().order_by(BorrowRequest.borrower_id)
+    ).all()
+
+    stats = {"recipients": len(borrower_ids), "loans": 0, "sent": 0, "failed": 0, "batches": 0}
+    for start in range(0, len(borrower_ids), batch_size):
+        rows = db.execute(
+            select(
+                BorrowRequest.id,
+                BorrowRequest.borrower_id,
+                BorrowRequest.due_date,
+                Tool.name,
+                User.email,
+                User.full_name,
+            )
+            .join(Tool, Tool.id == BorrowRequest.tool_id)
+            .join(User, User.id == BorrowRequest.borrower_id)
+            .where(pending, BorrowRequest.borrower_id.in_(borrower_ids[start:start + batch_size]))
+            .order_by(BorrowRequest.borrower_id, BorrowRequest.due_date, BorrowRequest.id)
+        ).all()
+        stats["loans"] += len(rows)
+
+        # One recipient per borrower, listing all of their loans of this kind
+        recipients: Dict[int, Dict] = {}
+        for loan_id, borrower_id, due_date, tool_name, email, full_name in rows:
+            recipient = recipients.get(borrower_id)
+            if recipient is None:
+                recipient = recipients[borrower_id] = {
+                    "to": email,
+                    "data": {"name": full_name or email, "loans": []},
+                    "loans": [],
+                }
+            loan = {"tool": tool_name, "due_date": due_date.isoformat()}
+            if kind == OVERDUE:
+                loan["days_overdue"] = (today - due_date).days
+            recipient["data"]["loans"].append(loan)
+            recipient["loans"].append((loan_id, due_date))
+
+        if dry_run:
+            continue
+        batch = list(recipients.values())
+        for i in range(0, len(batch), MAX_BULK_DESTINATIONS):
+            _send_chunk(db, kind, batch[i:i + MAX_BULK_DESTINATIONS], pacer, stats)
+
+    return stats
+
+
+def run_reminders(
+    kinds: Iterable[str] = REMINDER_KINDS,
+    today: Optional[date] = None,
+    batch_size: Optional[int] = None,
+    max_send_rate: Optional[float] = None,
+    dry_run: bool = False,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Send the reminders that are due as of `today` (default: the server's
+    local date, as in app/services/overdue.py). With dry_run=True, only count
+    what would be sent.
+    Returns per-kind counters including throughput.
+    """
+    settings = get_settings()
+    today = today or date.today()
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    pacer = _SendPacer(max_send_rate or settings.REMINDER_SES_MAX_SEND_RATE)
+    kinds = list(kinds)
+
+    if not dry_run:
+        ensure_reminder_templates(kinds)
+
+    summary = {}
+    db = SessionLocal()
+    try:
+        for kind in kinds:
+            started = time.perf_counter()
+            stats = _send_kind(db, kind, today, batch_size, pacer, dry_run)
+            elapsed = time.perf_counter() - started
+            stats["seconds"] = round(elapsed, 2)
+            stats["emails_per_second"] = round(stats["sent"] / elapsed, 2) if elapsed else 0.0
+            stats["loans_per_second"] = round(stats["loans"] / elapsed, 2) if elapsed else 0.0
+            summary[kind] = stats
+            logger.info(f"Reminders {kind} for {today}: {stats}")
+    finally:
+        db.close()
+
+    return summary
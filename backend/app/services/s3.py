@@ -10,6 +10,7 @@ import boto3
 from botocore.exceptions import ClientError
 
 from app.core.config import get_settings
+from app.core.metrics import time_boto_client
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +39,7 @@ def get_s3_client():
             client_kwargs["endpoint_url"] = settings.S3_ENDPOINT_URL
 
         _s3_client = boto3.client("s3", **client_kwargs)
+        time_boto_client(_s3_client, "s3")
 
     return _s3_client
 
@@ -0,0 +1,405 @@
+"""
+Process-local spatial index over tool coordinates.
+
+Tools are bucketed into a fixed lat/lng grid so radius queries only look at
+the cells overlapping the search circle's bounding box, instead of scanning
+every tool with coordinates. The index is built at startup and kept in
+sync by the tool create/update/delete endpoints and by the borrow-request
+transitions that flip a tool's availability.
+
+Each API process holds its own copy, so writes made by other processes
+(other API workers, scripts/backfill_geocoding.py) are picked up by
+run_tool_index_sync: every TOOL_INDEX_SYNC_INTERVAL_SECONDS it compares the
+tools table version (app.db.versions) with the one the index was loaded at,
+and reloads the index off the event loop when it moved. Callers should treat
+query results as candidates and re-check them against the database rows
+they load.
+"""
+import asyncio
+import logging
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.db.versions import get_versions
+from app.models.tool import Tool
+from app.services.clustering import tool_clusters
+from app.services.geocoding import EARTH_RADIUS_KM, nearest_k, within_radius
+
+logger = logging.getLogger(__name__)
+
+KM_PER_DEGREE_LAT = 111.32
+
+# Roughly 5.5 km north-south per cell: small enough that a 10 km search only
+# touches a handful of cells, large enough that 100 km searches stay cheap.
+DEFAULT_CELL_DEG = 0.05
+
+# Upper bound for radius searches accepted by the API
+MAX_SEARCH_RADIUS_KM = 500.0
+
+Cell = Tuple[int, int]
+# (ids, lats, lngs, is_available, icon_keys)
+CellArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+# (lat, lng, is_available, icon_key)
+Entry = Tuple[float, float, bool, Optional[str]]
+
+
+class SpatialIndex:
+    """Uniform grid index mapping tool id -> (lat, lng, is_available, icon_key)."""
+
+    def __init__(self, cell_deg: float = DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._lng_cells = int(round(360 / cell_deg))
+        self._min_row = math.floor(-90.0 / cell_deg)
+        self._max_row = math.floor(90.0 / cell_deg)
+        self._cells: Dict[Cell, Dict[int, Entry]] = {}
+        self._points: Dict[int, Cell] = {}
+        # Per-cell column arrays, rebuilt lazily after a cell changes
+        self._arrays: Dict[Cell, CellArrays] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell_for(self, lat: float, lng: float) -> Cell:
+        row = math.floor(lat / self.cell_deg)
+        col = math.floor((lng + 180) / self.cell_deg) % self._lng_cells
+        return row, col
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+            self._points.clear()
+            self._arrays.clear()
+
+    def upsert(
+        self,
+        tool_id: int,
+        lat: Optional[float],
+        lng: Optional[float],
+        is_available: bool = True,
+        icon_key: Optional[str] = None,
+    ) -> None:
+        """Insert, move or re-tag a tool. Tools without coordinates are removed."""
+        with self._lock:
+            self._remove_locked(tool_id)
+            if lat is None or lng is None:
+                return
+            cell = self._cell_for(lat, lng)
+            self._cells.setdefault(cell, {})[tool_id] = (lat, lng, bool(is_available), icon_key)
+            self._points[tool_id] = cell
+            self._arrays.pop(cell, None)
+
+    def remove(self, tool_id: int) -> None:
+        with self._lock:
+            self._remove_locked(tool_id)
+
+    def _remove_locked(self, tool_id: int) -> None:
+        cell = self._points.pop(tool_id, None)
+        if cell is None:
+            return
+        self._arrays.pop(cell, None)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(tool_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def load(self, points: Iterable[Tuple[int, float, float, bool, Optional[str]]]) -> None:
+        """Replace the index contents with (tool_id, lat, lng, is_available, icon_key) rows."""
+        cells: Dict[Cell, Dict[int, Entry]] = {}
+        positions: Dict[int, Cell] = {}
+        for tool_id, lat, lng, is_available, icon_key in points:
+            cell = self._cell_for(lat, lng)
+            cells.setdefault(cell, {})[tool_id] = (lat, lng, bool(is_available), icon_key)
+            positions[tool_id] = cell
+        with self._lock:
+            self._cells = cells
+            self._points = positions
+            self._arrays = {}
+
+    def _cell_arrays(self, cell: Cell) -> Optional[CellArrays]:
+        arrays = self._arrays.get(cell)
+        if arrays is None:
+            bucket = self._cells.get(cell)
+            if not bucket:
+                return None
+            ids = np.fromiter(bucket.keys(), dtype=np.int64, count=len(bucket))
+            entries = list(bucket.values())
+            arrays = (
+                ids,
+                np.array([e[0] for e in entries], dtype=np.float64),
+                np.array([e[1] for e in entries], dtype=np.float64),
+                np.array([e[2] for e in entries], dtype=bool),
+                np.array([e[3] for e in entries], dtype=object),
+            )
+            self._arrays[cell] = arrays
+        return arrays
+
+    def _box(self, lat: float, lng: float, radius_km: float) -> Tuple[int, int, Sequence[int]]:
+        """Row range and columns of the grid cells overlapping the search circle's bounding box."""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        min_row = math.floor(max(lat - dlat, -90.0) / self.cell_deg)
+        max_row = math.floor(min(lat + dlat, 90.0) / self.cell_deg)
+
+        # Widen the longitude span using the latitude closest to a pole.
+        max_abs_lat = min(abs(lat) + dlat, 90.0)
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        if cos_lat < 1e-6 or radius_km / (KM_PER_DEGREE_LAT * cos_lat) >= 180:
+            cols = range(self._lng_cells)
+        else:
+            dlng = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+            min_col = math.floor((lng - dlng + 180) / self.cell_deg)
+            max_col = math.floor((lng + dlng + 180) / self.cell_deg)
+            cols = [c % self._lng_cells for c in range(min_col, max_col + 1)]
+
+        return min_row, max_row, cols
+
+    def candidate_cells(self, lat: float, lng: float, radius_km: float) -> List[Cell]:
+        """Grid cells overlapping the bounding box of the search circle."""
+        min_row, max_row, cols = self._box(lat, lng, radius_km)
+        return [(row, col) for row in range(min_row, max_row + 1) for col in cols]
+
+    def query_radius(
+        self, lat: float, lng: float, radius_km: float
+    ) -> List[Tuple[int, float]]:
+        """
+        Return (tool_id, distance_km) pairs within radius_km of the point,
+        sorted by distance.
+
+        When the bounding box spans more cells than are occupied, the
+        occupied cells are filtered by the box instead of enumerating it, so
+        the work is bounded by the index size whatever the radius. Cell
+        lists are built before taking the lock.
+        """
+        min_row, max_row, cols = self._box(lat, lng, radius_km)
+        box_size = (max_row - min_row + 1) * len(cols)
+        # Unlocked len() is only a hint for choosing the cheaper plan
+        scan_occupied = box_size > len(self._cells)
+        if scan_occupied:
+            col_set = set(cols)
+            box_cells = None
+        else:
+            box_cells = [(row, col) for row in range(min_row, max_row + 1) for col in cols]
+
+        with self._lock:
+            if scan_occupied:
+                box_cells = [
+                    cell for cell in self._cells
+                    if min_row <= cell[0] <= max_row and cell[1] in col_set
+                ]
+            chunks = [
+                arrays
+                for arrays in (self._cell_arrays(cell) for cell in box_cells)
+                if arrays is not None
+            ]
+
+        if not chunks:
+            return []
+
+        ids = np.concatenate([c[0] for c in chunks])
+        lats = np.concatenate([c[1] for c in chunks])
+        lngs = np.concatenate([c[2] for c in chunks])
+
+        idx, distances = within_radius(lat, lng, lats, lngs, radius_km)
+        return list(zip(ids[idx].tolist(), distances.tolist()))
+
+    def _ring_cells(self, row0: int, col0: int, ring: int) -> List[Cell]:
+        """Cells on the square ring at Chebyshev distance `ring` from (row0, col0)."""
+        if ring == 0:
+            offsets = [(0, 0)]
+        else:
+            offsets = [(-ring, dc) for dc in range(-ring, ring + 1)]
+            offsets += [(ring, dc) for dc in range(-ring, ring + 1)]
+            offsets += [(dr, -ring) for dr in range(-ring + 1, ring)]
+            offsets += [(dr, ring) for dr in range(-ring + 1, ring)]
+
+        cells = []
+        for dr, dc in offsets:
+            row = row0 + dr
+            if self._min_row <= row <= self._max_row:
+                cells.append((row, (col0 + dc) % self._lng_cells))
+        return cells
+
+    def _ring_lower_bound_km(self, lat: float, lng: float, row0: int, col0: int, ring: int) -> float:
+        """
+        Lower bound on the distance from (lat, lng) to any point outside the
+        rings searched so far (rings 0..ring).
+        """
+        south = (row0 - ring) * self.cell_deg
+        north = (row0 + ring + 1) * self.cell_deg
+        lat_gap = min(
+            lat - south if south > -90.0 else math.inf,
+            north - lat if north < 90.0 else math.inf,
+        )
+        lat_bound = EARTH_RADIUS_KM * math.radians(lat_gap)
+
+        if 2 * ring + 1 >= self._lng_cells:
+            return lat_bound
+
+        west = (col0 - ring) * self.cell_deg - 180
+        east = (col0 + ring + 1) * self.cell_deg - 180
+        lng_gap = math.radians(min(lng - west, east - lng))
+        # Points outside the searched columns but inside the searched rows sit
+        # at most this far from the equator; haversine then gives
+        # hav(d) >= cos(lat) * cos(max_lat) * hav(lng_gap).
+        max_abs_lat = min(max(abs(south), abs(north)), 90.0)
+        factor = math.cos(math.radians(lat)) * math.cos(math.radians(max_abs_lat))
+        if factor <= 0:
+            # The searched rows reach a pole, where longitude stops separating points
+            return 0.0
+        lng_bound = 2 * EARTH_RADIUS_KM * math.asin(
+            min(1.0, math.sqrt(factor) * math.sin(lng_gap / 2))
+        )
+        return min(lat_bound, lng_bound)
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int,
+        is_available: Optional[bool] = None,
+        icon_key: Optional[str] = None,
+        max_radius_km: Optional[float] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return up to k (tool_id, distance_km) pairs closest to the point,
+        sorted by distance, considering only tools matching the filters.
+
+        Searches outward one ring of cells at a time and stops once the k-th
+        best distance is no larger than the lower bound on anything unsearched.
+        Once the rings would have touched more cells than are occupied, the
+        remaining occupied cells are scored directly instead, which bounds the
+        work in sparse areas and near the poles.
+        """
+        if k <= 0:
+            return []
+
+        row0, col0 = self._cell_for(lat, lng)
+        best_ids = np.empty(0, dtype=np.int64)
+        best_lats = np.empty(0, dtype=np.float64)
+        best_lngs = np.empty(0, dtype=np.float64)
+        best_dists = np.empty(0, dtype=np.float64)
+
+        def score(chunks: List[CellArrays]) -> None:
+            nonlocal best_ids, best_lats, best_lngs, best_dists
+            if not chunks:
+                return
+            ids, lats, lngs, available, icons = (
+                np.concatenate([c[i] for c in chunks]) for i in range(5)
+            )
+            mask = np.ones(ids.shape[0], dtype=bool)
+            if is_available is not None:
+                mask &= available == is_available
+            if icon_key is not None:
+                mask &= icons == icon_key
+            if not mask.any():
+                return
+            # Merge into the best so far. Without max_radius_km, nearest_k uses
+            # exact haversine distances, which the ring bound is compared to;
+            # the k closest overall that are within the radius are the k
+            # closest within it.
+            ids = np.concatenate([best_ids, ids[mask]])
+            lats = np.concatenate([best_lats, lats[mask]])
+            lngs = np.concatenate([best_lngs, lngs[mask]])
+            idx, dists = nearest_k(lat, lng, lats, lngs, k)
+            if max_radius_km is not None:
+                keep = dists <= max_radius_km
+                idx, dists = idx[keep], dists[keep]
+            best_ids, best_lats, best_lngs, best_dists = ids[idx], lats[idx], lngs[idx], dists
+
+        with self._lock:
+            visited = set()
+            ring = 0
+            while True:
+                ring_cells = self._ring_cells(row0, col0, ring)
+                if not ring_cells or len(visited) + len(ring_cells) > len(self._cells):
+                    # Cheaper to score every occupied cell not yet searched
+                    score([
+                        self._cell_arrays(cell)
+                        for cell in list(self._cells)
+                        if cell not in visited
+                    ])
+                    break
+
+                chunks = []
+                for cell in ring_cells:
+                    if cell in visited:
+                        continue
+                    visited.add(cell)
+                    arrays = self._cell_arrays(cell)
+                    if arrays is not None:
+                        chunks.append(arrays)
+                score(chunks)
+
+                bound = self._ring_lower_bound_km(lat, lng, row0, col0, ring)
+                if best_ids.shape[0] >= k and best_dists.max() <= bound:
+                    break
+                if max_radius_km is not None and bound > max_radius_km:
+                    break
+                if math.isinf(bound):
+                    break
+                ring += 1
+
+        return list(zip(best_ids.tolist(), best_dists.tolist()))
+
+
+tool_index = SpatialIndex()
+
+# Version of the tools table the shared index was last loaded at
+_loaded_version: Optional[int] = None
+
+
+def index_tool(tool: Tool) -> None:
+    """Insert or refresh a tool's entry in the shared index and map clusters."""
+    tool_index.upsert(tool.id, tool.lat, tool.lng, tool.is_available, tool.icon_key)
+    tool_clusters.upsert(tool.id, tool.lat, tool.lng, tool.is_available)
+
+
+def unindex_tool(tool_id: int) -> None:
+    """Drop a deleted tool from the shared index and map clusters."""
+    tool_index.remove(tool_id)
+    tool_clusters.remove(tool_id)
+
+
+def build_tool_index(db: Session) -> None:
+    """Load every tool with coordinates into the shared index and map clusters."""
+    global _loaded_version
+    # Read before the rows: a write committing during the load moves the
+    # version again, so the next sync reloads
+    version = get_versions(db, ["tools"])["tools"]
+    rows = (
+        db.query(Tool.id, Tool.lat, Tool.lng, Tool.is_available, Tool.icon_key)
+        .filter(Tool.lat.isnot(None), Tool.lng.isnot(None))
+        .all()
+    )
+    tool_index.load(rows)
+    tool_clusters.load((r[0], r[1], r[2], r[3]) for r in rows)
+    _loaded_version = version
+    logger.info(f"Spatial index built with {len(tool_index)} tools")
+
+
+def sync_tool_index() -> bool:
+    """Reload the shared index if the tools table changed since it was loaded; returns whether it did."""
+    db = SessionLocal()
+    try:
+        if get_versions(db, ["tools"])["tools"] == _loaded_version:
+            return False
+        build_tool_index(db)
+        return True
+    finally:
+        db.close()
+
+
+async def run_tool_index_sync(interval_seconds: float) -> None:
+    """Lifespan task: pick up tool changes made by other processes, off the event loop."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(sync_tool_index)
+        except Exception:
+            logger.exception("Spatial index sync failed; retrying after the interval")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Backfill lat/lng for tools and users that have an address but no coordinates.
+
+Usage:
+    python scripts/backfill_geocoding.py [--batch-size 50] [--rate 1.0] [--max-batches N] [--restart]
+
+Progress is checkpointed per batch, so the script can be stopped and re-run
+without starting over. A run stops early if the geocoder fails (see
+upstream_errors in the output); re-run it later to continue. Use --restart
+to rescan rows whose address did not resolve.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.geocode_backfill import run_backfill
+from app.services.http_client import close_http_client
+
+
+async def main(args) -> None:
+    try:
+        summary = await run_backfill(
+            batch_size=args.batch_size,
+            rate_per_second=args.rate,
+            max_batches=args.max_batches,
+            restart=args.restart,
+        )
+    finally:
+        await close_http_client()
+
+    for name, stats in summary.items():
+        print(f"{name}:")
+        for key, value in stats.items():
+            print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--rate", type=float, default=None, help="Upstream requests per second")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after N batches per table")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved checkpoints")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Load test the hot routes with sync vs async database sessions.
+
+For each mode, starts the API under uvicorn with DATABASE_ASYNC=false/true
+and drives it with many concurrent clients for a fixed duration. The mix
+covers tool browse, nearby search and borrow-request listings, with the
+response cache off so every request reaches the database. Reports
+throughput and latency percentiles per mode and concurrency level.
+
+Usage:
+    python scripts/bench_async_load.py [--concurrency 50 200] [--duration 10]
+    python scripts/bench_async_load.py --database-url postgresql+psycopg://...  # scratch DB only!
+
+By default a temporary SQLite database is used (async mode then needs
+aiosqlite). SQLite serializes access, so compare modes on Postgres for
+numbers that mean something.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test sync vs async database sessions")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--tools", type=int, default=5_000, help="Tools to seed")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", default=None, help="Scratch database; tables are dropped!")
+    return parser.parse_args()
+
+
+args = parse_args()
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mktemp(suffix='.db')}"
+os.environ["DEBUG"] = "false"
+
+from app.db.session import engine  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.borrow_request import BorrowRequest, RequestStatus  # noqa: E402
+from app.models.table_version import TableVersion  # noqa: E402, F401
+from app.models.tool import Tool  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def seed(n_tools: int) -> int:
+    """Create users, tools around Stockholm and borrow requests. Returns the user count."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    n_users = max(10, n_tools // 20)
+
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{"id": i, "email": f"user{i}@example.com", "full_name": f"User {i}"} for i in range(1, n_users + 1)],
+        )
+        conn.execute(
+            Tool.__table__.insert(),
+            [
+                {
+                    "id": i,
+                    "name": f"Tool {i}",
+                    "owner_id": rng.randint(1, n_users),
+                    "is_available": rng.random() < 0.8,
+                    "lat": 59.33 + rng.uniform(-0.2, 0.2),
+                    "lng": 18.06 + rng.uniform(-0.4, 0.4),
+                }
+                for i in range(1, n_tools + 1)
+            ],
+        )
+        conn.execute(
+            BorrowRequest.__table__.insert(),
+            [
+                {
+                    "tool_id": rng.randint(1, n_tools),
+                    "borrower_id": rng.randint(1, n_users),
+                    "status": rng.choice(list(RequestStatus)),
+                }
+                for _ in range(n_tools // 2)
+            ],
+        )
+    return n_users
+
+
+def request_mix(n_users: int, rng: random.Random) -> str:
+    user_id = rng.randint(1, n_users)
+    return rng.choice(
+        [
+            f"/api/tools/?current_user_id={user_id}&limit=50",
+            "/api/geo/tools/near?lat=59.33&lng=18.06&radius_km=2",
+            f"/api/borrow_requests/owner/{user_id}",
+            f"/api/borrow_requests/borrower/{user_id}",
+        ]
+    )
+
+
+def start_server(async_mode: bool) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_ASYNC="true" if async_mode else "false",
+        RESPONSE_CACHE_ENABLED="false",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def wait_until_up(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, n_users: int):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker(seed: int):
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(request_mix(n_users, rng))
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return latencies, errors, elapsed
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+def main():
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    n_users = seed(args.tools)
+    engine.dispose()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"Seeded {args.tools} tools, {n_users} users; {args.duration:.0f}s per run")
+    print()
+    print(f"{'mode':>6} {'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    for async_mode in (False, True):
+        server = start_server(async_mode)
+        try:
+            wait_until_up(base_url)
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = asyncio.run(
+                    run_load(base_url, concurrency, args.duration, n_users)
+                )
+                latencies.sort()
+                print(
+                    f"{'async' if async_mode else 'sync':>6} {concurrency:>8} {len(latencies):>9} {errors:>7} "
+                    f"{len(latencies) / elapsed:>8.1f} {statistics.median(latencies) if latencies else float('nan'):>8.1f} "
+                    f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f}"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
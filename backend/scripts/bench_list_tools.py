@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/tools/ query strategies.
+
+Compares the previous implementation (tools + owners, then one GROUP BY for
+pending counts and two per-user queries, attached with setattr) against the
+single aggregated SELECT in app.api.tools.list_tools. Reports statements per
+request (including the ETag version lookup) and latency, and checks both
+produce identical ToolRead output.
+
+Usage:
+    python scripts/bench_list_tools.py [--sizes 10000 100000] [--limit 100] [--repeat 20]
+    python scripts/bench_list_tools.py --database-url postgresql+psycopg://...  # scratch DB only!
+
+By default a temporary SQLite database is created and seeded.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark list_tools query strategies")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--limit", type=int, default=100, help="Page size")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None, help="Scratch database; tables are dropped!")
+    return parser.parse_args()
+
+
+args = parse_args()
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mktemp(suffix='.db')}"
+os.environ.setdefault("DEBUG", "false")
+
+import json  # noqa: E402
+
+from fastapi import Request, Response  # noqa: E402
+from sqlalchemy import event, func  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app.api.cache import response_cache  # noqa: E402
+from app.api.tools import list_tools  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.borrow_request import BorrowRequest, RequestStatus  # noqa: E402
+from app.models.tool import Tool  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.tool import ToolRead  # noqa: E402
+
+statement_count = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statements(conn, cursor, statement, parameters, context, executemany):
+    global statement_count
+    statement_count += 1
+
+
+def seed(n_tools: int) -> int:
+    """Create users, n_tools tools and ~n_tools/2 borrow requests. Returns a borrower id."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    n_users = max(10, n_tools // 20)
+
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{"id": i, "email": f"user{i}@example.com", "full_name": f"User {i}"} for i in range(1, n_users + 1)],
+        )
+        conn.execute(
+            Tool.__table__.insert(),
+            [
+                {
+                    "id": i,
+                    "name": f"Tool {rng.randint(0, n_tools)}",
+                    "owner_id": rng.randint(1, n_users),
+                    "is_available": rng.random() < 0.8,
+                }
+                for i in range(1, n_tools + 1)
+            ],
+        )
+        statuses = [RequestStatus.PENDING, RequestStatus.APPROVED, RequestStatus.DECLINED]
+        conn.execute(
+            BorrowRequest.__table__.insert(),
+            [
+                {
+                    "tool_id": rng.randint(1, n_tools),
+                    "borrower_id": rng.randint(1, n_users),
+                    "message": f"msg {i}",
+                    "status": rng.choice(statuses),
+                }
+                for i in range(n_tools // 2)
+            ],
+        )
+    return 1
+
+
+def legacy_list_tools(db, current_user_id, limit):
+    """The multi-query implementation list_tools used before the aggregated SELECT."""
+    tools = (
+        db.query(Tool).options(joinedload(Tool.owner)).order_by(Tool.id).limit(limit).all()
+    )
+    tool_ids = [t.id for t in tools]
+
+    pending_counts = (
+        db.query(BorrowRequest.tool_id, func.count(BorrowRequest.id))
+        .filter(BorrowRequest.tool_id.in_(tool_ids), BorrowRequest.status == RequestStatus.PENDING)
+        .group_by(BorrowRequest.tool_id)
+        .all()
+    )
+    pending_count_map = {row[0]: row[1] for row in pending_counts}
+    for t in tools:
+        if t.owner:
+            setattr(t, "owner_email", t.owner.email)
+            setattr(t, "owner_name", t.owner.full_name)
+        setattr(t, "pending_request_count", pending_count_map.get(t.id, 0))
+
+    pending_requests = (
+        db.query(BorrowRequest.tool_id, BorrowRequest.message)
+        .filter(
+            BorrowRequest.tool_id.in_(tool_ids),
+            BorrowRequest.borrower_id == current_user_id,
+            BorrowRequest.status == RequestStatus.PENDING,
+        )
+        .order_by(BorrowRequest.id)
+        .all()
+    )
+    pending_map = {row[0]: row[1] for row in pending_requests}
+    approved_set = {
+        row[0]
+        for row in db.query(BorrowRequest.tool_id)
+        .filter(
+            BorrowRequest.tool_id.in_(tool_ids),
+            BorrowRequest.borrower_id == current_user_id,
+            BorrowRequest.status == RequestStatus.APPROVED,
+        )
+        .all()
+    }
+    for t in tools:
+        setattr(t, "has_pending_request", t.id in pending_map)
+        setattr(t, "is_borrowing", t.id in approved_set)
+        setattr(t, "my_pending_request_message", pending_map.get(t.id))
+    return tools
+
+
+def aggregated_list_tools(db, current_user_id, limit):
+    request = Request({"type": "http", "method": "GET", "path": "/api/tools/", "query_string": b"", "headers": []})
+    rendered = list_tools(
+        request=request,
+        response=Response(),
+        db=db,
+        current_user_id=current_user_id,
+        limit=limit,
+        cursor=None,
+        sort="id",
+        is_available=None,
+        owner_id=None,
+        icon_key=None,
+        exclude_own=False,
+    )
+    return json.loads(rendered.body)
+
+
+def measure(fn, current_user_id, limit, repeat):
+    global statement_count
+    timings = []
+    statements = 0
+    output = None
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            statement_count = 0
+            started = time.perf_counter()
+            rows = fn(db, current_user_id, limit)
+            output = [ToolRead.model_validate(r, from_attributes=True).model_dump(mode="json") for r in rows]
+            timings.append((time.perf_counter() - started) * 1000)
+            statements = statement_count
+        finally:
+            db.close()
+    return output, statements, timings
+
+
+def main():
+    # Measure the query path, not cache hits
+    response_cache.enabled = False
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Page size: {args.limit}, repeats: {args.repeat}")
+    print()
+    print(f"{'tools':>8} {'strategy':>12} {'queries':>8} {'p50 ms':>8} {'p95 ms':>8}")
+
+    for size in args.sizes:
+        borrower_id = seed(size)
+        results = {}
+        for name, fn in (("legacy", legacy_list_tools), ("aggregated", aggregated_list_tools)):
+            output, statements, timings = measure(fn, borrower_id, args.limit, args.repeat)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{size:>8} {name:>12} {statements:>8} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+            results[name] = output
+
+        if results["legacy"] != results["aggregated"]:
+            print("  WARNING: outputs differ")
+
+    if not args.database_url:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON rendering of list responses.
+
+Compares the response_model path (validate every row with from_attributes,
+dump, json.dumps) against the fast path in app.api.serialization for
+ToolRead and BorrowRequestRead lists built from in-memory ORM objects, and
+checks both produce the same JSON.
+
+Usage:
+    python scripts/bench_serialization.py [--sizes 1000 10000 100000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DEBUG", "false")
+
+from app.api.serialization import ListSerializer  # noqa: E402
+from app.models.borrow_request import BorrowRequest, RequestStatus  # noqa: E402
+from app.models.tool import Tool  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.borrow_request import BorrowRequestRead  # noqa: E402
+from app.schemas.tool import ToolRead  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def make_tools(n: int, rng: random.Random) -> list:
+    tools = []
+    for i in range(1, n + 1):
+        tool = Tool(
+            id=i,
+            name=f"Tool {i} – drill",
+            description=rng.choice([None, "Cordless, two batteries"]),
+            address=f"{i} Main Street",
+            owner_id=rng.randint(1, 500),
+            is_available=rng.random() < 0.8,
+            lat=rng.uniform(-60, 60),
+            lng=rng.uniform(-180, 180),
+            icon_key=rng.choice([None, "drill", "saw"]),
+        )
+        # Same annotations list_tools_for_owner attaches with setattr
+        setattr(tool, "is_borrowed", not tool.is_available)
+        setattr(tool, "borrowed_by_user_id", 7 if not tool.is_available else None)
+        setattr(tool, "borrowed_by_email", "user7@example.com" if not tool.is_available else None)
+        tools.append(tool)
+    return tools
+
+
+def make_requests(n: int, rng: random.Random) -> list:
+    users = [User(id=i, email=f"user{i}@example.com", full_name=f"User {i}") for i in range(1, 501)]
+    tools = [Tool(id=i, name=f"Tool {i}", owner_id=1) for i in range(1, 1001)]
+    created = datetime(2026, 1, 1, 12, 30)
+    requests = []
+    for i in range(1, n + 1):
+        tool = rng.choice(tools)
+        borrower = rng.choice(users)
+        req = BorrowRequest(
+            id=i,
+            tool_id=tool.id,
+            borrower_id=borrower.id,
+            message=rng.choice([None, "Could I borrow this on Saturday?"]),
+            status=rng.choice(list(RequestStatus)),
+            start_date=date(2026, 1, 1),
+            due_date=date(2026, 1, 1) + timedelta(days=rng.randint(1, 30)),
+            created_at=created,
+            updated_at=created + timedelta(minutes=i),
+        )
+        req.tool = tool
+        req.borrower = borrower
+        setattr(req, "is_overdue", False)
+        setattr(req, "days_overdue", 0)
+        setattr(req, "days_until_due", rng.randint(0, 30))
+        requests.append(req)
+    return requests
+
+
+def measure(render, rows, repeat: int):
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    return body, timings
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(42)
+    cases = (
+        ("ToolRead", ListSerializer(ToolRead), make_tools),
+        ("BorrowRequestRead", ListSerializer(BorrowRequestRead), make_requests),
+    )
+
+    print(f"Repeats: {args.repeat}")
+    print()
+    print(f"{'model':>18} {'rows':>8} {'path':>15} {'p50 ms':>9} {'min ms':>9} {'speedup':>8}")
+
+    for model_name, serializer, make_rows in cases:
+        for size in args.sizes:
+            rows = make_rows(size, rng)
+            reference, slow = measure(serializer.render_validated, rows, args.repeat)
+            fast_body, fast = measure(serializer.render_fast, rows, args.repeat)
+            speedup = statistics.median(slow) / statistics.median(fast)
+
+            print(f"{model_name:>18} {size:>8} {'response_model':>15} {statistics.median(slow):>9.2f} {min(slow):>9.2f}")
+            print(f"{model_name:>18} {size:>8} {'fast':>15} {statistics.median(fast):>9.2f} {min(fast):>9.2f} {speedup:>7.1f}x")
+
+            if fast_body != reference:
+                same = json.loads(fast_body) == json.loads(reference)
+                print(f"  {'NOTE: bytes differ, JSON equal' if same else 'WARNING: outputs differ'}")
+
+
+if __name__ == "__main__":
+    main()
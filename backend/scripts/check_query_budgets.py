@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Check SQL statement budgets for the main endpoints.
+
+Seeds a temporary database with enough users, tools and borrow requests that
+a per-row lazy load would show up as a repeated statement, then calls each
+endpoint under app.db.query_stats.query_budget with the response cache off.
+Listings must also run every statement shape at most once. Exits non-zero
+when any budget is exceeded, so it can run in CI.
+
+Usage:
+    python scripts/check_query_budgets.py [--verbose]
+
+When an endpoint legitimately needs more statements, raise its budget here
+in the same change.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Removed on exit, database included
+_tmp_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp_dir.name) / 'budgets.db'}"
+os.environ["DEBUG"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+os.environ["DB_N_PLUS_ONE_THRESHOLD"] = "0"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.auth import create_access_token  # noqa: E402
+from app.db.query_stats import query_budget  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.borrow_request import BorrowRequest, RequestStatus  # noqa: E402
+from app.models.table_version import TableVersion  # noqa: E402, F401
+from app.models.tool import Tool  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+OWNER_ID = 1
+BORROWER_ID = 2
+N_USERS = 10
+N_TOOLS = 30
+
+# (method, path, json body, max statements, max repeats of one statement shape).
+# Calls run in this order with one token, so only the first that needs the
+# user loads it;
+# the first write also creates the table_versions rows.
+BUDGETS = [
+    ("GET", "/api/tools/?limit=50", None, 2, 1),
+    ("GET", f"/api/tools/?limit=50&current_user_id={BORROWER_ID}", None, 2, 1),
+    ("GET", f"/api/tools/owner/{OWNER_ID}", None, 3, 1),
+    ("GET", "/api/geo/tools/near?lat=59.33&lng=18.06&radius_km=50", None, 2, 1),
+    ("GET", "/api/borrow_requests/", None, 2, 1),
+    ("GET", f"/api/borrow_requests/owner/{OWNER_ID}", None, 2, 1),
+    ("GET", f"/api/borrow_requests/borrower/{BORROWER_ID}", None, 2, 1),
+    (
+        "POST",
+        "/api/borrow_requests/",
+        {"tool_id": N_TOOLS, "borrower_id": BORROWER_ID, "start_date": "2026-01-01", "due_date": "2026-01-05"},
+        11,
+        None,
+    ),
+    # Writes include the email_outbox INSERT
+    ("PATCH", "/api/borrow_requests/1/approve", None, 13, None),
+    # Set-based: the statement count does not grow with the number of ids
+    ("PATCH", "/api/borrow_requests/bulk", {"ids": list(range(2, 12)), "status": "DECLINED"}, 4, 1),
+    ("GET", "/api/auth/me", None, 0, None),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check per-endpoint SQL statement budgets")
+    parser.add_argument("--verbose", action="store_true", help="Print the statements of every call")
+    return parser.parse_args()
+
+
+def seed() -> None:
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{"id": i, "email": f"user{i}@example.com", "full_name": f"User {i}"} for i in range(1, N_USERS + 1)],
+        )
+        conn.execute(
+            Tool.__table__.insert(),
+            [
+                {"id": i, "name": f"Tool {i}", "owner_id": OWNER_ID if i <= N_TOOLS // 2 else 3,
+                 "is_available": True, "lat": 59.33 + i / 1000, "lng": 18.06}
+                for i in range(1, N_TOOLS + 1)
+            ],
+        )
+        # Pending requests from several borrowers on the owner's tools
+        conn.execute(
+            BorrowRequest.__table__.insert(),
+            [
+                {"tool_id": 1 + i % (N_TOOLS // 2), "borrower_id": 2 + i % (N_USERS - 3),
+                 "status": RequestStatus.PENDING}
+                for i in range(20)
+            ],
+        )
+
+
+def main():
+    args = parse_args()
+    seed()
+    headers = {"Authorization": f"Bearer {create_access_token(OWNER_ID)}"}
+    failures = 0
+
+    with TestClient(app) as client:
+        for method, path, body, max_queries, max_repeats in BUDGETS:
+            try:
+                with query_budget(max_queries, max_repeats=max_repeats) as stats:
+                    response = client.request(method, path, json=body, headers=headers)
+                outcome = "ok"
+            except AssertionError:
+                outcome = "OVER BUDGET"
+            if response.status_code >= 400:
+                outcome = f"HTTP {response.status_code}"
+            if outcome != "ok":
+                failures += 1
+            print(f"{method:6} {path:60} {stats.count:>3}/{max_queries:<3} {outcome}")
+            if args.verbose or outcome != "ok":
+                print("       " + stats.report(top=10).replace("\n", "\n       "))
+
+    if failures:
+        print(f"\n{failures} endpoint(s) failed")
+        sys.exit(1)
+    print("\nAll endpoints within budget")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        engine.dispose()
+        _tmp_dir.cleanup()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Send queued notification emails from the email outbox.
+
+Usage:
+    python scripts/email_outbox_worker.py [--batch-size 100] [--concurrency 10] [--poll-interval 5] [--once]
+
+Runs until interrupted. Several workers can run side by side on Postgres;
+each claims its own batches. With --once, sends one batch, prints its
+counters and exits.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.outbox import drain_outbox, run_outbox_worker
+
+
+def main(args) -> None:
+    if args.once:
+        stats = drain_outbox(batch_size=args.batch_size, concurrency=args.concurrency)
+        for key, value in stats.items():
+            print(f"{key}: {value}")
+        return
+
+    asyncio.run(
+        run_outbox_worker(
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            poll_interval=args.poll_interval,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=None, help="SES calls in flight")
+    parser.add_argument("--poll-interval", type=float, default=None, help="Seconds to wait when the outbox is empty")
+    parser.add_argument("--once", action="store_true", help="Send one batch and exit")
+    try:
+        main(parser.parse_args())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Send due-tomorrow and overdue reminder emails to borrowers.
+
+Usage:
+    python scripts/send_reminders.py [--kind due_soon|overdue] [--today YYYY-MM-DD]
+                                     [--batch-size 500] [--rate 14] [--dry-run]
+
+Meant to run once a day (cron, a scheduled ECS task, ...). Loans already
+reminded are recorded in sent_reminders, so re-running it on the same day
+only sends what an earlier run missed.
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.reminders import REMINDER_KINDS, run_reminders
+
+
+def main(args) -> None:
+    summary = run_reminders(
+        kinds=[args.kind] if args.kind else REMINDER_KINDS,
+        today=args.today,
+        batch_size=args.batch_size,
+        max_send_rate=args.rate,
+        dry_run=args.dry_run,
+    )
+
+    for kind, stats in summary.items():
+        print(f"{kind}:")
+        for key, value in stats.items():
+            print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--kind", choices=REMINDER_KINDS, default=None, help="Only send this kind")
+    parser.add_argument("--today", type=date.fromisoformat, default=None, help="Run as of this date")
+    parser.add_argument("--batch-size", type=int, default=None, help="Borrowers loaded per query")
+    parser.add_argument("--rate", type=float, default=None, help="Max emails per second")
+    parser.add_argument("--dry-run", action="store_true", help="Count reminders without sending")
+    main(parser.parse_args())
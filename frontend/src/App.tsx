@@ -32,7 +32,9 @@ function App() {
     if (!user) return;
 
     // Fetch owner's incoming requests (for lending count)
-    apiGet<BorrowRequestForCount[]>(`/borrow_requests/owner/${user.id}`)
+    apiGet<BorrowRequestForCount[]>(
+      `/borrow_requests/owner/${user.id}?status=PENDING&status=RETURN_PENDING`
+    )
       .then((data) => {
         // Count PENDING (need approval) + RETURN_PENDING (need confirmation)
         const actionNeeded = data.filter(
@@ -45,8 +47,10 @@ function App() {
         setLendingCount(0);
       });
 
-    // Fetch borrower's requests (for borrowing count)
-    apiGet<BorrowRequestForCount[]>(`/borrow_requests/borrower/${user.id}`)
+    // Fetch borrower's active loans (for borrowing count)
+    apiGet<BorrowRequestForCount[]>(
+      `/borrow_requests/borrower/${user.id}?status=APPROVED&status=RETURN_PENDING`
+    )
       .then((data) => {
         // Count overdue items + RETURN_PENDING (waiting for owner)
         const actionNeeded = data.filter(
@@ -47,6 +47,25 @@ export async function apiGet<T>(path: string): Promise<T> {
   return res.json();
 }
 
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+// GET a keyset-paginated list; the next page cursor comes back in X-Next-Cursor.
+export async function apiGetPage<T>(path: string, cursor?: string | null): Promise<Page<T>> {
+  const sep = path.includes("?") ? "&" : "?";
+  const url = cursor ? `${path}${sep}cursor=${encodeURIComponent(cursor)}` : path;
+  const res = await fetch(`${API_BASE_URL}${url}`, {
+    headers: { ...getAuthHeaders() },
+  });
+  if (!res.ok) {
+    const detail = await readErrorDetail(res);
+    throw new Error(detail ?? `GET ${path} failed: ${res.status}`);
+  }
+  return { items: await res.json(), nextCursor: res.headers.get("X-Next-Cursor") };
+}
+
 export async function apiPost<T>(path: string, body: any): Promise<T> {
   const res = await fetch(`${API_BASE_URL}${path}`, {
     method: "POST",
@@ -1,6 +1,6 @@
 // src/pages/BrowseToolsPage.tsx
 import { useEffect, useState } from "react";
-import { apiGet } from "../lib/api";
+import { apiGet, apiGetPage } from "../lib/api";
 import CreateBorrowRequestForm from "../components/CreateBorrowRequestForm";
 import ToolsMap from "../components/ToolsMap";
 import { ToolIcon } from "../components/ToolIcon";
@@ -42,6 +42,8 @@ interface BrowseToolsPageProps {
 
 export default function BrowseToolsPage({ currentUserId, reloadToken }: BrowseToolsPageProps) {
   const [tools, setTools] = useState<Tool[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [activeRequestToolId, setActiveRequestToolId] = useState<number | null>(null);
@@ -60,9 +62,10 @@ export default function BrowseToolsPage({ currentUserId, reloadToken }: BrowseTo
 
   function loadTools() {
     setLoading(true);
-    apiGet<Tool[]>(`/tools?current_user_id=${currentUserId}`)
-      .then((data) => {
-        setTools(data);
+    apiGetPage<Tool>(`/tools?current_user_id=${currentUserId}`)
+      .then((page) => {
+        setTools(page.items);
+        setNextCursor(page.nextCursor);
         setError(null);
       })
       .catch((err: unknown) => {
@@ -74,11 +77,29 @@ export default function BrowseToolsPage({ currentUserId, reloadToken }: BrowseTo
       });
   }
 
+  function loadMoreTools() {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    apiGetPage<Tool>(`/tools?current_user_id=${currentUserId}`, nextCursor)
+      .then((page) => {
+        setTools((prev) => [...prev, ...page.items]);
+        setNextCursor(page.nextCursor);
+      })
+      .catch((err: unknown) => {
+        console.error(err);
+        setError("Failed to load more tools.");
+      })
+      .finally(() => {
+        setLoadingMore(false);
+      });
+  }
+
   function loadNearbyTools(lat: number, lng: number, radius: number) {
     setLoading(true);
     apiGet<Tool[]>(`/geo/tools/near?lat=${lat}&lng=${lng}&radius_km=${radius}`)
       .then((data) => {
         setTools(data);
+        setNextCursor(null);
         setError(null);
       })
       .catch((err: unknown) => {
@@ -456,6 +477,12 @@ export default function BrowseToolsPage({ currentUserId, reloadToken }: BrowseTo
           })}
         </ul>
       )}
+
+      {!loading && !error && nextCursor && (
+        <button type="button" onClick={loadMoreTools} disabled={loadingMore}>
+          {loadingMore ? "Loading..." : "Load more tools"}
+        </button>
+      )}
     </div>
   );
 }